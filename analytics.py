@@ -0,0 +1,393 @@
+"""
+Run-level analytics for experiment results
+Flattens experiment results into per-run DataFrames and reports latency, token and cost distributions
+"""
+
+from typing import List, Dict, Any, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# Columns identifying one agent configuration in the comparison table
+# (every field of sweep_planner.CONFIG_FIELDS, so different setups never share a row)
+GROUP_COLUMNS = [
+    "persona", "model", "think_model", "respond_model", "escalation_model",
+    "temperature", "top_p", "max_tokens", "max_iterations"
+]
+
+# Run latency percentiles reported per configuration
+LATENCY_PERCENTILES = (50, 90, 99)
+
+# Nodes of the ReAct graph, in the order they are reported
+NODE_ORDER = ["think", "act", "observe", "respond"]
+
+# Numeric per-run fields copied from query results (missing for failed runs)
+RUN_METRIC_COLUMNS = (
+    "iterations", "tool_calls", "iterations_saved", "prompt_tokens", "completion_tokens",
+    "cached_tokens", "total_tokens", "cost", "observation_tokens", "prefetched", "prefetch_hits"
+)
+
+# Display names for the comparison table
+COLUMN_LABELS = {
+    "persona": "Persona",
+    "model": "Model",
+    "think_model": "Think Model",
+    "respond_model": "Respond Model",
+    "escalation_model": "Escalation Model",
+    "temperature": "Temperature",
+    "top_p": "Top-P",
+    "max_tokens": "Max Tokens",
+    "max_iterations": "Max Iterations",
+}
+
+
+def _config_values(result: Dict[str, Any]) -> tuple:
+    """Values of GROUP_COLUMNS for an experiment result (per-node models default to its model)"""
+    model = result["model_name"]
+    return (
+        result["persona_key"],
+        model,
+        result.get("think_model") or model,
+        result.get("respond_model") or model,
+        result.get("escalation_model") or "",
+        result["temperature"],
+        result["top_p"],
+        result.get("max_tokens"),
+        result.get("max_iterations"),
+    )
+
+
+def runs_to_dataframe(results: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Flatten experiment results into one row per agent run
+
+    Args:
+        results: Experiment results as produced by ExperimentRunner
+
+    Returns:
+        DataFrame with one row per (experiment, query) run; results copied from
+        an identical run of another experiment (`shared_from`) are counted once,
+        the experiments that reused a run are listed in its `shared_by` column
+    """
+    columns = {
+        "experiment_id": [],
+        **{column: [] for column in GROUP_COLUMNS},
+        "query_number": [],
+        "success": [],
+        "escalated": [],
+        "duration": [],
+        "iterations": [],
+        "tool_calls": [],
+        "iterations_saved": [],
+        "prompt_tokens": [],
+        "completion_tokens": [],
+        "cached_tokens": [],
+        "total_tokens": [],
+        "cost": [],
+        "observation_tokens": [],
+        "prefetched": [],
+        "prefetch_hits": [],
+        "shared_by": [],
+    }
+
+    # Experiments reusing each run, by (experiment id, query number) of the run
+    shared_by = {}
+    for result in results:
+        for qr in result["query_results"]:
+            if "shared_from" in qr:
+                source = (qr["shared_from"]["experiment_id"], qr["shared_from"]["query_number"])
+                shared_by.setdefault(source, set()).add(result["experiment_id"])
+
+    for result in results:
+        query_results = [qr for qr in result["query_results"] if "shared_from" not in qr]
+        n = len(query_results)
+        columns["experiment_id"].extend([result["experiment_id"]] * n)
+        for column, value in zip(GROUP_COLUMNS, _config_values(result)):
+            columns[column].extend([value] * n)
+        columns["query_number"].extend(qr["query_number"] for qr in query_results)
+        columns["success"].extend(qr["success"] for qr in query_results)
+        columns["escalated"].extend(qr.get("tier") == "escalated" for qr in query_results)
+        columns["duration"].extend(qr.get("duration", np.nan) for qr in query_results)
+        for column in RUN_METRIC_COLUMNS:
+            columns[column].extend(
+                np.nan if qr.get(column) is None else qr[column] for qr in query_results
+            )
+        columns["shared_by"].extend(
+            ";".join(str(e) for e in sorted(shared_by.get((result["experiment_id"], qr["query_number"]), ())))
+            for qr in query_results
+        )
+
+    df = pd.DataFrame(columns)
+    df["success"] = df["success"].astype(bool)
+    for column in ("duration",) + RUN_METRIC_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    return df
+
+
+def node_metrics_to_dataframe(results: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Flatten the per-node metrics of every run into a long DataFrame
+
+    Args:
+        results: Experiment results as produced by ExperimentRunner
+
+    Returns:
+        DataFrame with one row per executed graph node (tokens are NaN for tool nodes)
+    """
+    columns = {column: [] for column in GROUP_COLUMNS + ["run", "node", "duration", "total_tokens"]}
+    run_id = 0
+
+    for result in results:
+        config_values = _config_values(result)
+        for qr in result["query_results"]:
+            if "shared_from" in qr:
+                continue
+            metrics = qr.get("node_metrics") or []
+            n = len(metrics)
+            for column, value in zip(GROUP_COLUMNS, config_values):
+                columns[column].extend([value] * n)
+            columns["run"].extend([run_id] * n)
+            columns["node"].extend(m["node"] for m in metrics)
+            columns["duration"].extend(m["duration"] for m in metrics)
+            columns["total_tokens"].extend(m.get("total_tokens", np.nan) for m in metrics)
+            run_id += 1
+
+    return pd.DataFrame(columns)
+
+
+def _compress_sample(values: np.ndarray, max_support: int):
+    """
+    Reduce a sample to (support values, counts) for multinomial resampling
+
+    Samples with few distinct values (e.g. success flags) are kept exact;
+    larger ones are binned into equal-count bins represented by their means.
+    """
+    support, counts = np.unique(values, return_counts=True)
+    if len(support) <= max_support:
+        return support, counts
+
+    ordered = np.sort(values)
+    bins = np.array_split(ordered, max_support)
+    support = np.array([b.mean() for b in bins])
+    counts = np.array([len(b) for b in bins])
+    return support, counts
+
+
+def bootstrap_ci(
+    values: Sequence[float],
+    statistic: str = "mean",
+    q: float = 50,
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    max_support: int = 512,
+    seed: Optional[int] = 0
+) -> tuple:
+    """
+    Bootstrap confidence interval for the mean or a percentile of a sample
+
+    Resampling with replacement is done as one multinomial draw over the
+    sample's (binned) support, so the cost is O(n_resamples * max_support)
+    regardless of how many runs the sample contains.
+
+    Args:
+        values: Sample values (NaNs are ignored)
+        statistic: "mean" or "percentile"
+        q: Percentile in [0, 100] when statistic is "percentile"
+        n_resamples: Number of bootstrap resamples
+        confidence: Confidence level of the interval
+        max_support: Maximum number of distinct values kept for resampling
+        seed: Random seed for reproducible intervals
+
+    Returns:
+        (low, high) tuple, NaNs for an empty sample
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    n = len(values)
+    if n == 0:
+        return (np.nan, np.nan)
+
+    support, counts = _compress_sample(values, max_support)
+    rng = np.random.default_rng(seed)
+    resampled = rng.multinomial(n, counts / n, size=n_resamples)
+
+    if statistic == "mean":
+        stats = resampled @ support / n
+    elif statistic == "percentile":
+        cumulative = np.cumsum(resampled, axis=1)
+        index = np.argmax(cumulative >= np.ceil(q / 100 * n), axis=1)
+        stats = support[index]
+    else:
+        raise ValueError(f"Unknown statistic: {statistic}")
+
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(stats, [alpha, 1 - alpha])
+    return (float(low), float(high))
+
+
+def _referencing_experiments(group: pd.DataFrame) -> int:
+    experiments = set(group["experiment_id"])
+    for shared in group["shared_by"]:
+        if isinstance(shared, str) and shared:
+            experiments.update(shared.split(";"))
+    return len({str(e) for e in experiments})
+
+
+def summarize_runs(
+    runs: pd.DataFrame,
+    node_metrics: Optional[pd.DataFrame] = None,
+    group_columns: List[str] = GROUP_COLUMNS,
+    n_resamples: int = 1000,
+    confidence: float = 0.95
+) -> pd.DataFrame:
+    """
+    Aggregate per-run data into one row per configuration
+
+    Latencies (mean, percentiles and their intervals) cover successful runs
+    only; a failed run's duration says when it gave up, not how fast it was.
+
+    Args:
+        runs: Per-run DataFrame from runs_to_dataframe
+        node_metrics: Optional per-node DataFrame from node_metrics_to_dataframe
+        group_columns: Columns identifying a configuration
+        n_resamples: Bootstrap resamples for confidence intervals
+        confidence: Confidence level of the intervals
+
+    Returns:
+        Comparison table DataFrame
+    """
+    runs = runs.assign(latency=runs["duration"].where(runs["success"]))
+    grouped = runs.groupby(group_columns, sort=True)
+
+    summary = grouped.agg(
+        total_runs=("success", "size"),
+        successful=("success", "sum"),
+        success_rate=("success", "mean"),
+        escalation_rate=("escalated", "mean"),
+        avg_iterations=("iterations", "mean"),
+        avg_tool_calls=("tool_calls", "mean"),
+        total_tool_calls=("tool_calls", "sum"),
+        total_iterations_saved=("iterations_saved", "sum"),
+        mean_latency=("latency", "mean"),
+        avg_prompt_tokens=("prompt_tokens", "mean"),
+        avg_completion_tokens=("completion_tokens", "mean"),
+        avg_cached_tokens=("cached_tokens", "mean"),
+        avg_observation_tokens=("observation_tokens", "mean"),
+        total_prefetched=("prefetched", "sum"),
+        prefetch_hits=("prefetch_hits", "sum"),
+        total_tokens=("total_tokens", "sum"),
+        total_cost=("cost", "sum"),
+    )
+    # Experiments referencing each configuration, including those that reused its runs
+    summary.insert(0, "experiments", grouped.apply(_referencing_experiments))
+    summary["cost_per_success"] = summary["total_cost"] / summary["successful"].where(summary["successful"] > 0)
+    summary["prefetch_hit_rate"] = summary["prefetch_hits"] / summary["total_prefetched"].where(summary["total_prefetched"] > 0)
+
+    quantiles = grouped["latency"].quantile([p / 100 for p in LATENCY_PERCENTILES]).unstack()
+    quantiles.columns = [f"p{p}_latency" for p in LATENCY_PERCENTILES]
+    summary = summary.join(quantiles)
+
+    # Bootstrap intervals, one multinomial draw per configuration
+    ci_rows = {}
+    for key, group in grouped:
+        p50_ci = bootstrap_ci(group["latency"], "percentile", 50, n_resamples, confidence)
+        p90_ci = bootstrap_ci(group["latency"], "percentile", 90, n_resamples, confidence)
+        success_ci = bootstrap_ci(group["success"].astype(float), "mean", 50, n_resamples, confidence)
+        ci_rows[key] = p50_ci + p90_ci + success_ci
+    ci = pd.DataFrame.from_dict(
+        ci_rows, orient="index",
+        columns=["p50_ci_low", "p50_ci_high", "p90_ci_low", "p90_ci_high",
+                 "success_ci_low", "success_ci_high"]
+    )
+    ci.index = summary.index
+    summary = summary.join(ci)
+
+    if node_metrics is not None and not node_metrics.empty:
+        grouped_nodes = node_metrics.groupby(group_columns + ["node"])
+        node_stats = grouped_nodes["duration"].quantile([0.5, 0.9]).unstack().unstack("node")
+        nodes = [n for n in NODE_ORDER if n in node_stats.columns.get_level_values("node")]
+        node_stats = node_stats.reindex(
+            columns=pd.MultiIndex.from_product([[0.5, 0.9], nodes])
+        )
+        node_stats.columns = [
+            f"{node}_p{int(quantile * 100)}_latency" for quantile, node in node_stats.columns
+        ]
+        ordered = [f"{node}_p{p}_latency" for node in nodes for p in (50, 90)]
+        summary = summary.join(node_stats[ordered])
+
+        # Average tokens each LLM node spends per run
+        llm_nodes = node_metrics.dropna(subset=["total_tokens"])
+        if not llm_nodes.empty:
+            per_run = llm_nodes.groupby(group_columns + ["run", "node"])["total_tokens"].sum()
+            node_tokens = per_run.groupby(group_columns + ["node"]).mean().unstack("node")
+            node_tokens = node_tokens[[n for n in NODE_ORDER if n in node_tokens.columns]]
+            node_tokens.columns = [f"{node}_tokens" for node in node_tokens.columns]
+            summary = summary.join(node_tokens)
+
+    return summary.reset_index()
+
+
+def format_comparison_table(summary: pd.DataFrame) -> pd.DataFrame:
+    """Rename summary columns to human-readable comparison table headers"""
+    labels = dict(COLUMN_LABELS)
+    labels.update({
+        "experiments": "Experiments",
+        "total_runs": "Total Queries",
+        "successful": "Successful",
+        "success_rate": "Success Rate",
+        "escalation_rate": "Escalation Rate",
+        "success_ci_low": "Success CI Low",
+        "success_ci_high": "Success CI High",
+        "avg_iterations": "Avg Iterations",
+        "avg_tool_calls": "Avg Tool Calls",
+        "total_tool_calls": "Total Tool Calls",
+        "total_iterations_saved": "Iterations Saved (upper bound)",
+        "mean_latency": "Mean Latency (s)",
+        "p50_ci_low": "p50 CI Low (s)",
+        "p50_ci_high": "p50 CI High (s)",
+        "p90_ci_low": "p90 CI Low (s)",
+        "p90_ci_high": "p90 CI High (s)",
+        "avg_prompt_tokens": "Avg Prompt Tokens",
+        "avg_completion_tokens": "Avg Completion Tokens",
+        "avg_cached_tokens": "Avg Cached Tokens",
+        "avg_observation_tokens": "Avg Observation Tokens",
+        "total_prefetched": "Prefetched Tool Calls",
+        "prefetch_hits": "Prefetch Hits",
+        "prefetch_hit_rate": "Prefetch Hit Rate",
+        "total_tokens": "Total Tokens",
+        "total_cost": "Total Cost ($)",
+        "cost_per_success": "Cost per Success ($)",
+    })
+    for p in LATENCY_PERCENTILES:
+        labels[f"p{p}_latency"] = f"p{p} Latency (s)"
+    for node in NODE_ORDER:
+        for p in (50, 90):
+            labels[f"{node}_p{p}_latency"] = f"{node.capitalize()} p{p} (s)"
+        labels[f"{node}_tokens"] = f"{node.capitalize()} Tokens/Run"
+    return summary.rename(columns=labels)
+
+
+def to_markdown(df: pd.DataFrame, float_format: str = "{:.3f}") -> str:
+    """
+    Render a DataFrame as a GitHub-flavored Markdown table
+
+    Args:
+        df: DataFrame to render
+        float_format: Format applied to float cells
+
+    Returns:
+        Markdown table string
+    """
+    def fmt(value):
+        if isinstance(value, (float, np.floating)):
+            return "" if np.isnan(value) else float_format.format(value)
+        return str(value)
+
+    header = "| " + " | ".join(str(c) for c in df.columns) + " |"
+    separator = "| " + " | ".join("---" for _ in df.columns) + " |"
+    rows = [
+        "| " + " | ".join(fmt(v) for v in row) + " |"
+        for row in df.itertuples(index=False, name=None)
+    ]
+    return "\n".join([header, separator] + rows) + "\n"
@@ -0,0 +1,323 @@
+"""
+Async HTTP JSON API for the BreatheEasy ReAct Agent
+ASGI service (FastAPI) for programmatic clients, served next to the Gradio UI
+
+Run with:
+    uvicorn api:app --host 0.0.0.0 --port 8000
+"""
+
+import asyncio
+import json
+import os
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
+
+from react_agent import ReActAgent, load_environment
+from fanout import MAX_FANOUT, fan_out
+from persona_registry import get_registry
+from response_cache import SemanticResponseCache
+from session_memory import SessionStore
+from tenants import get_tenant_store
+from tool_prefetch import get_prefetcher
+
+
+# Runs executing at once; further requests wait up to QUEUE_TIMEOUT seconds for a slot
+MAX_CONCURRENT_RUNS = int(os.getenv("AGENT_MAX_CONCURRENT_RUNS", "32"))
+QUEUE_TIMEOUT = float(os.getenv("AGENT_QUEUE_TIMEOUT", "10"))
+
+# Agents (one per persona version and sampling configuration) kept warm
+MAX_AGENTS = 64
+
+# Interaction logs kept per agent
+MAX_LOGS_PER_AGENT = 100
+
+# Serve from a simulated LLM with this median latency in seconds (offline load tests, see load_generator.py)
+SIMULATED_LLM_LATENCY = os.getenv("AGENT_SIMULATED_LLM_LATENCY")
+
+
+class AgentConfig(BaseModel):
+    """Persona and sampling configuration of a run"""
+    persona: str = "friendly_few_shot"
+    model: str = "gpt-4o-mini"
+    temperature: float = Field(0.7, ge=0.0, le=2.0)
+    top_p: float = Field(1.0, gt=0.0, le=1.0)
+    max_iterations: int = Field(5, ge=1, le=20)
+
+
+class QueryRequest(AgentConfig):
+    """Body of /query and /query/stream"""
+    message: str = Field(..., min_length=1)
+    session_id: Optional[str] = None
+    tenant_id: Optional[str] = None  # franchise location (business_data/tenants/<tenant_id>/)
+
+
+class CompareRequest(BaseModel):
+    """Body of /query/compare: one message, answered by every configuration"""
+    message: str = Field(..., min_length=1)
+    configs: List[AgentConfig] = Field(..., min_length=1, max_length=MAX_FANOUT)
+    tenant_id: Optional[str] = None
+
+
+class AgentService:
+    """
+    Shared state of the API process
+
+    Agents are built on first use per (persona version, configuration) and
+    share one response cache and session store. A count of free run slots,
+    guarded by a condition, bounds the number of runs in flight; requests
+    taking several slots get them all at once, in arrival order.
+    """
+
+    def __init__(self, max_concurrent_runs: int = MAX_CONCURRENT_RUNS, queue_timeout: float = QUEUE_TIMEOUT):
+        self.registry = get_registry()
+        self.response_cache = SemanticResponseCache()
+        self.session_store = SessionStore()
+        self.max_concurrent_runs = max_concurrent_runs
+        self.queue_timeout = queue_timeout
+
+        self._free_slots = max_concurrent_runs
+        self._slots_changed = asyncio.Condition()
+        self._slot_queue = deque()
+        self._agents = OrderedDict()
+        self.in_flight = 0
+        self.rejected = 0
+        self.ready = False
+
+        self.llm_factory = None
+        if SIMULATED_LLM_LATENCY is not None:
+            from fake_llm import SimulatedChatModel
+
+            latency = float(SIMULATED_LLM_LATENCY)
+            self.llm_factory = lambda name: SimulatedChatModel(name, latency=latency, latency_sigma=0.5)
+
+    def get_agent(self, request: AgentConfig) -> ReActAgent:
+        """Warm agent for a request's persona and configuration"""
+        persona = self.registry.get(request.persona)
+        key = (
+            request.persona, persona["content_hash"], request.model,
+            request.temperature, request.top_p, request.max_iterations
+        )
+        agent = self._agents.get(key)
+        if agent is None:
+            agent = ReActAgent(
+                persona_name=persona["name"],
+                system_prompt=persona["system_prompt"],
+                model_name=request.model,
+                temperature=request.temperature,
+                top_p=request.top_p,
+                max_iterations=request.max_iterations,
+                response_cache=self.response_cache,
+                session_store=self.session_store,
+                prompt_hash=persona["content_hash"],
+                prompt_tokens=persona["prompt_tokens"],
+                observation_focus=persona["observation_focus"],
+                max_logs=MAX_LOGS_PER_AGENT,
+                llm_factory=self.llm_factory
+            )
+            self._agents[key] = agent
+            while len(self._agents) > MAX_AGENTS:
+                self._agents.popitem(last=False)
+        self._agents.move_to_end(key)
+        return agent
+
+    async def acquire_slot(self, count: int = 1):
+        """
+        Take `count` run slots at once, or fail with 503 when they do not free up within the queue timeout
+
+        Waiting requests are served first come, first served, so a request
+        for several slots is not starved by a stream of single-slot ones.
+        """
+        if count > self.max_concurrent_runs:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Request needs {count} concurrent runs, the server allows {self.max_concurrent_runs}"
+            )
+
+        ticket = object()
+        async with self._slots_changed:
+            self._slot_queue.append(ticket)
+            try:
+                await asyncio.wait_for(
+                    self._slots_changed.wait_for(
+                        lambda: self._slot_queue[0] is ticket and self._free_slots >= count
+                    ),
+                    timeout=self.queue_timeout
+                )
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many concurrent requests",
+                    headers={"Retry-After": "1"}
+                )
+            finally:
+                self._slot_queue.remove(ticket)
+                self._slots_changed.notify_all()
+            self._free_slots -= count
+            self.in_flight += count
+
+    async def release_slot(self, count: int = 1):
+        """Give back run slots"""
+        async with self._slots_changed:
+            self._free_slots += count
+            self.in_flight -= count
+            self._slots_changed.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, count: int = 1):
+        """Hold run slots (one per concurrent run) for the duration of a block"""
+        await self.acquire_slot(count)
+        try:
+            yield
+        finally:
+            await self.release_slot(count)
+
+
+service: Optional[AgentService] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global service
+    load_environment()
+    service = AgentService()
+    service.registry.start_watching()
+    service.ready = True
+    yield
+    service.ready = False
+    service.registry.stop_watching()
+
+
+app = FastAPI(title="BreatheEasy ReAct Agent API", lifespan=lifespan)
+
+
+def _check_tenant(tenant_id: Optional[str]):
+    if tenant_id and not get_tenant_store().exists(tenant_id):
+        raise HTTPException(status_code=404, detail=f"Unknown tenant: {tenant_id}")
+
+
+def _resolve_agent(request: AgentConfig) -> ReActAgent:
+    try:
+        return service.get_agent(request)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness probe"""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: not ready while starting, shutting down or without an API key"""
+    checks = {
+        "started": service is not None and service.ready,
+        "api_key": SIMULATED_LLM_LATENCY is not None or bool(os.getenv("OPENAI_API_KEY")),
+        "personas": service is not None and bool(service.registry.list_personas())
+    }
+    body = {"ready": all(checks.values()), "checks": checks}
+    if service is not None:
+        body.update({
+            "in_flight": service.in_flight,
+            "max_concurrent_runs": service.max_concurrent_runs,
+            "rejected": service.rejected
+        })
+    return JSONResponse(body, status_code=200 if body["ready"] else 503)
+
+
+@app.get("/personas")
+async def personas():
+    """Available personas with their prompt size and version hash"""
+    return {"personas": service.registry.list_personas()}
+
+
+@app.get("/tenants/stats")
+async def tenant_stats():
+    """Residency of the tenant data cache (resident tenants and bytes, hit rate, evictions)"""
+    return get_tenant_store().stats()
+
+
+@app.get("/prefetch/stats")
+async def prefetch_stats():
+    """Speculative tool prefetch (predicted calls, hit rate, wasted calls and time)"""
+    return get_prefetcher().stats()
+
+
+@app.post("/query")
+async def query(request: QueryRequest):
+    """Run the agent on one message and return its answer"""
+    _check_tenant(request.tenant_id)
+    agent = _resolve_agent(request)
+    async with service.slot():
+        try:
+            final = None
+            async for event in agent.astream(request.message, session_id=request.session_id, tenant_id=request.tenant_id):
+                if event["event"] == "final":
+                    final = event
+        except TimeoutError as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"{type(e).__name__}: {e}")
+    return final
+
+
+@app.post("/query/compare")
+async def query_compare(request: CompareRequest):
+    """
+    Run one message against several persona / configuration combinations at once
+
+    Returns every answer (or error) with its latency, tool calls and tokens;
+    identical read-only tool calls are made once for all configurations.
+    """
+    _check_tenant(request.tenant_id)
+    agents = [
+        (f"{config.persona} | {config.model} | t={config.temperature} | p={config.top_p}", _resolve_agent(config))
+        for config in request.configs
+    ]
+    async with service.slot(len(agents)):
+        return await fan_out(agents, request.message, request.tenant_id)
+
+
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest):
+    """
+    Run the agent on one message, streaming progress as server-sent events
+
+    Emits one `node` event per graph node, then a `final` event with the
+    answer (or an `error` event).
+    """
+    _check_tenant(request.tenant_id)
+    agent = _resolve_agent(request)
+
+    # Take the slot before streaming starts, so overload is reported as a 503; it is
+    # released by the response's background task, which also runs if the client disconnects
+    await service.acquire_slot()
+
+    async def events():
+        try:
+            async for event in agent.astream(request.message, session_id=request.session_id, tenant_id=request.tenant_id):
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            error = {"event": "error", "error": f"{type(e).__name__}: {e}"}
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(service.release_slot)
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", "8000")))
@@ -3,36 +3,71 @@ Gradio App for BreatheEasy ReAct Agent
 Standalone deployment interface
 """
 
-import gradio as gr
 import os
-from dotenv import load_dotenv
+from collections import OrderedDict
+from typing import TYPE_CHECKING
 
-from react_agent import ReActAgent
-from personas import get_persona, PERSONAS
+from react_agent import ReActAgent, load_environment
+from cpu_profiler import CPUProfiler, format_profile
+from fanout import MAX_FANOUT, fan_out
+from persona_registry import get_registry
+from response_cache import SemanticResponseCache
+from session_memory import SessionStore
+
+if TYPE_CHECKING:
+    import gradio as gr
 
 # Load environment variables
-load_dotenv()
+load_environment()
 
 # Global agent instance
 current_agent = None
 current_config = {"persona": None, "temperature": None, "model": None}
 
+# Answers to near-duplicate questions, shared by every agent created in this process
+response_cache = SemanticResponseCache()
+
+# Conversations outlive agents, so a persona reload keeps every session
+session_store = SessionStore()
+
+# Personas are reloaded from persona_configs/ while the app runs
+persona_registry = get_registry()
+
+# Fraction of chat requests whose stacks are sampled (e.g. 0.01; off by default), with one
+# collapsed-stack file per profiled request written to AGENT_CPU_PROFILE_DIR
+CPU_PROFILE_RATE = float(os.getenv("AGENT_CPU_PROFILE_RATE", "0"))
+cpu_profiler = CPUProfiler(
+    sample_rate=CPU_PROFILE_RATE,
+    output_dir=os.getenv("AGENT_CPU_PROFILE_DIR", "cpu_profiles")
+) if CPU_PROFILE_RATE > 0 else None
+
+# Agents of the compare tab, one per (persona version, model, temperature)
+compare_agents = OrderedDict()
+MAX_COMPARE_AGENTS = 27
+
 
 def create_agent(persona_key, temperature, model_name):
     """Create agent with selected configuration"""
     global current_agent, current_config
 
     try:
-        persona_config = get_persona(persona_key)
+        persona_config = persona_registry.get(persona_key)
         current_agent = ReActAgent(
             persona_name=persona_config["name"],
             system_prompt=persona_config["system_prompt"],
             model_name=model_name,
-            temperature=temperature
+            temperature=temperature,
+            response_cache=response_cache,
+            session_store=session_store,
+            prompt_hash=persona_config["content_hash"],
+            prompt_tokens=persona_config["prompt_tokens"],
+            observation_focus=persona_config["observation_focus"]
         )
 
         current_config = {
             "persona": persona_config["name"],
+            "persona_key": persona_key,
+            "content_hash": persona_config["content_hash"],
             "temperature": temperature,
             "model": model_name
         }
@@ -43,20 +78,114 @@ def create_agent(persona_key, temperature, model_name):
         return f"❌ Error creating agent: {str(e)}"
 
 
-def chat(message, history):
+def chat(message, history, request: "gr.Request" = None):
     """Chat with the agent"""
+    if cpu_profiler is None:
+        return _chat(message, history, request)
+
+    with cpu_profiler.profile("chat") as cpu:
+        response = _chat(message, history, request)
+    if cpu is not None:
+        print(format_profile(cpu))
+    return response
+
+
+def _chat(message, history, request):
+    """Body of chat()"""
     global current_agent
 
     if current_agent is None:
         return "⚠️ Please create an agent first by selecting a persona and clicking 'Create Agent'"
 
+    # Pick up an edited persona file without losing the conversation
     try:
-        response = current_agent.run(message)
+        persona_config = persona_registry.get(current_config["persona_key"])
+        if persona_config["content_hash"] != current_config["content_hash"]:
+            create_agent(current_config["persona_key"], current_config["temperature"], current_config["model"])
+    except ValueError:
+        pass  # persona file removed; keep serving the current agent
+
+    # Each browser session gets its own conversation memory; a cleared chat starts fresh
+    session_id = request.session_hash if request is not None else None
+    if session_id and not history:
+        current_agent.session_store.reset(session_id)
+
+    try:
+        response = current_agent.run(message, session_id=session_id)
         return response
     except Exception as e:
         return f"❌ Error: {str(e)}\n\nPlease try again or create a new agent."
 
 
+def get_compare_agent(persona_key, model_name, temperature):
+    """Warm agent for one persona / model / temperature combination of the compare tab"""
+    persona_config = persona_registry.get(persona_key)
+    key = (persona_key, persona_config["content_hash"], model_name, temperature)
+    agent = compare_agents.get(key)
+    if agent is None:
+        agent = ReActAgent(
+            persona_name=persona_config["name"],
+            system_prompt=persona_config["system_prompt"],
+            model_name=model_name,
+            temperature=temperature,
+            response_cache=response_cache,
+            session_store=session_store,
+            prompt_hash=persona_config["content_hash"],
+            prompt_tokens=persona_config["prompt_tokens"],
+            observation_focus=persona_config["observation_focus"],
+            max_logs=1
+        )
+        compare_agents[key] = agent
+        while len(compare_agents) > MAX_COMPARE_AGENTS:
+            compare_agents.popitem(last=False)
+    compare_agents.move_to_end(key)
+    return agent
+
+
+async def compare(message, persona_keys, model_names, temperature):
+    """Answer one message with every selected persona / model combination at once"""
+    if not message or not message.strip():
+        return "⚠️ Please enter a message to compare"
+    if not persona_keys or not model_names:
+        return "⚠️ Please select at least one persona and one model"
+    combinations = [(persona_key, model_name) for persona_key in persona_keys for model_name in model_names]
+    if len(combinations) > MAX_FANOUT:
+        return f"⚠️ At most {MAX_FANOUT} persona / model combinations at once (selected {len(combinations)})"
+
+    try:
+        agents = [
+            (f"{persona_registry.get(persona_key)['name']} / {model_name}",
+             get_compare_agent(persona_key, model_name, temperature))
+            for persona_key, model_name in combinations
+        ]
+        fanout = await fan_out(agents, message)
+    except Exception as e:
+        return f"❌ Error: {str(e)}"
+
+    tool_calls = fanout["tool_calls"]
+    lines = [
+        f"**{len(agents)} configurations in {fanout['wall_time']:.1f}s** "
+        f"(one after another: {fanout['total_latency']:.1f}s) · "
+        f"tool calls: {tool_calls['executed']} executed, {tool_calls['shared']} shared",
+        "",
+        "| Configuration | Latency (s) | Iterations | Tool Calls | Tokens | Cost ($) |",
+        "|---|---|---|---|---|---|"
+    ]
+    for result in fanout["results"]:
+        if result["error"]:
+            lines.append(f"| {result['label']} | {result['latency']:.1f} | ❌ | | | |")
+        else:
+            # Models without a price entry have no cost
+            cost = "n/a" if result["cost"] is None else f"{result['cost']:.4f}"
+            lines.append(
+                f"| {result['label']} | {result['latency']:.1f} | {result['iterations']} | {result['tool_calls']} | "
+                f"{result['total_tokens']} | {cost} |"
+            )
+    for result in fanout["results"]:
+        lines += ["", f"### {result['label']}", result["answer"] if not result["error"] else f"❌ {result['error']}"]
+    return "\n".join(lines)
+
+
 def get_agent_info():
     """Get current agent information"""
     global current_config
@@ -64,11 +193,18 @@ def get_agent_info():
     if current_config["persona"] is None:
         return "No agent created yet"
 
+    cache_stats = response_cache.get_stats()
+
     return f"""
 **Current Agent:**
 - Persona: {current_config['persona']}
 - Model: {current_config['model']}
 - Temperature: {current_config['temperature']}
+- Prompt version: {current_config['content_hash']}
+
+**Response Cache:**
+- Hit rate: {cache_stats['hit_rate']:.0%} ({cache_stats['hits']}/{cache_stats['lookups']})
+- Latency saved: {cache_stats['latency_saved']:.1f}s
 """
 
 
@@ -87,156 +223,215 @@ custom_css = """
 }
 """
 
-# Build interface
-with gr.Blocks(title="BreatheEasy ReAct Agent", css=custom_css) as demo:
-
-    # Header
-    gr.Markdown("""
-    <div class="header">
-        <h1>🌿 BreatheEasy ReAct Agent</h1>
-        <p>Custom ReAct Agent with Multiple Personas - Assignment 4</p>
-        <p><em>Hassan Khalil | EECE 503P</em></p>
-    </div>
-    """)
-
-    gr.Markdown("""
-    ## About This Agent
-
-    This is a custom **ReAct (Reasoning and Acting)** agent built with **LangGraph** for BreatheEasy,
-    an eco-friendly home cleaning service. The agent can:
-
-    - Answer questions about cleaning services and products
-    - Help with allergy-safe cleaning solutions
-    - Check service availability in your area
-    - Collect customer information for scheduling
-
-    The agent uses a manual ReAct loop: **Think → Decide → Act → Observe → Respond**
-
-    ---
-    """)
-
-    with gr.Row():
-        # Left column - Configuration
-        with gr.Column(scale=1):
-            gr.Markdown("### 🎭 Agent Configuration")
-
-            persona_dropdown = gr.Dropdown(
-                choices=[
-                    ("Friendly Wellness Advisor (Zero-Shot)", "friendly_zero_shot"),
-                    ("Friendly Wellness Advisor (Few-Shot)", "friendly_few_shot"),
-                    ("Friendly Wellness Advisor (Chain-of-Thought)", "friendly_cot"),
-                    ("Professional Health Expert (Zero-Shot)", "expert_zero_shot"),
-                    ("Professional Health Expert (Few-Shot)", "expert_few_shot"),
-                    ("Professional Health Expert (Chain-of-Thought)", "expert_cot"),
-                    ("Cautious Service Guide (Zero-Shot)", "cautious_zero_shot"),
-                    ("Cautious Service Guide (Few-Shot)", "cautious_few_shot"),
-                    ("Cautious Service Guide (Chain-of-Thought)", "cautious_cot"),
-                ],
-                value="friendly_few_shot",
-                label="Persona & Prompt Type",
-                info="Choose the agent's personality and reasoning style"
-            )
-
-            with gr.Accordion("Persona Descriptions", open=False):
-                gr.Markdown("""
-                **Friendly Wellness Advisor:**
-                - Warm, empathetic, conversational
-                - Focuses on health and wellness benefits
-                - Great for customers with health concerns
-
-                **Professional Health Expert:**
-                - Scientific, technical, authoritative
-                - References certifications and research
-                - Best for detailed technical questions
-
-                **Cautious Service Guide:**
-                - Careful, thorough, detail-oriented
-                - Asks clarifying questions
-                - Ensures realistic expectations
-
-                **Prompt Types:**
-                - *Zero-Shot:* Basic instructions
-                - *Few-Shot:* Includes example patterns
-                - *Chain-of-Thought:* Explicit step-by-step reasoning
-                """)
-
-            temperature_slider = gr.Slider(
-                minimum=0.0,
-                maximum=1.0,
-                value=0.7,
-                step=0.1,
-                label="Temperature",
-                info="0 = Focused & Consistent | 1 = Creative & Varied"
-            )
-
-            model_dropdown = gr.Dropdown(
-                choices=["gpt-4o-mini", "gpt-4o"],
-                value="gpt-4o-mini",
-                label="Model",
-                info="gpt-4o-mini is faster and cheaper"
-            )
-
-            create_btn = gr.Button("🚀 Create Agent", variant="primary", size="lg")
-
-            status = gr.Textbox(
-                label="Status",
-                interactive=False,
-                lines=5
-            )
-
-            create_btn.click(
-                fn=create_agent,
-                inputs=[persona_dropdown, temperature_slider, model_dropdown],
-                outputs=status
-            )
-
-        # Right column - Chat
-        with gr.Column(scale=2):
-            gr.Markdown("### 💬 Chat with Agent")
-
-            chatbot = gr.ChatInterface(
-                fn=chat,
-                examples=[
-                    "What services do you offer?",
-                    "I have severe allergies to dust and pet dander. Can you help me?",
-                    "What cleaning products do you use? I'm worried about harsh chemicals.",
-                    "Do you service the downtown area?",
-                    "I'd like to schedule a deep cleaning for next week",
-                    "Tell me about your allergy-safe protocols"
-                ],
-                title=None,
-                description="Ask me anything about BreatheEasy's services!",
-                submit_btn="Send",
-                retry_btn="🔄 Retry",
-                undo_btn="↩️ Undo",
-                clear_btn="🗑️ Clear"
-            )
-
-    # Footer
-    gr.Markdown("""
-    ---
-
-    ### 🧪 About the ReAct Implementation
-
-    This agent uses a custom ReAct loop implemented with LangGraph:
-
-    1. **THINK**: Agent reasons about the user's question
-    2. **DECIDE**: Determines whether to use a tool or respond directly
-    3. **ACT**: Executes tools (search services, check availability, get product info, etc.)
-    4. **OBSERVE**: Processes tool results
-    5. **RESPOND**: Provides final answer to user
-
-    **Available Tools:**
-    - `search_services` - Find cleaning services
-    - `check_availability` - Check service areas
-    - `get_product_info` - Get product details
-    - `record_customer_interest` - Collect leads
-    - `record_feedback` - Log questions
-
-    ---
 
-    **Assignment 4 - EECE 503P | Fall 2025-26**
-    """)
+def build_interface() -> "gr.Blocks":
+    """Build the Gradio interface (deferred until the app is launched or `demo` is accessed)"""
+    # gradio is the heaviest import, so it loads here rather than with the module; bound
+    # as a module global so gradio can resolve chat()'s "gr.Request" annotation
+    global gr
+    import gradio as gr
+
+    # Edited persona files are picked up while the app runs
+    persona_registry.start_watching()
+
+    with gr.Blocks(title="BreatheEasy ReAct Agent", css=custom_css) as demo:
+
+        # Header
+        gr.Markdown("""
+        <div class="header">
+            <h1>🌿 BreatheEasy ReAct Agent</h1>
+            <p>Custom ReAct Agent with Multiple Personas - Assignment 4</p>
+            <p><em>Hassan Khalil | EECE 503P</em></p>
+        </div>
+        """)
+
+        gr.Markdown("""
+        ## About This Agent
+
+        This is a custom **ReAct (Reasoning and Acting)** agent built with **LangGraph** for BreatheEasy,
+        an eco-friendly home cleaning service. The agent can:
+
+        - Answer questions about cleaning services and products
+        - Help with allergy-safe cleaning solutions
+        - Check service availability in your area
+        - Collect customer information for scheduling
+
+        The agent uses a manual ReAct loop: **Think → Decide → Act → Observe → Respond**
+
+        ---
+        """)
+
+        with gr.Tabs():
+            with gr.Tab("💬 Chat"):
+                with gr.Row():
+                    # Left column - Configuration
+                    with gr.Column(scale=1):
+                        gr.Markdown("### 🎭 Agent Configuration")
+
+                        persona_dropdown = gr.Dropdown(
+                            choices=[(persona["name"], persona["key"]) for persona in persona_registry.list_personas()],
+                            value="friendly_few_shot",
+                            label="Persona & Prompt Type",
+                            info="Choose the agent's personality and reasoning style"
+                        )
+
+                        with gr.Accordion("Persona Descriptions", open=False):
+                            gr.Markdown("""
+                            **Friendly Wellness Advisor:**
+                            - Warm, empathetic, conversational
+                            - Focuses on health and wellness benefits
+                            - Great for customers with health concerns
+
+                            **Professional Health Expert:**
+                            - Scientific, technical, authoritative
+                            - References certifications and research
+                            - Best for detailed technical questions
+
+                            **Cautious Service Guide:**
+                            - Careful, thorough, detail-oriented
+                            - Asks clarifying questions
+                            - Ensures realistic expectations
+
+                            **Prompt Types:**
+                            - *Zero-Shot:* Basic instructions
+                            - *Few-Shot:* Includes example patterns
+                            - *Chain-of-Thought:* Explicit step-by-step reasoning
+                            """)
+
+                        temperature_slider = gr.Slider(
+                            minimum=0.0,
+                            maximum=1.0,
+                            value=0.7,
+                            step=0.1,
+                            label="Temperature",
+                            info="0 = Focused & Consistent | 1 = Creative & Varied"
+                        )
+
+                        model_dropdown = gr.Dropdown(
+                            choices=["gpt-4o-mini", "gpt-4o"],
+                            value="gpt-4o-mini",
+                            label="Model",
+                            info="gpt-4o-mini is faster and cheaper"
+                        )
+
+                        create_btn = gr.Button("🚀 Create Agent", variant="primary", size="lg")
+
+                        status = gr.Textbox(
+                            label="Status",
+                            interactive=False,
+                            lines=5
+                        )
+
+                        create_btn.click(
+                            fn=create_agent,
+                            inputs=[persona_dropdown, temperature_slider, model_dropdown],
+                            outputs=status
+                        )
+
+                        info_btn = gr.Button("ℹ️ Agent & Cache Info")
+                        agent_info = gr.Markdown()
+                        info_btn.click(fn=get_agent_info, inputs=None, outputs=agent_info)
+
+                    # Right column - Chat
+                    with gr.Column(scale=2):
+                        gr.Markdown("### 💬 Chat with Agent")
+
+                        chatbot = gr.ChatInterface(
+                            fn=chat,
+                            examples=[
+                                "What services do you offer?",
+                                "I have severe allergies to dust and pet dander. Can you help me?",
+                                "What cleaning products do you use? I'm worried about harsh chemicals.",
+                                "Do you service the downtown area?",
+                                "I'd like to schedule a deep cleaning for next week",
+                                "Tell me about your allergy-safe protocols"
+                            ],
+                            title=None,
+                            description="Ask me anything about BreatheEasy's services!",
+                            submit_btn="Send",
+                            retry_btn="🔄 Retry",
+                            undo_btn="↩️ Undo",
+                            clear_btn="🗑️ Clear"
+                        )
+
+            with gr.Tab("⚖️ Compare Personas"):
+                gr.Markdown("Ask one question and get every selected persona / model combination's answer side by side. "
+                            "They run at the same time and share identical tool calls.")
+
+                with gr.Row():
+                    with gr.Column(scale=1):
+                        compare_personas = gr.CheckboxGroup(
+                            choices=[(persona["name"], persona["key"]) for persona in persona_registry.list_personas()],
+                            value=["friendly_few_shot", "expert_few_shot", "cautious_few_shot"],
+                            label="Personas"
+                        )
+                        compare_models = gr.CheckboxGroup(
+                            choices=["gpt-4o-mini", "gpt-4o"],
+                            value=["gpt-4o-mini"],
+                            label="Models"
+                        )
+                        compare_temperature = gr.Slider(
+                            minimum=0.0,
+                            maximum=1.0,
+                            value=0.7,
+                            step=0.1,
+                            label="Temperature"
+                        )
+
+                    with gr.Column(scale=2):
+                        compare_message = gr.Textbox(
+                            label="Question",
+                            placeholder="e.g. What cleaning products do you use? I'm worried about harsh chemicals."
+                        )
+                        compare_btn = gr.Button("⚖️ Compare", variant="primary")
+                        compare_output = gr.Markdown()
+
+                compare_btn.click(
+                    fn=compare,
+                    inputs=[compare_message, compare_personas, compare_models, compare_temperature],
+                    outputs=compare_output
+                )
+
+        # Footer
+        gr.Markdown("""
+        ---
+
+        ### 🧪 About the ReAct Implementation
+
+        This agent uses a custom ReAct loop implemented with LangGraph:
+
+        1. **THINK**: Agent reasons about the user's question
+        2. **DECIDE**: Determines whether to use a tool or respond directly
+        3. **ACT**: Executes tools (search services, check availability, get product info, etc.)
+        4. **OBSERVE**: Processes tool results
+        5. **RESPOND**: Provides final answer to user
+
+        **Available Tools:**
+        - `search_services` - Find cleaning services
+        - `check_availability` - Check service areas
+        - `get_product_info` - Get product details
+        - `record_customer_interest` - Collect leads
+        - `record_feedback` - Log questions
+
+        ---
+
+        **Assignment 4 - EECE 503P | Fall 2025-26**
+        """)
+
+    return demo
+
+
+_demo = None
+
+
+def __getattr__(name):
+    # `app.demo` builds the interface on first access (e.g. for `gradio app.py` reloading)
+    global _demo
+    if name == "demo":
+        if _demo is None:
+            _demo = build_interface()
+        return _demo
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
@@ -253,7 +448,7 @@ if __name__ == "__main__":
     print("✓ Launching Gradio interface...")
     print("="*60)
 
-    demo.launch(
+    build_interface().launch(
         share=True,  # Create public link
         server_name="0.0.0.0",  # Allow external access
         server_port=7860,
@@ -0,0 +1,125 @@
+"""
+Product catalog benchmark
+Builds synthetic catalogs of thousands of SKUs from the vocabulary of
+business_data/products.json and times faceted get_product_info lookups through
+the indexes against a full scan; fails if the indexed p99 exceeds the budget
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import Dict, Any, List
+
+from product_catalog import ProductCatalog, normalize
+
+
+# Faceted queries as the router and tool calls issue them
+QUERIES = [
+    {"category": "bathroom", "certification": "leaping bunny", "allergen_free": True},
+    {"certification": "safer choice", "allergen_free": True},
+    {"use_case": "hardwood"},
+    {"ingredient": "vinegar", "allergen_free": True},
+    {"category": "glass", "certification": "ewg"},
+    {"ingredient": "citric acid", "use_case": "countertops", "certification": "green seal"}
+]
+
+
+def synthetic_products(base: List[Dict[str, Any]], count: int, seed: int) -> List[Dict[str, Any]]:
+    """count products mixing the base catalog's categories, certifications, use cases and ingredients"""
+    rng = random.Random(seed)
+    categories = sorted({p["category"] for p in base})
+    certifications = sorted({c for p in base for c in p["certifications"]})
+    use_cases = sorted({u for p in base for u in p["use_cases"]})
+    ingredients = sorted({i.strip() for p in base for i in p["ingredients"].split(",")})
+    products = []
+    for n in range(count):
+        category = rng.choice(categories)
+        products.append({
+            "id": f"{category}_{n:06d}",
+            "category": category,
+            "name": f"Product {n} {category.replace('_', ' ').title()} Cleaner",
+            "ingredients": ", ".join(rng.sample(ingredients, 3)),
+            "certifications": rng.sample(certifications, rng.randint(1, 2)),
+            "allergen_free": rng.random() < 0.8,
+            "use_cases": rng.sample(use_cases, 3)
+        })
+    return products
+
+
+def scan(products: List[Dict[str, Any]], query: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Reference: test every product against every filter"""
+    def has(values, term):
+        needle = f" {normalize(term)} "
+        return any(needle in f" {normalize(value)} " for value in values)
+
+    matches = []
+    for product in products:
+        if "category" in query and not has([product["category"], product["name"]], query["category"]):
+            continue
+        if "certification" in query and not has(product["certifications"], query["certification"]):
+            continue
+        if "use_case" in query and not has(product["use_cases"], query["use_case"]):
+            continue
+        if "ingredient" in query and not has(product["ingredients"].split(","), query["ingredient"]):
+            continue
+        if "allergen_free" in query and product["allergen_free"] != query["allergen_free"]:
+            continue
+        matches.append(product)
+    return matches
+
+
+def latencies(fn, queries: List[Dict[str, Any]], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            fn(query)
+            samples.append(time.perf_counter() - start)
+    return sorted(samples)
+
+
+def percentile(samples: List[float], p: float) -> float:
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark faceted product lookups")
+    parser.add_argument("--skus", type=int, nargs="+", default=[1000, 10000, 50000], help="Catalog sizes")
+    parser.add_argument("--repeat", type=int, default=200, help="Runs of the query set per size")
+    parser.add_argument("--budget-ms", type=float, default=1.0, help="Allowed p99 of an indexed lookup")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    base = ProductCatalog.from_file().products
+    failures = []
+
+    print(f"{'skus':>8} {'index build':>12} {'index p50':>10} {'index p99':>10} {'scan p50':>10} {'speedup':>8}")
+    for count in args.skus:
+        products = synthetic_products(base, count, args.seed)
+        start = time.perf_counter()
+        catalog = ProductCatalog(products)
+        build = time.perf_counter() - start
+
+        for query in QUERIES:
+            if catalog.search(**query) != scan(products, query):
+                failures.append(f"index and scan disagree on {query} at {count} SKUs")
+
+        indexed = latencies(lambda query: catalog.search(**query, limit=20), QUERIES, args.repeat)
+        scanned = latencies(lambda query: scan(products, query)[:20], QUERIES, max(1, args.repeat // 50))
+        p99 = percentile(indexed, 0.99)
+        print(f"{count:>8} {build * 1000:>10.1f}ms {percentile(indexed, 0.5) * 1000:>8.3f}ms {p99 * 1000:>8.3f}ms "
+              f"{percentile(scanned, 0.5) * 1000:>8.2f}ms {percentile(scanned, 0.5) / percentile(indexed, 0.5):>7.0f}x")
+        if p99 * 1000 > args.budget_ms:
+            failures.append(f"indexed p99 {p99 * 1000:.3f}ms over {args.budget_ms}ms at {count} SKUs")
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"\nIndexed lookups within {args.budget_ms}ms p99.")
+
+
+if __name__ == "__main__":
+    main()
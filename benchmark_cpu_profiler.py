@@ -0,0 +1,106 @@
+"""
+Sampling CPU profiler benchmark
+Runs CPU-bound agent runs (simulated LLM without latency) unprofiled, with a
+production-like fraction of runs profiled and with every run profiled;
+reports the overhead and the top functions found, and fails if profiling
+every run costs too much or the profiles miss the agent
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict
+
+from cpu_profiler import CPUProfiler, format_profile
+from fake_llm import SimulatedChatModel
+from llm_scheduler import LLMScheduler
+from load_generator import UNLIMITED_RATE_LIMITS
+from react_agent import ReActAgent
+
+
+QUESTIONS = [
+    "What services do you offer?",
+    "I have severe allergies. Can you help me?",
+    "What cleaning products do you use?",
+    "Do you service the Downtown area?"
+]
+
+
+def build_agent(cpu_profiler=None) -> ReActAgent:
+    return ReActAgent(
+        persona_name="benchmark",
+        system_prompt="You are a helpful assistant for a cleaning company.",
+        scheduler=LLMScheduler(UNLIMITED_RATE_LIMITS),
+        llm_factory=lambda name: SimulatedChatModel(name),
+        max_logs=1,
+        prefetch_tools=0,
+        cpu_profiler=cpu_profiler
+    )
+
+
+def time_runs(agents: Dict[str, ReActAgent], runs: int) -> Dict[str, float]:
+    """Median seconds per run of each agent, taking turns run by run so drift hits all alike"""
+    durations = {name: [] for name in agents}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for n in range(runs):
+            for name, agent in agents.items():
+                start = time.perf_counter()
+                agent.run(QUESTIONS[n % len(QUESTIONS)])
+                durations[name].append(time.perf_counter() - start)
+    return {name: statistics.median(values) for name, values in durations.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sampling CPU profiler overhead")
+    parser.add_argument("--runs", type=int, default=400, help="Runs per configuration")
+    parser.add_argument("--sample-rate", type=float, default=0.05, help="Fraction of runs profiled in production")
+    parser.add_argument("--max-overhead", type=float, default=0.2,
+                        help="Allowed slowdown with every run profiled (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        plain = build_agent()
+        profiler = CPUProfiler(output_dir=directory)
+        agents = {
+            "off": plain,
+            f"{args.sample_rate:.0%} of runs": build_agent(CPUProfiler(sample_rate=args.sample_rate, output_dir=directory)),
+            "every run": build_agent(profiler)
+        }
+        time_runs(agents, 20)  # warm up lazy imports and caches
+
+        timings = time_runs(agents, args.runs)
+        print(f"{'profiling':<12} {'ms/run':>8}")
+        for name, duration in timings.items():
+            print(f"{name:<12} {duration * 1000:>8.2f}  ({duration / timings['off'] - 1:+.1%})")
+        overhead = timings["every run"] / timings["off"] - 1
+
+        # One longer profile, to show where the runs spend their time
+        with profiler.profile("benchmark") as record:
+            time_runs({"off": plain}, args.runs)
+        print(f"\n{format_profile(record)}")
+        collapsed_files = [name for name in os.listdir(directory) if name.endswith(".collapsed")]
+        print(f"{len(collapsed_files)} collapsed-stack files written")
+
+        if overhead > args.max_overhead:
+            failures.append(f"profiling slows runs down by {overhead:.1%}")
+        if not record["samples"]:
+            failures.append("the profile has no samples")
+        elif not any(name.startswith("react_agent:") for name in open(record["collapsed_file"]).read().split(";")):
+            failures.append("the profile does not contain the agent's frames")
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"\nProfiling overhead within {args.max_overhead:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Multi-persona fan-out benchmark
+Answers questions with every built-in persona, one after another and as one
+fan-out (simulated LLM, tools slowed to remote-backend latency); reports wall
+time against the slowest persona and the tool calls shared, and fails if a
+fan-out takes much longer than its slowest persona
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import sys
+import time
+
+from benchmark_prefetch import slow_tools
+from fake_llm import SimulatedChatModel
+from fanout import MAX_FANOUT, fan_out
+from llm_scheduler import LLMScheduler
+from load_generator import UNLIMITED_RATE_LIMITS
+from persona_registry import get_registry
+from react_agent import ReActAgent
+
+
+QUESTIONS = [
+    "What cleaning products do you use? I'm worried about harsh chemicals.",
+    "Do you service the Downtown area?",
+    "How much does deep cleaning cost?"
+]
+
+
+def build_agents(llm_latency: float, count: int):
+    registry = get_registry()
+    agents = []
+    for persona in registry.list_personas()[:count]:
+        persona = registry.get(persona["key"])
+        agents.append((persona["key"], ReActAgent(
+            persona_name=persona["name"],
+            system_prompt=persona["system_prompt"],
+            prompt_hash=persona["content_hash"],
+            prompt_tokens=persona["prompt_tokens"],
+            observation_focus=persona["observation_focus"],
+            scheduler=LLMScheduler(UNLIMITED_RATE_LIMITS),
+            llm_factory=lambda name: SimulatedChatModel(name, latency=llm_latency),
+            max_logs=1
+        )))
+    return agents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent multi-persona fan-out")
+    parser.add_argument("--personas", type=int, default=MAX_FANOUT, help="Personas per fan-out")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds per LLM call")
+    parser.add_argument("--tool-latency", type=float, default=0.1, help="Seconds per tool call")
+    parser.add_argument("--max-overhead", type=float, default=1.25,
+                        help="Allowed fan-out wall time as a multiple of the slowest persona")
+    args = parser.parse_args()
+
+    slow_tools(args.tool_latency)
+    agents = build_agents(args.llm_latency, args.personas)
+    failures = []
+
+    print(f"{len(agents)} personas, LLM calls {args.llm_latency * 1000:.0f}ms, tool calls {args.tool_latency * 1000:.0f}ms\n")
+    print(f"{'question':<42} {'sequential':>11} {'fan-out':>9} {'slowest':>9} {'tool calls':>16}")
+    for question in QUESTIONS:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            for _, agent in agents:
+                agent.run(question)
+            sequential = time.perf_counter() - start
+            result = asyncio.run(fan_out(agents, question))
+
+        slowest = max(r["latency"] for r in result["results"])
+        calls = result["tool_calls"]
+        print(f"{question[:41]:<42} {sequential:>10.2f}s {result['wall_time']:>8.2f}s {slowest:>8.2f}s "
+              f"{calls['executed']:>4} run, {calls['shared']:>3} shared")
+        errors = [r["error"] for r in result["results"] if r["error"]]
+        if errors:
+            failures.append(f"{len(errors)} persona runs failed: {errors[0]}")
+        if result["wall_time"] > slowest * args.max_overhead:
+            failures.append(f"fan-out took {result['wall_time']:.2f}s, slowest persona {slowest:.2f}s")
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print(f"\nFan-out wall time within {args.max_overhead}x of the slowest persona.")
+
+
+if __name__ == "__main__":
+    main()
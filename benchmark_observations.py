@@ -0,0 +1,143 @@
+"""
+Observation projection benchmark
+Runs questions about prices, durations, certifications, ingredients and
+availability through their tool calls and compares what reaches THINK and
+RESPOND with the original fixed-length truncation and with query-aware
+projection: observation tokens, and how many of the values the question asks
+about survive; fails if projection keeps fewer of them or costs more tokens
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, Any, List, Tuple
+
+from observation_projection import OBSERVATION_CHARS, project_observation, query_intents
+from pricing import estimate_tokens
+from tools import search_services, get_product_info, check_availability
+
+
+# Question -> the tool call answering it
+CASES: List[Tuple[str, str, Dict[str, Any]]] = [
+    ("What services do you offer and what do they cost?", "search_services", {"query": "all services"}),
+    ("How much does a move-out clean cost?", "search_services", {"query": "all services"}),
+    ("How long does deep cleaning take?", "search_services", {"query": "deep cleaning"}),
+    ("What does the allergen treatment include?", "search_services", {"query": "allergen"}),
+    ("I have severe allergies. What would regular maintenance cost me?", "search_services", {"query": "all services"}),
+    ("What cleaning products do you use? Are they certified?", "get_product_info", {}),
+    ("Which of your products are allergen free?", "get_product_info", {}),
+    ("What ingredients are in your glass cleaner?", "get_product_info", {"product_category": "glass"}),
+    ("What can I use on hardwood floors, and is it EWG rated?", "get_product_info", {"use_case": "hardwood"}),
+    ("Do you service the Downtown area? How do I book?", "check_availability", {"location": "downtown"}),
+    ("Do you come out to Lakeside?", "check_availability", {"location": "lakeside"})
+]
+
+TOOLS = {
+    "search_services": search_services,
+    "get_product_info": get_product_info,
+    "check_availability": check_availability
+}
+
+# Intent -> fields of the tool results holding the values it asks about
+INTENT_FIELDS = {
+    "pricing": ("pricing",),
+    "duration": ("duration",),
+    "features": ("features",),
+    "certifications": ("certifications",),
+    "ingredients": ("ingredients",),
+    "allergen_free": ("allergen_free",),
+    "use_cases": ("use_cases",),
+    "contact": ("phone", "email")
+}
+
+
+def legacy_observation(tool_name: str, result: Any) -> str:
+    """The original OBSERVE formatting: str() of the result cut after 500 characters"""
+    result_str = str(result)
+    if len(result_str) > 500:
+        result_str = result_str[:500] + "... (truncated)"
+    return f"Tool '{tool_name}' returned: {result_str}"
+
+
+def cut(text: str, limit: int) -> str:
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+def wanted_values(result: Any, intents) -> List[str]:
+    """Values of the requested fields anywhere in a tool result (booleans as the product names they flag)"""
+    values = []
+
+    def walk(node: Any):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if any(key in INTENT_FIELDS[intent] for intent in intents):
+                    if isinstance(value, bool):
+                        if value and "name" in node:
+                            values.append(node["name"])
+                    elif isinstance(value, list):
+                        values.extend(map(str, value))
+                    else:
+                        values.append(str(value))
+                else:
+                    walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(json.loads(result) if isinstance(result, str) else result)
+    return values
+
+
+def recall(text: str, values: List[str]) -> float:
+    return sum(value in text for value in values) / len(values) if values else 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query-aware observation projection")
+    parser.add_argument("--verbose", action="store_true", help="Print every projected observation")
+    args = parser.parse_args()
+
+    totals = {"legacy": [0, 0, 0.0, 0.0], "projected": [0, 0, 0.0, 0.0]}  # think/respond tokens and recall
+    print(f"{'question':<58} {'raw':>5} {'legacy':>13} {'projected':>13}")
+    print(f"{'':<58} {'tok':>5} {'tok  recall':>13} {'tok  recall':>13}")
+    for question, tool_name, parameters in CASES:
+        result = TOOLS[tool_name](**parameters)
+        values = wanted_values(result, query_intents(question) & set(INTENT_FIELDS))
+
+        legacy = legacy_observation(tool_name, result)
+        projected = project_observation(tool_name, result, question)
+        row = {}
+        for name, observation, think_limit in (("legacy", legacy, 250), ("projected", projected, OBSERVATION_CHARS)):
+            think, respond = cut(observation, think_limit), cut(observation, OBSERVATION_CHARS)
+            row[name] = (estimate_tokens(respond), recall(respond, values))
+            totals[name][0] += estimate_tokens(think)
+            totals[name][1] += estimate_tokens(respond)
+            totals[name][2] += recall(think, values)
+            totals[name][3] += recall(respond, values)
+
+        print(f"{question[:57]:<58} {estimate_tokens(str(result)):>5} "
+              f"{row['legacy'][0]:>5} {row['legacy'][1]:>6.0%} {row['projected'][0]:>5} {row['projected'][1]:>6.0%}")
+        if args.verbose:
+            print(f"    {projected}")
+
+    n = len(CASES)
+    print("\nPer observation, averaged over the questions:")
+    for name, (think_tokens, respond_tokens, think_recall, respond_recall) in totals.items():
+        print(f"  {name:<10} THINK {think_tokens / n:5.1f} tokens, {think_recall / n:4.0%} of asked values | "
+              f"RESPOND {respond_tokens / n:5.1f} tokens, {respond_recall / n:4.0%} of asked values")
+
+    failures = []
+    if totals["projected"][3] < totals["legacy"][3]:
+        failures.append("projection keeps fewer of the asked values than truncation")
+    if totals["projected"][1] > totals["legacy"][1]:
+        failures.append("projected observations cost more tokens than truncated ones")
+    if failures:
+        print("\nFAILED:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nProjection keeps more of what the questions ask about in fewer tokens.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Speculative tool prefetch benchmark
+Runs questions through the agent with a simulated LLM and tools slowed to the
+latency of remote backends, with and without prefetching the tool calls
+predicted from the question; reports run latency, hit rate and wasted calls,
+and fails if prefetching makes runs slower
+"""
+
+import argparse
+import contextlib
+import io
+import statistics
+import sys
+import time
+from typing import List, Tuple
+
+import tools
+from fake_llm import SimulatedChatModel
+from llm_scheduler import LLMScheduler
+from load_generator import UNLIMITED_RATE_LIMITS
+from react_agent import ReActAgent
+from tool_prefetch import ToolPrefetcher
+
+
+# Question -> first thought of the model (the tool call it asks for is not always the predicted one)
+CASES: List[Tuple[str, str]] = [
+    ("What services do you offer?", "I should search services to list all our cleaning options."),
+    ("How much does deep cleaning cost?", "I should search services for deep clean pricing."),
+    ("Do you service the Downtown area?", "I need to check availability in the downtown area."),
+    ("Can you come to Riverside next week?", "I need to check availability for the riverside location."),
+    ("What cleaning products do you use?", "Let me get product info to list our products."),
+    ("Are your bathroom products Leaping Bunny certified?", "Let me get product info on leaping bunny bathroom products."),
+    ("I have severe allergies. Can you help me?", "Let me get product info on hypoallergenic products first."),
+    ("Do you do move-out cleaning in Hilltop?", "I should search services for move out cleaning."),
+    ("Is your glass cleaner toxic to pets?", "Let me get product info about glass cleaners and their ingredients."),
+    ("Hi there!", "Based on the greeting, the answer is a friendly hello and an offer to help.")
+]
+
+THOUGHTS = dict(CASES)
+
+ANSWER = "Based on what I found, the answer is that we can help with eco-friendly cleaning."
+
+
+def responder(messages: list) -> str:
+    """First THINK: the scripted thought for the question; afterwards: answer"""
+    if any("Recent findings" in str(m.content) or "Key findings" in str(m.content) for m in messages[1:]):
+        return ANSWER
+    question = next(str(m.content) for m in messages[1:] if str(m.content) in THOUGHTS)
+    return THOUGHTS[question]
+
+
+def slow_tools(latency: float):
+    """Give every tool the latency of a remote backend"""
+    for name, function in list(tools.TOOL_FUNCTIONS.items()):
+        def slowed(*args, _function=function, **kwargs):
+            time.sleep(latency)
+            return _function(*args, **kwargs)
+        tools.TOOL_FUNCTIONS[name] = slowed
+
+
+def run_suite(prefetch_tools: int, llm_latency: float, repeat: int) -> Tuple[List[float], ToolPrefetcher]:
+    prefetcher = ToolPrefetcher()
+    agent = ReActAgent(
+        "Benchmark", "You are a helpful assistant.",
+        scheduler=LLMScheduler(UNLIMITED_RATE_LIMITS),
+        llm_factory=lambda name: SimulatedChatModel(name, responses=responder, latency=llm_latency),
+        max_logs=1,
+        prefetch_tools=prefetch_tools,
+        prefetcher=prefetcher
+    )
+    durations = []
+    for _ in range(repeat):
+        for question, _ in CASES:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                agent.run(question)
+            durations.append(time.perf_counter() - start)
+    prefetcher.shutdown()
+    return durations, prefetcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark speculative tool prefetch")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Seconds per LLM call")
+    parser.add_argument("--tool-latency", type=float, default=0.1, help="Seconds per tool call")
+    parser.add_argument("--prefetch-tools", type=int, default=2, help="Predicted calls prefetched per run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of the question set")
+    args = parser.parse_args()
+
+    slow_tools(args.tool_latency)
+    baseline, _ = run_suite(0, args.llm_latency, args.repeat)
+    speculative, prefetcher = run_suite(args.prefetch_tools, args.llm_latency, args.repeat)
+    stats = prefetcher.stats()
+
+    print(f"{len(baseline)} runs, LLM calls {args.llm_latency * 1000:.0f}ms, tool calls {args.tool_latency * 1000:.0f}ms")
+    print(f"{'':<14} {'mean':>9} {'p50':>9}")
+    for name, durations in (("no prefetch", baseline), ("prefetch", speculative)):
+        print(f"{name:<14} {statistics.mean(durations) * 1000:>7.0f}ms {statistics.median(durations) * 1000:>7.0f}ms")
+    print(f"\nPredicted {stats['predicted']} calls: {stats['hits']} used ({stats['hit_rate']:.0%}), "
+          f"{stats['wasted']} wasted ({stats['wasted_seconds']:.2f}s of tool time)")
+    print(f"Tool time hidden behind THINK: {stats['saved_seconds']:.2f}s "
+          f"({stats['saved_seconds'] / len(speculative) * 1000:.0f}ms per run)")
+
+    if statistics.mean(speculative) > statistics.mean(baseline):
+        print("\nFAILED: runs are slower with prefetch")
+        sys.exit(1)
+    print("\nPrefetch makes runs faster.")
+
+
+if __name__ == "__main__":
+    main()
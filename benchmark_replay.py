@@ -0,0 +1,116 @@
+"""
+LLM cassette record / replay benchmark
+Records an experiment sweep against a simulated remote model (random latency
+and answers), then replays it twice from the cassette; reports the local
+overhead of the sweep, and fails unless every replay reproduces the recorded
+answers, tool calls and token counts exactly
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List
+
+from experiment_runner import ExperimentRunner
+from fake_llm import DEFAULT_RESPONSES, SimulatedChatModel
+from llm_cassette import Cassette, format_stats
+
+
+GRID = {
+    "persona_key": ["friendly_zero_shot", "expert_cot"],
+    "model_name": "gpt-4o-mini",
+    "temperature": [0.3, 1.0],
+    "repetitions": 2
+}
+
+QUERIES = [
+    "What services do you offer?",
+    "I have severe allergies. Can you help me?",
+    "What cleaning products do you use?",
+    "Do you service the Downtown area?"
+]
+
+# Fields of a query result that must replay exactly
+COMPARED = ("response", "iterations", "tool_calls", "prompt_tokens", "completion_tokens", "total_tokens", "cost")
+
+
+def remote_model(latency: float, seed: int):
+    """Factory of nondeterministic stand-ins for a remote model: random answers, jittered latency"""
+    choice = random.Random(seed)
+
+    def factory(model_name: str) -> SimulatedChatModel:
+        return SimulatedChatModel(
+            model_name,
+            responses=lambda messages: choice.choice(DEFAULT_RESPONSES),
+            latency=latency,
+            latency_sigma=0.5
+        )
+    return factory
+
+
+def run_sweep(output_dir: str, cassette: Cassette, llm_factory=None) -> tuple:
+    """(seconds, query results in order) of the sweep"""
+    runner = ExperimentRunner(output_dir=output_dir, llm_factory=llm_factory, cassette=cassette)
+    with contextlib.redirect_stdout(io.StringIO()):
+        runner.add_grid(GRID, test_queries=QUERIES)
+        start = time.perf_counter()
+        runner.run_experiments(verbose=False)
+        elapsed = time.perf_counter() - start
+    return elapsed, [query for result in runner.get_results() for query in result["query_results"]]
+
+
+def mismatches(recorded: List[Dict[str, Any]], replayed: List[Dict[str, Any]]) -> List[str]:
+    found = []
+    for before, after in zip(recorded, replayed):
+        for field in COMPARED:
+            if before.get(field) != after.get(field):
+                found.append(f"query {before['query_number']} ({before['query'][:30]}): {field} differs")
+    if len(recorded) != len(replayed):
+        found.append(f"{len(recorded)} runs recorded, {len(replayed)} replayed")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM cassette record / replay")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Median seconds per recorded LLM call")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the recorded model's answers")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sweep.cassette.json.gz")
+
+        recording = Cassette(path, mode="record")
+        record_time, recorded = run_sweep(directory, recording, remote_model(args.llm_latency, args.seed))
+        recording.save()
+        print(f"{'record':<22} {record_time:>7.2f}s  {format_stats(recording.stats())}")
+
+        replay_times = {}
+        for name, replay_latency in (("replay", False), ("replay (again)", False), ("replay with latency", True)):
+            cassette = Cassette(path, mode="replay", replay_latency=replay_latency)
+            replay_times[name], replayed = run_sweep(directory, cassette)
+            stats = cassette.stats()
+            print(f"{name:<22} {replay_times[name]:>7.2f}s  {format_stats(stats)}")
+            failures.extend(f"{name}: {m}" for m in mismatches(recorded, replayed))
+            if stats["misses"]:
+                failures.append(f"{name}: {stats['misses']} LLM calls missing from the cassette")
+
+        print(f"\nCassette: {os.path.getsize(path) / 1024:.1f} KB for {len(recorded)} runs")
+        overhead = min(replay_times["replay"], replay_times["replay (again)"]) / max(1, len(recorded))
+        print(f"Local overhead per run (replay without LLM latency): {overhead * 1000:.1f}ms")
+
+    if failures:
+        print("\nFAILED:")
+        for failure in failures[:20]:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nReplays reproduce the recorded sweep exactly.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Thought routing benchmark
+Compares the keyword router (thought_router.py) with the original DECIDE / ACT
+keyword scans and a single combined-regex scan on long chain-of-thought thoughts;
+fails if the router disagrees with the original or is slower than it
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from typing import Callable, Dict, Any, List, Optional
+
+from fake_llm import DEFAULT_RESPONSES
+from thought_router import (
+    route_thought, TOOL_NAMES, ACTION_KEYWORDS, ANSWER_KEYWORDS, SERVICE_QUERIES,
+    PRODUCT_CATEGORIES, AVAILABILITY_AREAS
+)
+
+# Reasoning filler between the routing-relevant sentences of a thought
+FILLER_SENTENCES = [
+    "The customer is asking about options for their home.",
+    "They mentioned earlier that they have two kids and a dog.",
+    "It is important to be accurate and not to promise anything we cannot deliver.",
+    "Let me think about this step by step before deciding.",
+    "First, I want to understand exactly what they are asking for.",
+    "Second, I should consider what information I already have.",
+    "They seem to care about safety and environmental impact.",
+    "Pricing was not mentioned yet, but it may come up later.",
+    "I want the reply to stay short and friendly."
+]
+
+# Closing sentences that decide the route
+CLOSING_SENTENCES = DEFAULT_RESPONSES + [
+    "I should check availability for the Hilltop location.",
+    "I need to record_customer_interest for this lead.",
+    "The answer is that all our products are non-toxic.",
+    "I would say the Regular Maintenance plan fits them best.",
+    "Hmm, nothing more to add here.",
+    "Let me look up which chemical ingredients the bathroom sanitizer uses.",
+    "I should record their feedback about the last visit."
+]
+
+
+def legacy_decide(thought: str, has_observations: bool) -> str:
+    """DECIDE as originally written: separate scans of the tool names and keyword lists"""
+    action_keywords = [
+        "search", "check", "get", "record", "look up", "find",
+        "tool", "function", "call", "need to", "should use"
+    ]
+    last_thought_lower = thought.lower()
+    for tool_name in TOOL_NAMES:
+        if tool_name in last_thought_lower:
+            return "act"
+    for keyword in action_keywords:
+        if keyword in last_thought_lower:
+            return "act"
+    answer_keywords = [
+        "answer:", "response:", "i can tell", "i know that",
+        "based on", "the answer is", "i would say"
+    ]
+    for keyword in answer_keywords:
+        if keyword in last_thought_lower:
+            return "respond"
+    return "respond" if has_observations else "act"
+
+
+def legacy_parse(thought: str) -> Optional[Dict[str, Any]]:
+    """ACT parsing as originally written: re-lowercases the thought and scans it again"""
+    thought_lower = thought.lower()
+    if "search" in thought_lower and ("service" in thought_lower or "cleaning" in thought_lower):
+        query = "all services"
+        if "allergen" in thought_lower or "allergy" in thought_lower:
+            query = "allergen"
+        elif "move" in thought_lower:
+            query = "move"
+        elif "maintenance" in thought_lower or "regular" in thought_lower:
+            query = "regular maintenance"
+        elif "deep clean" in thought_lower:
+            query = "deep cleaning"
+        return {"tool": "search_services", "parameters": {"query": query}}
+    if "check" in thought_lower and ("availability" in thought_lower or "location" in thought_lower or "area" in thought_lower):
+        location = "downtown"
+        for area in ["downtown", "northside", "westend", "eastbridge", "southgate", "riverside", "hilltop", "lakeside"]:
+            if area in thought_lower:
+                location = area
+                break
+        return {"tool": "check_availability", "parameters": {"location": location}}
+    if "product" in thought_lower or "ingredient" in thought_lower or "chemical" in thought_lower:
+        category = "all"
+        if "bathroom" in thought_lower:
+            category = "bathroom"
+        elif "floor" in thought_lower:
+            category = "floor"
+        elif "glass" in thought_lower or "window" in thought_lower:
+            category = "glass"
+        elif "all-purpose" in thought_lower or "all purpose" in thought_lower:
+            category = "all_purpose"
+        return {"tool": "get_product_info", "parameters": {"product_category": category}}
+    if "record" in thought_lower and ("interest" in thought_lower or "lead" in thought_lower or "contact" in thought_lower):
+        return None
+    if "record" in thought_lower and "feedback" in thought_lower:
+        return None
+    return {"tool": "search_services", "parameters": {"query": "all services"}}
+
+
+def legacy_route(thought: str) -> Dict[str, Any]:
+    """One DECIDE (without observations) plus, when it acts, one ACT parse"""
+    decision = legacy_decide(thought, has_observations=False)
+    return {"decision": decision, "action": legacy_parse(thought) if decision == "act" else None}
+
+
+def build_combined_regex() -> Callable[[str], set]:
+    """
+    Single-pass alternative: one lookahead regex over the whole vocabulary,
+    reporting every routing term that occurs (overlaps included)
+    """
+    vocabulary = set(TOOL_NAMES) | set(ACTION_KEYWORDS) | set(ANSWER_KEYWORDS) | set(AVAILABILITY_AREAS)
+    vocabulary |= {"service", "cleaning", "availability", "location", "area", "product", "ingredient",
+                   "chemical", "interest", "lead", "contact", "feedback"}
+    for mentions, _ in SERVICE_QUERIES + PRODUCT_CATEGORIES:
+        vocabulary |= set(mentions)
+    ordered = sorted(vocabulary, key=len, reverse=True)
+    pattern = re.compile("(?=(" + "|".join(map(re.escape, ordered)) + "))")
+    prefixes = {term: {other for other in vocabulary if term.startswith(other)} for term in vocabulary}
+
+    def scan(thought: str) -> set:
+        found = set()
+        for term in set(pattern.findall(thought.lower())):
+            found |= prefixes[term]
+        return found
+
+    return scan
+
+
+def make_thoughts(count: int, sentences: int, seed: int) -> List[str]:
+    """Long CoT thoughts: reasoning filler, optional mid-thought mentions, one closing sentence"""
+    rng = random.Random(seed)
+    thoughts = []
+    for _ in range(count):
+        body = [rng.choice(FILLER_SENTENCES) for _ in range(sentences)]
+        if rng.random() < 0.3:
+            body.insert(rng.randrange(len(body) + 1), rng.choice(CLOSING_SENTENCES))
+        body.append(rng.choice(CLOSING_SENTENCES))
+        thoughts.append(" ".join(body))
+    return thoughts
+
+
+def throughput(fn: Callable[[str], Any], thoughts: List[str], repeat: int) -> float:
+    """Best-of-repeat thoughts routed per second"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for thought in thoughts:
+            fn(thought)
+        best = min(best, time.perf_counter() - start)
+    return len(thoughts) / best
+
+
+def check_agreement(thoughts: List[str]) -> List[str]:
+    """Thoughts on which the router's decision or action differs from the original"""
+    mismatches = []
+    for thought in thoughts:
+        route = route_thought(thought)
+        for has_observations in (False, True):
+            decision = route["decision"] or ("respond" if has_observations else "act")
+            if decision != legacy_decide(thought, has_observations):
+                mismatches.append(f"decision ({has_observations=}): {thought[-80:]!r}")
+        if route["decision"] != "respond" and route["action"] != legacy_parse(thought):
+            mismatches.append(f"action: {thought[-80:]!r}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyword routing of THINK output")
+    parser.add_argument("--thoughts", type=int, default=2000, help="Thoughts per length")
+    parser.add_argument("--sentences", type=int, nargs="+", default=[5, 25, 100],
+                        help="Filler sentences per thought (thought length)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs (best is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    combined_regex = build_combined_regex()
+    failures = []
+
+    print(f"{'chars/thought':>14} {'original/s':>12} {'router/s':>12} {'regex/s':>12} {'speedup':>8}")
+    for sentences in args.sentences:
+        thoughts = make_thoughts(args.thoughts, sentences, args.seed)
+        mismatches = check_agreement(thoughts)
+        if mismatches:
+            failures.append(f"{len(mismatches)} routing mismatch(es) at {sentences} sentences, e.g. {mismatches[0]}")
+
+        original = throughput(legacy_route, thoughts, args.repeat)
+        router = throughput(route_thought, thoughts, args.repeat)
+        regex = throughput(combined_regex, thoughts, args.repeat)
+        chars = sum(map(len, thoughts)) / len(thoughts)
+        print(f"{chars:>14.0f} {original:>12.0f} {router:>12.0f} {regex:>12.0f} {router / original:>7.2f}x")
+        if router < original:
+            failures.append(f"router slower than the original at {chars:.0f} chars/thought")
+
+    if failures:
+        print("\nROUTING REGRESSION:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nRouter agrees with the original and is faster.")
+
+
+if __name__ == "__main__":
+    main()
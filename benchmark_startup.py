@@ -0,0 +1,139 @@
+"""
+Startup benchmark
+Measures module import time (python -X importtime) and time-to-first-response
+with a simulated LLM in fresh interpreters, and fails when a budget is exceeded
+"""
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, Any, List
+
+# Cumulative import time budgets in milliseconds
+IMPORT_BUDGETS_MS = {
+    "react_agent": 1000,
+    "experiment_runner": 1000,
+    "app": 1000
+}
+
+# Time from interpreter start to the first answer of a simulated-LLM run
+FIRST_RESPONSE_BUDGET_MS = 2500
+
+# Modules that must only load on first use, never at import
+LAZY_MODULES = ["langchain_openai", "openai", "langgraph.graph", "pandas", "dotenv", "gradio"]
+
+# Lazy modules a module may still load at import (the app reads its settings from .env as it loads)
+EAGER_ALLOWED = {"app": ["dotenv"]}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+FIRST_RESPONSE_SCRIPT = """
+import contextlib, json, os, time
+start = time.perf_counter()
+from react_agent import ReActAgent
+from fake_llm import SimulatedChatModel
+imported = time.perf_counter()
+agent = ReActAgent(
+    persona_name="startup",
+    system_prompt="You are a helpful cleaning services assistant.",
+    llm_factory=lambda name: SimulatedChatModel(name)
+)
+created = time.perf_counter()
+with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+    agent.run("What services do you offer?")
+answered = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_ms": (created - imported) * 1000,
+    "run_ms": (answered - created) * 1000
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse `-X importtime` output into (module, self_ms, cumulative_ms, depth) rows"""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append({
+                "module": module,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": len(indent) // 2
+            })
+    return rows
+
+
+def measure_import(module: str) -> Dict[str, Any]:
+    """Import a module in a fresh interpreter and report its import time and eagerly loaded heavy modules"""
+    check = f"import json, sys, {module}; print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        capture_output=True, text=True, check=True
+    )
+    rows = parse_importtime(proc.stderr)
+    top = [row for row in rows if row["module"] == module and row["depth"] == 0]
+    return {
+        "module": module,
+        "cumulative_ms": top[-1]["cumulative_ms"],
+        "slowest": sorted((r for r in rows if r["depth"] == 1), key=lambda r: -r["cumulative_ms"])[:5],
+        "eager_heavy": json.loads(proc.stdout.strip().splitlines()[-1])
+    }
+
+
+def measure_first_response() -> Dict[str, float]:
+    """Time-to-first-response of a fresh interpreter with a simulated LLM"""
+    proc = subprocess.run(
+        [sys.executable, "-c", FIRST_RESPONSE_SCRIPT],
+        capture_output=True, text=True, check=True
+    )
+    timings = json.loads(proc.stdout.strip().splitlines()[-1])
+    timings["total_ms"] = timings["import_ms"] + timings["create_ms"] + timings["run_ms"]
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time-to-first-response")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (median is reported)")
+    parser.add_argument("--first-response-budget-ms", type=float, default=FIRST_RESPONSE_BUDGET_MS)
+    args = parser.parse_args()
+
+    failures = []
+
+    print("IMPORT TIME (python -X importtime, median of fresh interpreters)")
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        measurements = [measure_import(module) for _ in range(args.repeat)]
+        median = statistics.median(m["cumulative_ms"] for m in measurements)
+        status = "OK" if median <= budget else "OVER BUDGET"
+        print(f"  {module:<20} {median:8.1f} ms  (budget {budget} ms)  {status}")
+        for row in measurements[-1]["slowest"]:
+            print(f"      {row['module']:<40} {row['cumulative_ms']:8.1f} ms")
+        if median > budget:
+            failures.append(f"import {module}: {median:.0f} ms > {budget} ms")
+        eager = [m for m in measurements[-1]["eager_heavy"] if m not in EAGER_ALLOWED.get(module, [])]
+        if eager:
+            failures.append(f"import {module} eagerly loads {eager}")
+
+    print("\nTIME TO FIRST RESPONSE (simulated LLM)")
+    runs = [measure_first_response() for _ in range(args.repeat)]
+    for field in ("import_ms", "create_ms", "run_ms", "total_ms"):
+        print(f"  {field:<20} {statistics.median(r[field] for r in runs):8.1f} ms")
+    total = statistics.median(r["total_ms"] for r in runs)
+    if total > args.first_response_budget_ms:
+        failures.append(f"first response: {total:.0f} ms > {args.first_response_budget_ms:.0f} ms")
+
+    if failures:
+        print("\nSTARTUP REGRESSION:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nStartup within budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+State-size benchmark for the ReAct graph
+Records list lengths and serialized AgentState size after every iteration and
+fails if they grow faster than linearly in the iteration count
+"""
+
+import argparse
+import os
+import sys
+from contextlib import redirect_stdout
+from typing import Dict, Any, List
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from fake_llm import SimulatedChatModel
+from react_agent import ReActAgent
+from llm_scheduler import LLMScheduler
+
+
+# Thoughts that always ask for another tool call, so runs reach max_iterations
+LOOPING_THOUGHTS = [
+    "I should search services for deep clean options.",
+    "I need to check availability in the riverside area.",
+    "Let me get product info about floor cleaners.",
+    "I should search services for allergen friendly cleaning."
+]
+
+LIST_CHANNELS = ["messages", "thoughts", "actions", "observations", "node_metrics"]
+
+
+def measure_run(max_iterations: int) -> List[Dict[str, Any]]:
+    """
+    Run one query to max_iterations and measure the state after each iteration
+
+    Returns:
+        One row per completed iteration (plus the final state)
+    """
+    agent = ReActAgent(
+        persona_name="benchmark",
+        system_prompt="You are a helpful cleaning services assistant.",
+        max_iterations=max_iterations,
+        # Repeated tool calls are expected here; keep the loop running
+        stall_threshold=max_iterations + 1,
+        scheduler=LLMScheduler(),
+        llm_factory=lambda name: SimulatedChatModel(name, responses=LOOPING_THOUGHTS)
+    )
+    serde = JsonPlusSerializer()
+
+    rows = []
+    initial = agent._initial_state(
+        "What cleaning do you offer?",
+        {"think": agent.config["think_model"], "respond": agent.config["respond_model"]}
+    )
+    last_iteration = -1
+    for state in agent.graph.stream(initial, stream_mode="values"):
+        if state["iteration"] == last_iteration and state["final_answer"] is None:
+            continue
+        last_iteration = state["iteration"]
+        row = {"max_iterations": max_iterations, "iteration": state["iteration"]}
+        row.update({channel: len(state[channel]) for channel in LIST_CHANNELS})
+        row["state_bytes"] = len(serde.dumps_typed(state)[1])
+        rows.append(row)
+    return rows
+
+
+def check_linear(rows: List[Dict[str, Any]]) -> List[str]:
+    """
+    Check the final state against the exact sizes of a linear-growth run
+
+    A run of n iterations makes n + 1 THINK calls, n tool calls and one
+    RESPOND call (the user message plus one message per LLM call).
+    """
+    final = rows[-1]
+    n = final["iteration"]
+    expected = {
+        "thoughts": n + 1,
+        "actions": n,
+        "observations": n,
+        "messages": n + 3,
+        "node_metrics": 3 * n + 2
+    }
+    return [
+        f"max_iterations={final['max_iterations']}: {channel} has {final[channel]} entries, expected {count}"
+        for channel, count in expected.items()
+        if final[channel] != count
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure AgentState growth per iteration")
+    parser.add_argument("--max-iterations", type=int, nargs="+", default=[5, 10, 25, 50])
+    parser.add_argument("--verbose", action="store_true", help="Show agent output")
+    args = parser.parse_args()
+
+    all_rows = []
+    for max_iterations in args.max_iterations:
+        # The agent prints every step; keep the benchmark output readable
+        with open(os.devnull, "w") as devnull, redirect_stdout(sys.stdout if args.verbose else devnull):
+            all_rows.extend(measure_run(max_iterations))
+
+    header = ["max_iterations", "iteration"] + LIST_CHANNELS + ["state_bytes"]
+    print(" ".join(f"{h:>14}" for h in header))
+    for row in all_rows:
+        print(" ".join(f"{row[h]:>14}" for h in header))
+
+    failures = []
+    for max_iterations in args.max_iterations:
+        rows = [row for row in all_rows if row["max_iterations"] == max_iterations]
+        failures.extend(check_linear(rows))
+        per_iteration = (rows[-1]["state_bytes"] - rows[0]["state_bytes"]) / max(1, rows[-1]["iteration"])
+        print(f"max_iterations={max_iterations}: {rows[-1]['state_bytes']} bytes final, "
+              f"{per_iteration:.0f} bytes per iteration")
+
+    if failures:
+        print("\nSTATE GROWTH REGRESSION:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nState growth is linear in iterations.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Multi-tenant residency benchmark
+Generates thousands of franchise tenants (own contact details and service
+areas; every tenth also has its own product catalog) and serves a skewed
+stream of tool calls through a bounded TenantStore, reporting hit rate, load
+latency, resident memory and evictions; fails if residency exceeds its limits
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmark_catalog import synthetic_products
+from product_catalog import ProductCatalog
+from memory_profiler import format_bytes
+from tenants import (
+    TenantStore, TENANT_FILE, SERVICES_FILE, PRODUCTS_FILE, DEFAULT_DATA_DIR, approximate_size, set_tenant_store
+)
+from tools import check_availability, get_product_info
+
+
+def write_tenants(data_dir: str, count: int, catalog_every: int, skus: int, seed: int):
+    """Base files from business_data/ plus count tenant directories"""
+    for name in (TENANT_FILE, SERVICES_FILE, PRODUCTS_FILE):
+        shutil.copy(os.path.join(DEFAULT_DATA_DIR, name), data_dir)
+    base_products = ProductCatalog.from_file(os.path.join(DEFAULT_DATA_DIR, PRODUCTS_FILE)).products
+    rng = random.Random(seed)
+    for n in range(count):
+        directory = os.path.join(data_dir, "tenants", f"franchise_{n:05d}")
+        os.makedirs(directory)
+        with open(os.path.join(directory, TENANT_FILE), "w") as f:
+            json.dump({
+                "name": f"BreatheEasy Franchise {n}",
+                "contact": {"email": f"franchise{n}@breatheeasy.com", "phone": f"(555) {n % 1000:03d}-EASY",
+                            "hours": "Monday-Saturday, 8am-6pm"},
+                "service_areas": [f"Area {n}-{i}" for i in range(rng.randint(3, 12))]
+            }, f)
+        if n % catalog_every == 0:
+            with open(os.path.join(directory, PRODUCTS_FILE), "w") as f:
+                json.dump({"products": synthetic_products(base_products, skus, seed + n)}, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-tenant data residency")
+    parser.add_argument("--tenants", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--max-tenants", type=int, default=200, help="Resident tenant limit")
+    parser.add_argument("--max-mb", type=float, default=64, help="Resident memory limit")
+    parser.add_argument("--catalog-every", type=int, default=10, help="Every Nth tenant has its own catalog")
+    parser.add_argument("--skus", type=int, default=500, help="Products in a tenant's own catalog")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Skew of tenant popularity (higher, more skewed)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="tenants_")
+    try:
+        start = time.perf_counter()
+        write_tenants(data_dir, args.tenants, args.catalog_every, args.skus, args.seed)
+        print(f"Wrote {args.tenants} tenants in {time.perf_counter() - start:.1f}s")
+
+        store = TenantStore(data_dir, max_tenants=args.max_tenants, max_bytes=int(args.max_mb * 1024 * 1024))
+        set_tenant_store(store)  # the tools read the process-wide store
+        ids = store.list_tenants()[1:]
+        weights = [1 / (rank + 1) ** args.zipf for rank in range(len(ids))]
+        rng = random.Random(args.seed)
+        rng.shuffle(ids)
+        stream = rng.choices(ids, weights, k=args.requests)
+
+        miss_latencies, hit_latencies = [], []
+        peak_bytes = 0
+        for i, tenant_id in enumerate(stream):
+            misses = store.misses
+            call_start = time.perf_counter()
+            if i % 2:
+                get_product_info("bathroom", allergen_free=True, tenant_id=tenant_id)
+            else:
+                check_availability("Area", tenant_id=tenant_id)
+            elapsed = time.perf_counter() - call_start
+            (miss_latencies if store.misses > misses else hit_latencies).append(elapsed)
+            peak_bytes = max(peak_bytes, store.stats()["resident_bytes"])
+
+        stats = store.stats()
+        miss_latencies.sort()
+        hit_latencies.sort()
+        print(f"\n{args.requests} tool calls over {len(set(stream))} distinct tenants")
+        print(f"  Hit rate:          {stats['hit_rate']:.1%} ({stats['misses']} loads, {stats['evictions']} evictions)")
+        print(f"  Resident:          {stats['resident_tenants']} tenants, {format_bytes(stats['resident_bytes'])} "
+              f"(peak {format_bytes(peak_bytes)}), base {format_bytes(stats['base_bytes'])}")
+        if hit_latencies:
+            print(f"  Call, resident:    p50 {hit_latencies[len(hit_latencies) // 2] * 1000:.3f}ms")
+        if miss_latencies:
+            print(f"  Call, with load:   p50 {miss_latencies[len(miss_latencies) // 2] * 1000:.2f}ms, "
+                  f"p99 {miss_latencies[int(len(miss_latencies) * 0.99)] * 1000:.2f}ms")
+        everything = approximate_size([store.get(tenant_id) for tenant_id in ids[:50]]) * len(ids) / 50
+        print(f"  All tenants resident (estimate): {format_bytes(everything)}")
+
+        failures = []
+        if stats["resident_tenants"] > args.max_tenants:
+            failures.append(f"{stats['resident_tenants']} tenants resident, limit {args.max_tenants}")
+        if peak_bytes > args.max_mb * 1024 * 1024:
+            failures.append(f"peak resident {format_bytes(peak_bytes)} over {args.max_mb} MB")
+        if failures:
+            print("\nFAILED:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("\nResidency within limits.")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
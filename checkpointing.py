@@ -0,0 +1,131 @@
+"""
+Pluggable LangGraph checkpointers for durable agent runs
+In-memory for a single process, SQLite (WAL, periodic compaction) to survive restarts and share sessions across workers
+"""
+
+import asyncio
+import sqlite3
+import threading
+from typing import Optional
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+
+class CompactingSqliteSaver(SqliteSaver):
+    """
+    SQLite checkpointer in WAL mode that periodically compacts old checkpoints
+
+    WAL lets several worker processes on the same host read and write the
+    database concurrently. Every `compact_every` checkpoint writes, all but
+    the newest `keep_per_thread` checkpoints of each thread are deleted
+    (with their pending writes) and the WAL file is truncated, so the
+    database grows with the number of threads rather than graph steps.
+    """
+
+    def __init__(self, path: str, compact_every: int = 200, keep_per_thread: int = 1):
+        """
+        Open (or create) the checkpoint database
+
+        Args:
+            path: SQLite database file
+            compact_every: Checkpoint writes between compactions (0 disables)
+            keep_per_thread: Checkpoints kept per thread when compacting
+        """
+        conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        super().__init__(conn)
+
+        self.path = path
+        self.compact_every = compact_every
+        self.keep_per_thread = keep_per_thread
+        self._puts = 0
+        self._puts_lock = threading.Lock()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        result = super().put(config, checkpoint, metadata, new_versions)
+        with self._puts_lock:
+            self._puts += 1
+            due = self.compact_every and self._puts % self.compact_every == 0
+        if due:
+            self.compact()
+        return result
+
+    def compact(self) -> int:
+        """
+        Drop superseded checkpoints and truncate the WAL
+
+        Returns:
+            Number of checkpoints deleted
+        """
+        self.setup()
+        with self.cursor() as cur:
+            cur.execute(
+                """
+                DELETE FROM checkpoints WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, ROW_NUMBER() OVER (
+                            PARTITION BY thread_id, checkpoint_ns
+                            ORDER BY checkpoint_id DESC
+                        ) AS rank
+                        FROM checkpoints
+                    ) WHERE rank > ?
+                )
+                """,
+                (self.keep_per_thread,)
+            )
+            deleted = cur.rowcount
+            cur.execute(
+                """
+                DELETE FROM writes WHERE NOT EXISTS (
+                    SELECT 1 FROM checkpoints c
+                    WHERE c.thread_id = writes.thread_id
+                      AND c.checkpoint_ns = writes.checkpoint_ns
+                      AND c.checkpoint_id = writes.checkpoint_id
+                )
+                """
+            )
+        with self.lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return deleted
+
+    # The async graph path runs the blocking SQLite calls in a worker thread
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+
+def create_checkpointer(backend: str = "memory", path: Optional[str] = None, **kwargs):
+    """
+    Create a checkpointer for ReActAgent
+
+    Args:
+        backend: "memory" (single process) or "sqlite" (durable, shared by workers)
+        path: SQLite database file (sqlite backend, defaults to agent_checkpoints.db)
+        **kwargs: Extra settings for CompactingSqliteSaver
+
+    Returns:
+        LangGraph checkpointer
+    """
+    if backend == "memory":
+        return InMemorySaver()
+    if backend == "sqlite":
+        return CompactingSqliteSaver(path or "agent_checkpoints.db", **kwargs)
+    raise ValueError(f"Unknown checkpointer backend: {backend}. Available: ['memory', 'sqlite']")
@@ -0,0 +1,339 @@
+"""
+Opt-in sampling CPU profiling of agent runs
+A background thread samples the Python stacks of a run's threads that used CPU
+since its previous tick, at a fixed interval (no tracing hooks, so overhead
+stays low enough for a fraction of production requests); each profiled run
+yields collapsed stacks for flame graphs and the functions with the most samples
+"""
+
+import contextvars
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Any, Iterator, List, Optional
+
+# Seconds between samples (100 Hz)
+DEFAULT_INTERVAL = 0.01
+
+# Innermost frames of a thread blocked on a lock, queue or socket. A thread that used CPU since
+# the last tick but sits in one of these now finished its work before the sampler got the GIL
+# (blocking calls release it), so where it spent that CPU is unknown; such samples are dropped.
+WAIT_FRAMES = frozenset({
+    "threading:Condition.wait",
+    "threading:Thread._wait_for_tstate_lock",
+    "thread:_worker",
+    "queue:Queue.get",
+    "selectors:EpollSelector.select",
+    "selectors:KqueueSelector.select",
+    "selectors:PollSelector.select",
+    "selectors:SelectSelector.select",
+    "base_events:BaseEventLoop._run_once"
+})
+
+# Frames kept per sample, innermost first; deeper stacks are cut at the root
+MAX_DEPTH = 128
+
+
+def _frame_name(code) -> str:
+    """Flame graph frame label: module:qualified function name"""
+    filename = code.co_filename
+    # Keep pseudo-files such as <frozen importlib._bootstrap> whole
+    module = filename if filename.startswith("<") else os.path.splitext(os.path.basename(filename))[0]
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _thread_cpu(thread_id: int) -> Optional[float]:
+    """CPU seconds used by a thread (None where per-thread CPU clocks are unavailable)"""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+    except (AttributeError, OSError):
+        return None
+
+
+def _thread_label(name: str) -> str:
+    """Flame graph root of a thread, with pool worker numbers dropped so pools aggregate"""
+    return "[" + (re.sub(r"[-_]?\d+", "", name) or name) + "]"
+
+
+_switch_lock = threading.Lock()
+_switch_profiles = 0
+_saved_switch_interval = None
+
+
+def _lower_switch_interval(switch_interval: float):
+    global _switch_profiles, _saved_switch_interval
+    with _switch_lock:
+        if _switch_profiles == 0:
+            _saved_switch_interval = sys.getswitchinterval()
+        _switch_profiles += 1
+        sys.setswitchinterval(min(sys.getswitchinterval(), switch_interval))
+
+
+def _restore_switch_interval():
+    global _switch_profiles
+    with _switch_lock:
+        _switch_profiles -= 1
+        if _switch_profiles == 0:
+            sys.setswitchinterval(_saved_switch_interval)
+
+
+class _RunThreads:
+    """Threads working for one profiled block: the one running it, plus pool workers while they run its work"""
+
+    def __init__(self, ident: int):
+        self._lock = threading.Lock()
+        self._counts = Counter({ident: 1})
+
+    def add(self, ident: int):
+        with self._lock:
+            self._counts[ident] += 1
+
+    def remove(self, ident: int):
+        with self._lock:
+            self._counts[ident] -= 1
+            if self._counts[ident] <= 0:
+                del self._counts[ident]
+
+    def __contains__(self, ident: int) -> bool:
+        with self._lock:
+            return ident in self._counts
+
+
+# Thread sets of the profiles active in the current context
+_active_runs: contextvars.ContextVar = contextvars.ContextVar("cpu_profiler_runs", default=())
+
+
+def follow(fn: Callable) -> Callable:
+    """
+    Wrap work handed to a thread pool, so that the worker running it is sampled
+    by the profiles active where it was handed over (fn itself when there are none)
+    """
+    runs = _active_runs.get()
+    if not runs:
+        return fn
+
+    def followed(*args, **kwargs):
+        ident = threading.get_ident()
+        for threads in runs:
+            threads.add(ident)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            for threads in runs:
+                threads.remove(ident)
+    return followed
+
+
+def _stack(frame) -> tuple:
+    """Frame labels of a stack, outermost first"""
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    return tuple(reversed(names))
+
+
+class CPUProfiler:
+    """
+    Samples where agent runs spend CPU
+
+    Samples the thread that enters profile() and the pool workers while they
+    run work it handed over through follow() (hedged LLM attempts, prefetched
+    tools), so runs executing concurrently in the same process stay out of
+    each other's profiles; all_threads=True samples every thread instead.
+    Stacks are rooted at their thread (pool) name. A thread is only sampled
+    when its CPU clock advanced since the previous tick, so threads waiting
+    on the network, a lock or the GIL are left out (see WAIT_FRAMES for the
+    samples that cannot be placed). Without per-thread CPU clocks
+    (non-POSIX), samples are wall-clock.
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_INTERVAL,
+        sample_rate: float = 1.0,
+        top_n: int = 15,
+        output_dir: Optional[str] = None,
+        all_threads: bool = False,
+        switch_interval: Optional[float] = None,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize the profiler
+
+        Args:
+            interval: Seconds between stack samples
+            sample_rate: Fraction of runs profiled (e.g. 0.01 in production)
+            top_n: Functions reported per profiled run, by samples in the function itself
+            output_dir: Directory receiving one collapsed-stack file per profiled run
+                (input of flamegraph.pl / speedscope); None keeps profiles in memory only
+            all_threads: Sample every thread of the process, not just the run's own
+            switch_interval: Interpreter switch interval (e.g. 0.001) while profiling.
+                The sampler needs the GIL, which a busy thread gives up after the
+                switch interval (5 ms by default), so CPU bursts shorter than that
+                are caught at the wait that follows them. Lowering it catches more
+                of them but changes scheduling of every thread in the process;
+                None leaves it alone
+            seed: Seed of the choice of profiled runs
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"sample_rate must be between 0 and 1, got {sample_rate}")
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self.output_dir = output_dir
+        self.all_threads = all_threads
+        self.switch_interval = switch_interval
+        self.runs = 0
+        self.profiled = 0
+
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+    def _sampled(self) -> bool:
+        with self._lock:
+            self.runs += 1
+            if self._random.random() >= self.sample_rate:
+                return False
+            self.profiled += 1
+            return True
+
+    def _sample_loop(self, threads: _RunThreads, stacks: Counter, unplaced: list, stop: threading.Event):
+        own_id = threading.get_ident()
+        names = {}
+        # CPU clocks of every thread are tracked, so a pool worker joining the run mid-way is
+        # sampled from its first tick
+        cpu_times = {ident: _thread_cpu(ident) for ident in sys._current_frames()}
+        while not stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident == own_id:
+                    continue
+                cpu = _thread_cpu(ident)
+                if cpu is not None:
+                    previous, cpu_times[ident] = cpu_times.get(ident), cpu
+                    if previous is None or cpu <= previous:
+                        continue  # not on CPU since the last tick (or first seen)
+                if not self.all_threads and ident not in threads:
+                    continue
+                stack = _stack(frame)
+                if cpu is not None and stack and stack[-1] in WAIT_FRAMES:
+                    unplaced[0] += 1
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stacks[(_thread_label(names.get(ident, str(ident))),) + stack] += 1
+
+    @contextmanager
+    def profile(self, label: str = "run") -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        Profile the enclosed block (when this run is sampled)
+
+        Yields None for runs left out by sample_rate; otherwise a dict that is
+        filled in when the block exits with samples (on-CPU stack samples),
+        unplaced_samples (on-CPU threads caught at a wait, see WAIT_FRAMES),
+        wall_seconds, cpu_seconds (process CPU time, all threads),
+        top_functions and, with output_dir, the collapsed_file written.
+        """
+        if not self._sampled():
+            yield None
+            return
+
+        record = {}
+        stacks = Counter()
+        unplaced = [0]
+        threads = _RunThreads(threading.get_ident())
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=self._sample_loop, args=(threads, stacks, unplaced, stop),
+            name="cpu-profiler", daemon=True
+        )
+        if self.switch_interval is not None:
+            _lower_switch_interval(self.switch_interval)
+        token = _active_runs.set(_active_runs.get() + (threads,))
+        start, start_cpu = time.perf_counter(), time.process_time()
+        sampler.start()
+        try:
+            yield record
+        finally:
+            stop.set()
+            sampler.join()
+            _active_runs.reset(token)
+            if self.switch_interval is not None:
+                _restore_switch_interval()
+            record.update({
+                "label": label,
+                "samples": sum(stacks.values()),
+                "unplaced_samples": unplaced[0],
+                "interval": self.interval,
+                "wall_seconds": time.perf_counter() - start,
+                "cpu_seconds": time.process_time() - start_cpu,
+                "top_functions": top_functions(stacks, self.top_n),
+                "collapsed_file": self._write_collapsed(label, stacks) if self.output_dir else None
+            })
+
+    def _write_collapsed(self, label: str, stacks: Counter) -> str:
+        name = re.sub(r"[^\w.-]+", "_", label)
+        path = os.path.join(self.output_dir, f"{datetime.now():%Y%m%d-%H%M%S-%f}-{name}.collapsed")
+        with open(path, "w") as f:
+            f.write(collapsed_stacks(stacks))
+        return path
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"runs": self.runs, "profiled": self.profiled, "sample_rate": self.sample_rate}
+
+
+def collapsed_stacks(stacks: Counter) -> str:
+    """Brendan Gregg's collapsed format: one "outer;...;inner count" line per distinct stack"""
+    return "".join(f"{';'.join(stack)} {count}\n" for stack, count in stacks.most_common())
+
+
+def top_functions(stacks: Counter, top_n: int) -> List[Dict[str, Any]]:
+    """
+    Functions with the most samples
+
+    "self" counts samples in the function itself (the innermost frame),
+    "total" samples anywhere below it (counted once per stack).
+    """
+    total_samples = sum(stacks.values())
+    self_counts, total_counts = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = [frame for frame in stack if not frame.startswith("[")]
+        if frames:
+            self_counts[frames[-1]] += count
+        for frame in set(frames):
+            total_counts[frame] += count
+    return [
+        {
+            "function": function,
+            "self": count,
+            "total": total_counts[function],
+            "self_pct": 100.0 * count / total_samples,
+            "total_pct": 100.0 * total_counts[function] / total_samples
+        }
+        for function, count in self_counts.most_common(top_n)
+    ]
+
+
+def format_profile(record: Dict[str, Any]) -> str:
+    """Readable report of one profiled run"""
+    lines = [
+        f"CPU profile of {record['label']}: {record['samples']} samples over {record['wall_seconds']:.2f}s "
+        f"({record['cpu_seconds']:.2f}s CPU, {record['unplaced_samples']} caught waiting)"
+    ]
+    if record["top_functions"]:
+        lines.append(f"  {'self %':>7} {'total %':>8}  function")
+        for function in record["top_functions"]:
+            lines.append(f"  {function['self_pct']:>6.1f}% {function['total_pct']:>7.1f}%  {function['function']}")
+    if record["collapsed_file"]:
+        lines.append(f"  Collapsed stacks: {record['collapsed_file']}")
+    return "\n".join(lines)
@@ -0,0 +1,298 @@
+"""
+Distributed experiment execution
+A coordinator plans the experiments (sweep_planner.py) and puts each unique
+(configuration, query, repetition) unit in a shared queue (work_queue.py);
+workers on any number of hosts claim and run them; a merge step fans results
+out to experiments and builds the usual results, summary and comparison table
+
+Usage:
+    python distributed_experiments.py coordinate --queue /shared/sweep
+    python distributed_experiments.py work --queue /shared/sweep --processes 4   # on every host
+    python distributed_experiments.py merge --queue /shared/sweep --output-dir experiment_results
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from typing import Dict, Any, Optional
+
+from experiment_runner import ExperimentRunner, create_comprehensive_experiment_suite
+from sweep_planner import SweepPlan, plan_sweep
+from work_queue import create_work_queue, default_worker_id, DEFAULT_LEASE_SECONDS
+
+# Agents kept warm per worker (units of one experiment tend to be claimed together)
+MAX_WORKER_AGENTS = 4
+
+# Seconds an idle worker waits before polling again while other workers hold leases
+POLL_INTERVAL = 2.0
+
+
+def coordinate(runner: ExperimentRunner, queue) -> SweepPlan:
+    """
+    Plan a runner's experiments and enqueue each unique unit once
+
+    Re-running on an existing queue adds nothing.
+
+    Returns:
+        The sweep plan (see its report() for the runs saved)
+    """
+    plan = plan_sweep(runner.experiments)
+    queue.put_meta("experiments", runner.experiments)
+    queue.put_meta("plan", plan.to_dict())
+    queue.enqueue([{"id": key, **unit} for key, unit in plan.units.items()])
+    return plan
+
+
+class Heartbeat:
+    """Renews a unit's lease from a background thread while the unit runs"""
+
+    def __init__(self, queue, unit_id: str, worker_id: str, interval: float):
+        # SQLite connections are per thread, so the heartbeat opens its own
+        self._queue_args = (queue.path, queue.backend, queue.lease_seconds, queue.max_attempts)
+        self.unit_id = unit_id
+        self.worker_id = worker_id
+        self.interval = interval
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, daemon=True)
+
+    def _beat(self):
+        path, backend, lease_seconds, max_attempts = self._queue_args
+        queue = create_work_queue(path, backend, lease_seconds=lease_seconds, max_attempts=max_attempts)
+        try:
+            while not self._stop.wait(self.interval):
+                if not queue.heartbeat(self.unit_id, self.worker_id):
+                    self.lost = True
+                    return
+        finally:
+            queue.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class ExperimentWorker:
+    """
+    Claims units from a queue and runs them with ReActAgent until the queue is drained
+
+    Agents are cached per configuration, so consecutive units of one
+    configuration reuse a warm agent.
+    """
+
+    def __init__(
+        self,
+        queue,
+        runner: Optional[ExperimentRunner] = None,
+        worker_id: Optional[str] = None,
+        poll_interval: float = POLL_INTERVAL
+    ):
+        """
+        Initialize the worker
+
+        Args:
+            queue: Work queue (see work_queue.create_work_queue)
+            runner: Runner providing agent construction (price table, latency policy, llm_factory)
+            worker_id: Unique id of this worker (defaults to host, pid and a random suffix)
+            poll_interval: Wait between claims while other workers hold the remaining units
+        """
+        self.queue = queue
+        self.runner = runner or ExperimentRunner()
+        self.worker_id = worker_id or default_worker_id()
+        self.poll_interval = poll_interval
+        self.completed = 0
+        self.failed = 0
+
+        self._agents = OrderedDict()
+
+    def _agent(self, unit: Dict[str, Any]) -> tuple:
+        key = unit["config_key"]
+        if key not in self._agents:
+            self._agents[key] = self.runner._create_agent(unit["config"])
+            while len(self._agents) > MAX_WORKER_AGENTS:
+                self._agents.popitem(last=False)
+        self._agents.move_to_end(key)
+        return self._agents[key]
+
+    def run_unit(self, unit: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one unit; returns its result record"""
+        agent, persona_config = self._agent(unit)
+        query_result = self.runner._run_query(agent, unit["query"], 1, verbose=False)
+        run_log = agent.get_logs()[-1] if query_result["success"] else None
+        return {
+            "persona_name": persona_config["name"],
+            "query_result": query_result,
+            "run_log": ExperimentRunner._serialize_logs([run_log])[0] if run_log else None,
+            "worker": self.worker_id
+        }
+
+    def run(self, max_units: Optional[int] = None) -> int:
+        """
+        Work until no unit is pending or leased (or max_units have run)
+
+        Returns:
+            Number of units this worker completed
+        """
+        heartbeat_interval = self.queue.lease_seconds / 3
+        while max_units is None or self.completed + self.failed < max_units:
+            unit = self.queue.claim(self.worker_id)
+            if unit is None:
+                counts = self.queue.counts()
+                if not counts["pending"] and not counts["leased"]:
+                    break
+                # Other workers hold the rest; wait in case one of their leases expires
+                time.sleep(self.poll_interval)
+                continue
+
+            start = time.perf_counter()
+            try:
+                with Heartbeat(self.queue, unit["id"], self.worker_id, heartbeat_interval) as heartbeat:
+                    result = self.run_unit(unit)
+            except Exception as e:
+                self.queue.fail(unit["id"], self.worker_id, f"{type(e).__name__}: {e}")
+                self.failed += 1
+                status = f"FAILED ({type(e).__name__}: {e})"
+            else:
+                if not result["query_result"]["success"]:
+                    # A failed query is retried (by any worker) until the queue's max_attempts
+                    error = result["query_result"].get("error", "query failed")
+                    self.queue.fail(unit["id"], self.worker_id, error)
+                    self.failed += 1
+                    print(f"[{self.worker_id}] {unit['id']} FAILED ({error}) in {time.perf_counter() - start:.1f}s",
+                          file=sys.__stdout__)
+                    continue
+                stored = self.queue.complete(unit["id"], self.worker_id, result)
+                self.completed += 1
+                status = "done" if stored else "done (duplicate, discarded)"
+                if heartbeat.lost:
+                    status += ", lease was lost"
+            print(f"[{self.worker_id}] {unit['id']} {status} in {time.perf_counter() - start:.1f}s", file=sys.__stdout__)
+        return self.completed
+
+
+def merge(queue, output_dir: str = "experiment_results") -> ExperimentRunner:
+    """
+    Build per-experiment results, the summary and the comparison table from finished units
+
+    Each unit's result goes to every experiment that references it; the
+    first reference owns it and the others are marked `shared_from`. Units
+    that failed on every attempt are reported as failed queries.
+    """
+    experiments = queue.get_meta("experiments", [])
+    plan = SweepPlan.from_dict(queue.get_meta("plan"))
+    finished = {entry["unit"]["id"]: entry for entry in queue.results()}
+
+    runner = ExperimentRunner(output_dir=output_dir)
+    runner.experiments = experiments
+    owners = {}
+    for exp in experiments:
+        query_results, run_logs, persona_name = [], [], exp["persona_key"]
+        for query_number, repetition, key in plan.assignments[exp["id"]]:
+            entry = finished.get(key)
+            if entry is not None and entry["status"] == "done":
+                result = entry["result"]
+                persona_name = result["persona_name"]
+                query_result = {**result["query_result"], "query_number": query_number}
+                if result["run_log"] is not None:
+                    run_logs.append(result["run_log"])
+            else:
+                query_result = {
+                    "query_number": query_number,
+                    "query": exp["test_queries"][query_number - 1],
+                    "response": None,
+                    "success": False,
+                    "error": entry["error"] if entry else "not run",
+                    "duration": 0.0
+                }
+            if key in owners:
+                query_result["shared_from"] = owners[key]
+            else:
+                owners[key] = {"experiment_id": exp["id"], "query_number": query_number}
+            query_result["repetition"] = repetition
+            query_results.append(query_result)
+        result = runner._experiment_result(exp, persona_name, query_results, run_logs)
+        runner.results.append(result)
+        runner._save_experiment(result)
+
+    runner._save_summary()
+    return runner
+
+
+def _open_queue(args):
+    return create_work_queue(args.queue, args.backend, lease_seconds=args.lease_seconds)
+
+
+def _llm_factory(latency: Optional[float]):
+    if latency is None:
+        return None
+    from fake_llm import SimulatedChatModel
+
+    return lambda name: SimulatedChatModel(name, latency=latency, latency_sigma=0.5)
+
+
+def _work(args) -> int:
+    queue = _open_queue(args)
+    runner = ExperimentRunner(output_dir=args.output_dir, llm_factory=_llm_factory(args.simulated_llm_latency))
+    worker = ExperimentWorker(queue, runner)
+    try:
+        # The agent prints every step; keep one line per unit unless asked for more
+        with open(os.devnull, "w") as devnull, redirect_stdout(sys.stdout if args.verbose else devnull):
+            return worker.run(max_units=args.max_units)
+    finally:
+        queue.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run experiments on several workers through a shared queue")
+    parser.add_argument("command", choices=["coordinate", "work", "merge", "status"])
+    parser.add_argument("--queue", required=True, help="SQLite file (*.db) or shared queue directory")
+    parser.add_argument("--backend", choices=["sqlite", "directory"], help="Queue backend (default: from the path)")
+    parser.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS)
+    parser.add_argument("--processes", type=int, default=1, help="work: worker processes on this host")
+    parser.add_argument("--max-units", type=int, help="work: stop after this many units per process")
+    parser.add_argument("--simulated-llm-latency", type=float,
+                        help="work: use a simulated LLM with this median latency (offline scaling tests)")
+    parser.add_argument("--output-dir", default="experiment_results")
+    parser.add_argument("--verbose", action="store_true", help="work: show agent output")
+    args = parser.parse_args()
+
+    if args.command == "coordinate":
+        runner = create_comprehensive_experiment_suite()
+        queue = _open_queue(args)
+        plan = coordinate(runner, queue)
+        print(f"\n{plan.report()}")
+        print(f"\nQueued {plan.unique_runs} work units in {args.queue}")
+        print(f"Queue status: {queue.counts()}")
+
+    elif args.command == "work":
+        start = time.perf_counter()
+        if args.processes == 1:
+            completed = _work(args)
+        else:
+            with multiprocessing.Pool(args.processes) as pool:
+                completed = sum(pool.map(_work, [args] * args.processes))
+        elapsed = time.perf_counter() - start
+        print(f"\n{completed} units in {elapsed:.1f}s ({completed / elapsed:.2f} units/s) on {args.processes} process(es)")
+
+    elif args.command == "merge":
+        queue = _open_queue(args)
+        counts = queue.counts()
+        if counts["pending"] or counts["leased"]:
+            print(f"Warning: merging an unfinished queue {counts}")
+        merge(queue, args.output_dir)
+
+    else:
+        print(_open_queue(args).counts())
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,18 @@ Tests various personas, prompts, and LLM configurations
 
 import json
 import os
+import time
 from datetime import datetime
-from typing import List, Dict, Any
-import pandas as pd
+from typing import Callable, List, Dict, Any, Optional
 
 from react_agent import ReActAgent
-from personas import get_persona, list_personas
+from latency_policy import LatencyPolicy
+from personas import list_personas
+from persona_registry import get_registry
+from sweep_planner import plan_sweep, expand_grid
+from memory_profiler import MemoryProfiler, format_summary
+from llm_cassette import Cassette, format_stats
+from cpu_profiler import CPUProfiler, format_profile
 
 
 class ExperimentRunner:
@@ -18,14 +24,36 @@ class ExperimentRunner:
     Manages and runs experiments with different agent configurations
     """
 
-    def __init__(self, output_dir: str = "experiment_results"):
+    def __init__(
+        self,
+        output_dir: str = "experiment_results",
+        price_table: Optional[Dict[str, Dict[str, float]]] = None,
+        latency_policy: Optional[LatencyPolicy] = None,
+        llm_factory: Optional[Callable[[str], Any]] = None,
+        memory_profiler: Optional[MemoryProfiler] = None,
+        cassette: Optional[Cassette] = None,
+        cpu_profiler: Optional[CPUProfiler] = None
+    ):
         """
         Initialize experiment runner
 
         Args:
             output_dir: Directory to save experiment results
+            price_table: Per-model prices for cost accounting (defaults to pricing.MODEL_PRICES)
+            latency_policy: Deadline / hedging / fallback policy shared by all agents
+            llm_factory: Builds the chat model for a model name (defaults to ChatOpenAI)
+            memory_profiler: Profiles every run and reports growth over the whole suite
+            cassette: Records the suite's LLM traffic (saved when the suite completes),
+                or replays a recording instead of calling the models
+            cpu_profiler: Samples the whole suite, runs and result processing included
         """
         self.output_dir = output_dir
+        self.price_table = price_table
+        self.latency_policy = latency_policy
+        self.llm_factory = llm_factory
+        self.memory_profiler = memory_profiler
+        self.cassette = cassette
+        self.cpu_profiler = cpu_profiler
         os.makedirs(output_dir, exist_ok=True)
         self.experiments = []
         self.results = []
@@ -38,7 +66,11 @@ class ExperimentRunner:
         max_tokens: int = 1000,
         top_p: float = 1.0,
         max_iterations: int = 5,
-        test_queries: List[str] = None
+        test_queries: List[str] = None,
+        think_model: Optional[str] = None,
+        respond_model: Optional[str] = None,
+        escalation_model: Optional[str] = None,
+        repetitions: int = 1
     ):
         """
         Add an experiment configuration
@@ -51,6 +83,10 @@ class ExperimentRunner:
             top_p: Top-p sampling parameter
             max_iterations: Max ReAct iterations
             test_queries: List of test queries to run
+            think_model: Model for THINK steps (defaults to model_name)
+            respond_model: Model for the final answer (defaults to model_name)
+            escalation_model: Stronger model used only when the cheap path falls short
+            repetitions: Runs of each test query
         """
         if test_queries is None:
             test_queries = self._get_default_test_queries()
@@ -63,12 +99,30 @@ class ExperimentRunner:
             "max_tokens": max_tokens,
             "top_p": top_p,
             "max_iterations": max_iterations,
-            "test_queries": test_queries
+            "think_model": think_model,
+            "respond_model": respond_model,
+            "escalation_model": escalation_model,
+            "test_queries": test_queries,
+            "repetitions": repetitions
         }
 
         self.experiments.append(experiment)
         print(f"Added experiment #{experiment['id']}: {persona_key} with {model_name} (temp={temperature})")
 
+    def add_grid(self, grid: Dict[str, Any], test_queries: List[str] = None):
+        """
+        Add one experiment per point of a parameter grid
+
+        Args:
+            grid: add_experiment arguments; list values are axes to sweep
+                  (see sweep_planner.expand_grid), "name" is only a label
+            test_queries: Test queries of grids that do not set their own
+        """
+        for params in expand_grid(grid):
+            params.pop("name", None)
+            params.setdefault("test_queries", test_queries)
+            self.add_experiment(**params)
+
     def _get_default_test_queries(self) -> List[str]:
         """Get default test queries covering various scenarios"""
         return [
@@ -83,14 +137,35 @@ class ExperimentRunner:
         """
         Run all configured experiments
 
+        Each unique (configuration, query, repetition) runs once; experiments
+        that share it get a copy of its result marked with `shared_from`.
+
         Args:
             verbose: Print detailed output during experiments
         """
+        if self.cpu_profiler is None:
+            return self._run_experiments(verbose)
+
+        with self.cpu_profiler.profile("experiment_suite") as cpu:
+            self._run_experiments(verbose)
+        if cpu is not None:
+            self._save_cpu_profile(cpu)
+
+    def _run_experiments(self, verbose: bool):
+        """Body of run_experiments()"""
+        plan = plan_sweep(self.experiments)
+
         print(f"\n{'='*80}")
         print(f"STARTING EXPERIMENT SUITE")
         print(f"Total experiments: {len(self.experiments)}")
+        print(plan.report())
         print(f"{'='*80}\n")
 
+        # unit key -> (experiment id, query result, run log) of the successful run that produced it;
+        # a failed unit is run again by the next experiment that shares it
+        completed = {}
+        llm_calls_saved = 0
+
         for exp in self.experiments:
             print(f"\n{'='*80}")
             print(f"EXPERIMENT #{exp['id']}")
@@ -98,97 +173,213 @@ class ExperimentRunner:
             print(f"Model: {exp['model_name']} (temp={exp['temperature']}, top_p={exp['top_p']})")
             print(f"{'='*80}\n")
 
-            # Get persona config
-            persona_config = get_persona(exp["persona_key"])
-
-            # Create agent
-            agent = ReActAgent(
-                persona_name=persona_config["name"],
-                system_prompt=persona_config["system_prompt"],
-                model_name=exp["model_name"],
-                temperature=exp["temperature"],
-                max_tokens=exp["max_tokens"],
-                top_p=exp["top_p"],
-                max_iterations=exp["max_iterations"]
-            )
+            # The agent is only built if this experiment has a run of its own
+            agent = None
+            persona_config = get_registry().get(exp["persona_key"])
 
             # Run test queries
             query_results = []
-            for i, query in enumerate(exp["test_queries"], 1):
-                print(f"\n--- Test Query {i}/{len(exp['test_queries'])} ---")
+            run_logs = []
+            assignments = plan.assignments[exp["id"]]
+            for n, (query_number, repetition, unit_key) in enumerate(assignments, 1):
+                query = exp["test_queries"][query_number - 1]
+                print(f"\n--- Test Query {n}/{len(assignments)} ---")
                 print(f"Query: {query}\n")
 
-                try:
-                    response = agent.run(query)
-
+                if unit_key in completed:
+                    source_id, source_result, run_log = completed[unit_key]
                     query_result = {
-                        "query_number": i,
-                        "query": query,
-                        "response": response,
-                        "success": True
+                        **source_result,
+                        "query_number": query_number,
+                        "shared_from": {"experiment_id": source_id, "query_number": source_result["query_number"]}
                     }
-
-                    if verbose:
-                        print(f"\nResponse: {response}\n")
-
-                except Exception as e:
-                    print(f"ERROR: {str(e)}")
-                    query_result = {
-                        "query_number": i,
-                        "query": query,
-                        "response": None,
-                        "success": False,
-                        "error": str(e)
-                    }
-
+                    llm_calls_saved += self._llm_calls(source_result)
+                    print(f"Identical to experiment #{source_id}, query {source_result['query_number']}: result reused")
+                else:
+                    if agent is None:
+                        agent, persona_config = self._create_agent(exp)
+                    query_result = self._run_query(agent, query, query_number, verbose)
+                    run_log = agent.get_logs()[-1] if query_result["success"] else None
+                    if query_result["success"]:
+                        completed[unit_key] = (exp["id"], query_result, run_log)
+                        if self.memory_profiler is not None and len(completed) == 1:
+                            # The first run loads lazily imported modules; growth is measured from here
+                            self.memory_profiler.reset_baseline()
+
+                query_result["repetition"] = repetition
                 query_results.append(query_result)
+                if run_log is not None:
+                    run_logs.append(run_log)
 
-            # Get agent logs and convert datetime objects to strings
-            agent_logs = agent.get_logs()
-            logs_serializable = []
-            for log in agent_logs:
-                log_copy = log.copy()
-                # Convert datetime objects to ISO format strings
-                if 'start_time' in log_copy and hasattr(log_copy['start_time'], 'isoformat'):
-                    log_copy['start_time'] = log_copy['start_time'].isoformat()
-                if 'end_time' in log_copy and hasattr(log_copy['end_time'], 'isoformat'):
-                    log_copy['end_time'] = log_copy['end_time'].isoformat()
-                logs_serializable.append(log_copy)
-
-            # Save experiment result
-            result = {
-                "experiment_id": exp["id"],
-                "persona_key": exp["persona_key"],
-                "persona_name": persona_config["name"],
-                "model_name": exp["model_name"],
-                "temperature": exp["temperature"],
-                "max_tokens": exp["max_tokens"],
-                "top_p": exp["top_p"],
-                "max_iterations": exp["max_iterations"],
-                "timestamp": datetime.now().isoformat(),
-                "query_results": query_results,
-                "agent_logs": logs_serializable
-            }
-
+            result = self._experiment_result(exp, persona_config["name"], query_results, run_logs)
             self.results.append(result)
-
-            # Save individual experiment result
-            result_file = os.path.join(
-                self.output_dir,
-                f"experiment_{exp['id']}_{exp['persona_key']}.json"
-            )
-            with open(result_file, 'w') as f:
-                json.dump(result, f, indent=2)
+            result_file = self._save_experiment(result)
 
             print(f"\n✓ Experiment #{exp['id']} completed. Results saved to {result_file}")
 
         print(f"\n{'='*80}")
         print(f"ALL EXPERIMENTS COMPLETED")
+        print(f"Deduplication saved {plan.saved_runs} runs ({llm_calls_saved} LLM calls)")
         print(f"{'='*80}\n")
 
+        if self.cassette is not None:
+            if self.cassette.mode == "record":
+                print(f"Cassette saved to {self.cassette.save()}")
+            print(format_stats(self.cassette.stats()))
+
+        # Measured before the comparison table imports pandas
+        if self.memory_profiler is not None:
+            self._save_memory_profile()
+
         # Save summary
         self._save_summary()
 
+    def _save_memory_profile(self):
+        """Save and print memory growth over the suite (after its first run), then stop tracing"""
+        summary = self.memory_profiler.summary()
+        self.memory_profiler.stop()
+        memory_file = os.path.join(self.output_dir, "memory_profile.json")
+        with open(memory_file, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        print(f"\n{format_summary(summary)}")
+        print(f"Memory profile saved to {memory_file}")
+
+    def _save_cpu_profile(self, profile: Dict[str, Any]):
+        """Save and print where the suite spent its time"""
+        cpu_file = os.path.join(self.output_dir, "cpu_profile.json")
+        with open(cpu_file, 'w') as f:
+            json.dump(profile, f, indent=2)
+
+        print(f"\n{format_profile(profile)}")
+        print(f"CPU profile saved to {cpu_file}")
+
+    @staticmethod
+    def _llm_calls(query_result: Dict[str, Any]) -> int:
+        """LLM calls a run made (THINK and RESPOND nodes)"""
+        return sum(1 for m in query_result.get("node_metrics") or [] if m["node"] in ("think", "respond"))
+
+    def _create_agent(self, exp: Dict[str, Any]) -> tuple:
+        """(agent, persona config) for an experiment configuration"""
+        persona_config = get_registry().get(exp["persona_key"])
+        agent = ReActAgent(
+            persona_name=persona_config["name"],
+            system_prompt=persona_config["system_prompt"],
+            prompt_hash=persona_config["content_hash"],
+            prompt_tokens=persona_config["prompt_tokens"],
+            observation_focus=persona_config["observation_focus"],
+            model_name=exp["model_name"],
+            temperature=exp["temperature"],
+            max_tokens=exp["max_tokens"],
+            top_p=exp["top_p"],
+            max_iterations=exp["max_iterations"],
+            price_table=self.price_table,
+            latency_policy=self.latency_policy,
+            think_model=exp["think_model"],
+            respond_model=exp["respond_model"],
+            escalation_model=exp["escalation_model"],
+            llm_factory=self.llm_factory,
+            memory_profiler=self.memory_profiler,
+            cassette=self.cassette
+        )
+        return agent, persona_config
+
+    def _run_query(self, agent: ReActAgent, query: str, query_number: int, verbose: bool = True) -> Dict[str, Any]:
+        """Run one test query and summarize its run log"""
+        start = time.perf_counter()
+        try:
+            response = agent.run(query)
+            run_log = agent.get_logs()[-1]
+
+            query_result = {
+                "query_number": query_number,
+                "query": query,
+                "response": response,
+                "success": True,
+                "duration": run_log["duration"],
+                "iterations": run_log["iterations"],
+                "tool_calls": run_log["tool_calls"],
+                "iterations_saved": run_log["loop_detection"]["iterations_saved"],
+                "tier": run_log["tier"],
+                "prompt_tokens": run_log["token_usage"]["prompt_tokens"],
+                "completion_tokens": run_log["token_usage"]["completion_tokens"],
+                "cached_tokens": run_log["token_usage"]["cached_tokens"],
+                "total_tokens": run_log["token_usage"]["total_tokens"],
+                "cost": run_log["cost"],
+                "observation_tokens": run_log["observation_tokens"],
+                "prefetched": run_log["prefetch"]["predicted"],
+                "prefetch_hits": run_log["prefetch"]["hits"],
+                "node_metrics": run_log["node_metrics"]
+            }
+            if "memory" in run_log:
+                query_result["memory_growth"] = run_log["memory"]["net_growth"]
+                query_result["peak_memory"] = run_log["memory"]["peak"]
+
+            if verbose:
+                print(f"\nResponse: {response}\n")
+
+        except Exception as e:
+            print(f"ERROR: {str(e)}")
+            query_result = {
+                "query_number": query_number,
+                "query": query,
+                "response": None,
+                "success": False,
+                "error": str(e),
+                "duration": time.perf_counter() - start
+            }
+
+        return query_result
+
+    @staticmethod
+    def _serialize_logs(agent_logs: List[Dict]) -> List[Dict]:
+        """Agent logs with datetime objects converted to strings"""
+        logs_serializable = []
+        for log in agent_logs:
+            log_copy = log.copy()
+            # Convert datetime objects to ISO format strings
+            if 'start_time' in log_copy and hasattr(log_copy['start_time'], 'isoformat'):
+                log_copy['start_time'] = log_copy['start_time'].isoformat()
+            if 'end_time' in log_copy and hasattr(log_copy['end_time'], 'isoformat'):
+                log_copy['end_time'] = log_copy['end_time'].isoformat()
+            logs_serializable.append(log_copy)
+        return logs_serializable
+
+    def _experiment_result(
+        self,
+        exp: Dict[str, Any],
+        persona_name: str,
+        query_results: List[Dict[str, Any]],
+        agent_logs: List[Dict]
+    ) -> Dict[str, Any]:
+        """Result record of one experiment"""
+        return {
+            "experiment_id": exp["id"],
+            "persona_key": exp["persona_key"],
+            "persona_name": persona_name,
+            "model_name": exp["model_name"],
+            "temperature": exp["temperature"],
+            "max_tokens": exp["max_tokens"],
+            "top_p": exp["top_p"],
+            "max_iterations": exp["max_iterations"],
+            "think_model": exp["think_model"],
+            "respond_model": exp["respond_model"],
+            "escalation_model": exp["escalation_model"],
+            "timestamp": datetime.now().isoformat(),
+            "query_results": query_results,
+            "agent_logs": self._serialize_logs(agent_logs)
+        }
+
+    def _save_experiment(self, result: Dict[str, Any]) -> str:
+        """Save one experiment's result; returns the file path"""
+        result_file = os.path.join(
+            self.output_dir,
+            f"experiment_{result['experiment_id']}_{result['persona_key']}.json"
+        )
+        with open(result_file, 'w') as f:
+            json.dump(result, f, indent=2)
+        return result_file
+
     def _save_summary(self):
         """Save experiment summary"""
         summary_file = os.path.join(self.output_dir, "experiment_summary.json")
@@ -201,30 +392,37 @@ class ExperimentRunner:
         self._create_comparison_table()
 
     def _create_comparison_table(self):
-        """Create a comparison table of results"""
-        comparison_data = []
-
-        for result in self.results:
-            row = {
-                "Experiment ID": result["experiment_id"],
-                "Persona": result["persona_key"],
-                "Model": result["model_name"],
-                "Temperature": result["temperature"],
-                "Top-P": result["top_p"],
-                "Total Queries": len(result["query_results"]),
-                "Successful": sum(1 for qr in result["query_results"] if qr["success"]),
-                "Avg Iterations": sum(log["iterations"] for log in result["agent_logs"]) / len(result["agent_logs"]) if result["agent_logs"] else 0,
-                "Avg Duration (s)": sum(log["duration"] for log in result["agent_logs"]) / len(result["agent_logs"]) if result["agent_logs"] else 0
-            }
-            comparison_data.append(row)
+        """
+        Create a comparison table of results
+
+        Builds a flat per-run DataFrame and reports, per configuration,
+        latency percentiles, per-node latency and tokens, tool calls, cost,
+        success rate and bootstrap confidence intervals as CSV and Markdown.
+        """
+        # pandas is only needed once all experiments have run
+        from analytics import (
+            runs_to_dataframe, node_metrics_to_dataframe, summarize_runs,
+            format_comparison_table, to_markdown
+        )
 
-        df = pd.DataFrame(comparison_data)
+        runs = runs_to_dataframe(self.results)
+        node_metrics = node_metrics_to_dataframe(self.results)
+
+        runs_file = os.path.join(self.output_dir, "runs.csv")
+        runs.to_csv(runs_file, index=False)
+
+        df = format_comparison_table(summarize_runs(runs, node_metrics))
 
         # Save to CSV
         csv_file = os.path.join(self.output_dir, "comparison_table.csv")
         df.to_csv(csv_file, index=False)
 
-        print(f"Comparison table saved to {csv_file}")
+        # Save to Markdown
+        md_file = os.path.join(self.output_dir, "comparison_table.md")
+        with open(md_file, 'w') as f:
+            f.write(to_markdown(df))
+
+        print(f"Comparison table saved to {csv_file} and {md_file}")
         print("\nComparison Summary:")
         print(df.to_string(index=False))
 
@@ -233,7 +431,51 @@ class ExperimentRunner:
         return self.results
 
 
-def create_comprehensive_experiment_suite():
+# Experiment sets of the comprehensive suite; list values are swept (see sweep_planner.expand_grid).
+# Sets overlap (friendly_zero_shot / gpt-4o-mini / 0.7 / 1.0 is in three of them);
+# the sweep planner runs shared configurations once.
+COMPREHENSIVE_SUITE_GRIDS = [
+    # Same config, different personas
+    {
+        "name": "Persona Comparison",
+        "persona_key": ["friendly_zero_shot", "expert_zero_shot", "cautious_zero_shot"],
+        "model_name": "gpt-4o-mini",
+        "temperature": 0.7
+    },
+    # Zero-shot vs Few-shot vs CoT, with the Friendly persona
+    {
+        "name": "Prompt Engineering",
+        "persona_key": ["friendly_zero_shot", "friendly_few_shot", "friendly_cot"],
+        "model_name": "gpt-4o-mini",
+        "temperature": 0.7
+    },
+    {
+        "name": "Temperature Variations",
+        "persona_key": "friendly_zero_shot",
+        "model_name": "gpt-4o-mini",
+        "temperature": [0.3, 0.7, 1.0]
+    },
+    {
+        "name": "Model Comparison",
+        "persona_key": "friendly_cot",
+        "model_name": ["gpt-4o-mini", "gpt-4o"],
+        "temperature": 0.7
+    },
+    {
+        "name": "Top-P Variations",
+        "persona_key": "expert_zero_shot",
+        "model_name": "gpt-4o-mini",
+        "temperature": 0.7,
+        "top_p": [0.5, 0.9, 1.0]
+    }
+]
+
+
+def create_comprehensive_experiment_suite(
+    memory_profiler: Optional[MemoryProfiler] = None,
+    cassette: Optional[Cassette] = None,
+    cpu_profiler: Optional[CPUProfiler] = None
+):
     """
     Create a comprehensive suite of experiments testing:
     - Different personas (Friendly, Expert, Cautious)
@@ -241,7 +483,7 @@ def create_comprehensive_experiment_suite():
     - Different temperatures (0.3, 0.7, 1.0)
     - Different models (gpt-4o-mini, gpt-4o)
     """
-    runner = ExperimentRunner()
+    runner = ExperimentRunner(memory_profiler=memory_profiler, cassette=cassette, cpu_profiler=cpu_profiler)
 
     # Test queries covering different scenarios
     test_queries = [
@@ -252,85 +494,42 @@ def create_comprehensive_experiment_suite():
         "I'd like to book a deep cleaning. My name is John Smith, email john@example.com"
     ]
 
-    # ========================================================================
-    # Experiment Set 1: Persona Comparison (same config, different personas)
-    # ========================================================================
-    print("\n=== EXPERIMENT SET 1: Persona Comparison ===")
-
-    personas_to_test = [
-        "friendly_zero_shot",
-        "expert_zero_shot",
-        "cautious_zero_shot"
-    ]
-
-    for persona in personas_to_test:
-        runner.add_experiment(
-            persona_key=persona,
-            model_name="gpt-4o-mini",
-            temperature=0.7,
-            test_queries=test_queries
-        )
-
-    # ========================================================================
-    # Experiment Set 2: Prompt Engineering (Zero-shot vs Few-shot vs CoT)
-    # ========================================================================
-    print("\n=== EXPERIMENT SET 2: Prompt Engineering ===")
-
-    # Test with Friendly persona
-    for prompt_type in ["zero_shot", "few_shot", "cot"]:
-        runner.add_experiment(
-            persona_key=f"friendly_{prompt_type}",
-            model_name="gpt-4o-mini",
-            temperature=0.7,
-            test_queries=test_queries
-        )
-
-    # ========================================================================
-    # Experiment Set 3: Temperature Variations
-    # ========================================================================
-    print("\n=== EXPERIMENT SET 3: Temperature Variations ===")
-
-    for temp in [0.3, 0.7, 1.0]:
-        runner.add_experiment(
-            persona_key="friendly_zero_shot",
-            model_name="gpt-4o-mini",
-            temperature=temp,
-            test_queries=test_queries
-        )
-
-    # ========================================================================
-    # Experiment Set 4: Model Comparison
-    # ========================================================================
-    print("\n=== EXPERIMENT SET 4: Model Comparison ===")
-
-    for model in ["gpt-4o-mini", "gpt-4o"]:
-        runner.add_experiment(
-            persona_key="friendly_cot",
-            model_name=model,
-            temperature=0.7,
-            test_queries=test_queries
-        )
-
-    # ========================================================================
-    # Experiment Set 5: Top-P Variations
-    # ========================================================================
-    print("\n=== EXPERIMENT SET 5: Top-P Variations ===")
-
-    for top_p in [0.5, 0.9, 1.0]:
-        runner.add_experiment(
-            persona_key="expert_zero_shot",
-            model_name="gpt-4o-mini",
-            temperature=0.7,
-            top_p=top_p,
-            test_queries=test_queries
-        )
+    for grid in COMPREHENSIVE_SUITE_GRIDS:
+        print(f"\n=== EXPERIMENT SET: {grid['name']} ===")
+        runner.add_grid(grid, test_queries=test_queries)
 
     return runner
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the comprehensive experiment suite")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Trace memory per run (tracemalloc) and report growth and top allocation sites")
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument("--record", metavar="CASSETTE",
+                                help="Record the suite's LLM traffic to a cassette file")
+    cassette_group.add_argument("--replay", metavar="CASSETTE",
+                                help="Replay a recorded cassette instead of calling the models (offline)")
+    parser.add_argument("--replay-latency", action="store_true",
+                        help="With --replay, wait each call's recorded latency instead of answering at once")
+    parser.add_argument("--profile-cpu", action="store_true",
+                        help="Sample the suite's stacks; writes collapsed stacks and the top functions")
+    args = parser.parse_args()
+
+    cassette = None
+    if args.record:
+        cassette = Cassette(args.record, mode="record")
+    elif args.replay:
+        cassette = Cassette(args.replay, mode="replay", replay_latency=args.replay_latency)
+
     # Create and run comprehensive experiment suite
-    runner = create_comprehensive_experiment_suite()
+    runner = create_comprehensive_experiment_suite(
+        MemoryProfiler() if args.profile_memory else None,
+        cassette,
+        CPUProfiler(output_dir="experiment_results") if args.profile_cpu else None
+    )
 
     print(f"\nTotal experiments configured: {len(runner.experiments)}")
     print("\nStarting experiments...\n")
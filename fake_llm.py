@@ -0,0 +1,118 @@
+"""
+Simulated chat model for benchmarks and offline runs
+Scripted responses with OpenAI-style usage metadata and optional latency; no API calls
+"""
+
+import asyncio
+import itertools
+import random
+import threading
+import time
+from typing import Callable, List, Optional, Union
+
+from langchain_core.messages import AIMessage
+
+from pricing import estimate_message_tokens, estimate_tokens
+
+
+# Thoughts that each lead to a different tool call
+DEFAULT_RESPONSES = [
+    "I should search services for deep clean options.",
+    "I need to check availability in the riverside area.",
+    "Let me get product info about floor cleaners.",
+    "I should search services for allergen friendly cleaning.",
+    "Based on what I found, the answer is that we can help with eco-friendly cleaning."
+]
+
+
+class SimulatedLLMError(Exception):
+    """Injected transient failure (HTTP 503), retried by the scheduler like a real one"""
+    status_code = 503
+
+
+class SimulatedChatModel:
+    """
+    Drop-in stand-in for ChatOpenAI in ReActAgent (see its llm_factory argument)
+
+    Responses are taken in turn from a list (cycling) or produced by a callable
+    of the prompt messages. Token usage is estimated from the text, so cost and
+    token analytics work as with a real model. Latency is log-normal around
+    `latency` (median) with spread `latency_sigma`; a fraction `error_rate` of
+    calls fails with SimulatedLLMError after the latency.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "simulated",
+        responses: Union[List[str], Callable[[list], str], None] = None,
+        latency: float = 0.0,
+        latency_sigma: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize the model
+
+        Args:
+            model_name: Name reported in response metadata
+            responses: Response texts to cycle through, or a function of the messages
+            latency: Median seconds a call takes
+            latency_sigma: Log-normal spread of the latency (0 = constant)
+            error_rate: Fraction of calls that fail with SimulatedLLMError
+            seed: Seed of the latency / error draws
+        """
+        self.model_name = model_name
+        self.responses = responses or DEFAULT_RESPONSES
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._cycle = None if callable(self.responses) else itertools.cycle(self.responses)
+
+    def _draw(self) -> tuple:
+        """(latency, fails) of the next call"""
+        with self._lock:
+            latency = self.latency
+            if latency and self.latency_sigma:
+                latency *= self._random.lognormvariate(0.0, self.latency_sigma)
+            fails = self._random.random() < self.error_rate
+            if fails:
+                self.errors += 1
+        return latency, fails
+
+    def _respond(self, messages: list) -> AIMessage:
+        with self._lock:
+            self.calls += 1
+            text = self.responses(messages) if self._cycle is None else next(self._cycle)
+
+        prompt_tokens = estimate_message_tokens(messages)
+        completion_tokens = estimate_tokens(text)
+        return AIMessage(
+            content=text,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            },
+            response_metadata={"model_name": self.model_name}
+        )
+
+    def invoke(self, messages: list, config: Optional[dict] = None, **kwargs) -> AIMessage:
+        latency, fails = self._draw()
+        if latency:
+            time.sleep(latency)
+        if fails:
+            raise SimulatedLLMError(f"{self.model_name}: simulated service unavailable")
+        return self._respond(messages)
+
+    async def ainvoke(self, messages: list, config: Optional[dict] = None, **kwargs) -> AIMessage:
+        latency, fails = self._draw()
+        if latency:
+            await asyncio.sleep(latency)
+        if fails:
+            raise SimulatedLLMError(f"{self.model_name}: simulated service unavailable")
+        return self._respond(messages)
@@ -0,0 +1,95 @@
+"""
+Multi-persona fan-out
+Runs one user message against several persona / configuration combinations
+concurrently, so comparing them takes about as long as the slowest one;
+identical read-only tool calls are made once for the whole fan-out
+"""
+
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from react_agent import ReActAgent
+from shared_tools import tool_scope
+
+
+# Configurations a single fan-out may run
+MAX_FANOUT = 9
+
+
+async def _run_one(
+    label: str,
+    agent: ReActAgent,
+    user_message: str,
+    tenant_id: Optional[str],
+    scope_id: str
+) -> Dict[str, Any]:
+    """Answer, latency and token usage of one configuration (or its error)"""
+    result = {
+        "label": label,
+        "persona": agent.persona_name,
+        "model": agent.config["model_name"],
+        "temperature": agent.config["temperature"],
+        "top_p": agent.config["top_p"]
+    }
+    start = time.perf_counter()
+    try:
+        final = None
+        async for event in agent.astream(user_message, tenant_id=tenant_id, tool_scope=scope_id):
+            if event["event"] == "final":
+                final = event
+    except Exception as e:
+        result.update({"answer": None, "error": f"{type(e).__name__}: {e}", "latency": time.perf_counter() - start})
+        return result
+
+    result.update({
+        "answer": final["answer"],
+        "error": None,
+        "latency": final["duration"],
+        "tier": final["tier"],
+        "cache_hit": final["cache_hit"],
+        "iterations": final["iterations"],
+        "tool_calls": final["tool_calls"],
+        "prompt_tokens": final["prompt_tokens"],
+        "completion_tokens": final["completion_tokens"],
+        "total_tokens": final["total_tokens"],
+        "cost": final["cost"]
+    })
+    return result
+
+
+async def fan_out(
+    agents: List[Tuple[str, ReActAgent]],
+    user_message: str,
+    tenant_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Run one message against several agents at once
+
+    Args:
+        agents: (label, agent) pairs, e.g. one per persona / model / temperature
+        user_message: The user's message, sent to every agent
+        tenant_id: Business location whose data the tools use
+
+    Returns:
+        Dict with "results" (one per agent, in order: answer or error, latency,
+        iterations, tool calls, tokens and cost), "wall_time", "total_latency"
+        (the sum of the runs' latencies, i.e. the time they would take one after
+        another) and "tool_calls" (executed and shared read-only tool calls)
+    """
+    if len(agents) > MAX_FANOUT:
+        raise ValueError(f"At most {MAX_FANOUT} configurations per fan-out, got {len(agents)}")
+
+    start = time.perf_counter()
+    with tool_scope() as (scope_id, shared):
+        results = await asyncio.gather(*(
+            _run_one(label, agent, user_message, tenant_id, scope_id) for label, agent in agents
+        ))
+        tool_calls = shared.stats()
+    return {
+        "message": user_message,
+        "results": list(results),
+        "wall_time": time.perf_counter() - start,
+        "total_latency": sum(result["latency"] for result in results),
+        "tool_calls": tool_calls
+    }
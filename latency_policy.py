@@ -0,0 +1,362 @@
+"""
+Latency policy for LLM calls
+Per-call deadlines, hedged requests and a fallback model to protect tail latency
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Awaitable, Callable, Dict, Any, Optional, List
+
+from cpu_profiler import follow
+from llm_scheduler import CallCancelled
+
+
+# Default per-call deadline in seconds
+DEFAULT_TIMEOUT = 60.0
+
+# Threads of the shared pool running attempts of hedged / fallback calls; calls without
+# either run on the caller's thread, so the pool does not cap how many are in flight
+DEFAULT_MAX_WORKERS = int(os.getenv("AGENT_LLM_CALL_WORKERS", "64"))
+
+_executor = ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS, thread_name_prefix="llm-call")
+_executor_lock = threading.Lock()
+
+
+def set_max_workers(max_workers: int):
+    """Resize the shared attempt pool (calls already running finish on the old one)"""
+    global _executor
+    with _executor_lock:
+        old, _executor = _executor, ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-call")
+    old.shutdown(wait=False)
+
+
+class _CallDeadline(threading.Event):
+    """Cancel event of a call that also counts as set once the call's deadline passes"""
+
+    def __init__(self, deadline: float):
+        super().__init__()
+        self.deadline = deadline
+
+    def is_set(self) -> bool:
+        return super().is_set() or time.monotonic() >= self.deadline
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        remaining = self.deadline - time.monotonic()
+        if timeout is None or timeout >= remaining:
+            # Waking at the deadline means the call is cancelled
+            return super().wait(max(0.0, remaining)) or True
+        return super().wait(timeout)
+
+
+def _abandon(futures, on_abandoned: Optional[Callable[[Any], None]]):
+    """Cancel attempts that have not started; report the result of those already sent once they complete"""
+    def deliver(future):
+        if not future.cancelled() and future.exception() is None:
+            on_abandoned(future.result())
+
+    for future in futures:
+        if not future.cancel() and on_abandoned is not None:
+            future.add_done_callback(deliver)
+
+
+class LatencyPolicy:
+    """
+    Deadline, hedging and fallback settings for LLM calls
+
+    A call is started on the primary model. If it has not finished after the
+    hedge delay, a duplicate request is fired and the first response wins.
+    If the deadline is at risk (past `fallback_after` of the timeout) the
+    fallback model is raced as well. Calls still pending at the deadline
+    raise TimeoutError. Requests of losing or abandoned attempts still cost
+    tokens; their results go to `on_abandoned` once they complete.
+
+    Attempts are given a cancel event, set as soon as the call returns or
+    raises and counting as set once the deadline passes; a running thread
+    cannot be stopped, so attempts must check it before sending a request or
+    retrying (see LLMScheduler.call). A call with neither hedging nor a
+    fallback runs on the caller's thread: it stops retrying at the deadline
+    and raises TimeoutError if its request finishes after it, like aexecute.
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        hedge_delay: Optional[float] = None,
+        hedge_percentile: Optional[float] = None,
+        fallback_model: Optional[str] = None,
+        fallback_after: float = 0.5,
+        history_size: int = 200,
+        min_history: int = 20
+    ):
+        """
+        Initialize the policy
+
+        Args:
+            timeout: Deadline in seconds for one LLM call, including hedges and fallback
+            hedge_delay: Fixed delay before firing a hedge (None disables fixed hedging)
+            hedge_percentile: Hedge after this percentile (e.g. 95) of recently observed
+                latencies instead of a fixed delay; falls back to hedge_delay until
+                enough latencies are observed
+            fallback_model: Model raced against the primary when the deadline is at risk
+            fallback_after: Fraction of the timeout after which the fallback is fired
+            history_size: Latencies kept per model for the percentile
+            min_history: Observations needed before the percentile is used
+        """
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.hedge_percentile = hedge_percentile
+        self.fallback_model = fallback_model
+        self.fallback_after = fallback_after
+        self.history_size = history_size
+        self.min_history = min_history
+
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def observe_latency(self, model_name: str, seconds: float):
+        """Record the latency of a completed call"""
+        with self._lock:
+            history = self._latencies.setdefault(model_name, deque(maxlen=self.history_size))
+            history.append(seconds)
+
+    def get_hedge_delay(self, model_name: str) -> Optional[float]:
+        """Delay before hedging a call to `model_name`, or None if hedging is off"""
+        if self.hedge_percentile is not None:
+            with self._lock:
+                history = sorted(self._latencies.get(model_name, ()))
+            if len(history) >= self.min_history:
+                index = min(len(history) - 1, int(len(history) * self.hedge_percentile / 100))
+                return history[index]
+        return self.hedge_delay
+
+    def execute(
+        self,
+        model_name: str,
+        primary: Callable[[threading.Event], Any],
+        fallback: Optional[Callable[[threading.Event], Any]] = None,
+        on_abandoned: Optional[Callable[[Any], None]] = None
+    ) -> tuple:
+        """
+        Run a call under the policy
+
+        Args:
+            model_name: Primary model, used for the latency history
+            primary: Callable of the cancel event issuing the request to the primary model
+            fallback: Callable of the cancel event issuing the request to the fallback model
+            on_abandoned: Called (possibly later, from a pool thread) with the result of every
+                successful attempt that did not win, for usage accounting
+
+        Returns:
+            (result, stats) where stats records hedging, fallback and which attempt won
+        """
+        cancel = _CallDeadline(time.monotonic() + self.timeout)
+        try:
+            return self._execute(model_name, primary, fallback, cancel, on_abandoned)
+        finally:
+            # Losing, abandoned and timed-out attempts stop before their next request
+            cancel.set()
+
+    def _execute(
+        self,
+        model_name: str,
+        primary: Callable[[threading.Event], Any],
+        fallback: Optional[Callable[[threading.Event], Any]],
+        cancel: _CallDeadline,
+        on_abandoned: Optional[Callable[[Any], None]]
+    ) -> tuple:
+        """Body of execute()"""
+        start = time.monotonic()
+        deadline = cancel.deadline
+        hedge_delay = self.get_hedge_delay(model_name)
+        hedge_at = start + hedge_delay if hedge_delay is not None else None
+        fallback_at = start + self.timeout * self.fallback_after if fallback else None
+
+        stats = {"hedged": False, "hedge_won": False, "fallback_used": False, "timed_out": False}
+        if hedge_at is None and fallback is None:
+            # Nothing to race: call on this thread; the scheduler stops retrying at the deadline
+            try:
+                result = primary(cancel)
+            except CallCancelled as e:
+                stats["timed_out"] = True
+                raise TimeoutError(f"LLM call to {model_name} exceeded {self.timeout:.1f}s deadline") from e
+            latency = time.monotonic() - start
+            self.observe_latency(model_name, latency)
+            if time.monotonic() >= deadline:
+                # The request itself overran (bounded by the client's timeout): fail as aexecute does
+                if on_abandoned is not None:
+                    on_abandoned(result)
+                stats["timed_out"] = True
+                raise TimeoutError(f"LLM call to {model_name} exceeded {self.timeout:.1f}s deadline")
+            stats.update({"winner": "primary", "latency": latency})
+            return result, stats
+
+        executor = _executor
+        # Attempts run on pool threads, sampled as part of the caller's CPU profile
+        primary = follow(primary)
+        fallback = follow(fallback) if fallback else None
+        pending = {executor.submit(primary, cancel): "primary"}
+        last_error = None
+
+        while True:
+            now = time.monotonic()
+            events = [deadline]
+            if hedge_at is not None and not stats["hedged"]:
+                events.append(hedge_at)
+            if fallback_at is not None and not stats["fallback_used"]:
+                events.append(fallback_at)
+
+            done, _ = wait(list(pending), timeout=max(0.0, min(events) - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                attempt = pending.pop(future)
+                if future.exception() is not None:
+                    last_error = future.exception()
+                    continue
+
+                # First successful response wins; abandon the others
+                _abandon(pending, on_abandoned)
+                stats["winner"] = attempt
+                stats["hedge_won"] = attempt == "hedge"
+                stats["latency"] = time.monotonic() - start
+                if attempt != "fallback":
+                    self.observe_latency(model_name, stats["latency"])
+                return future.result(), stats
+
+            now = time.monotonic()
+            if not pending:
+                # Every launched attempt failed: try the fallback once, otherwise give up
+                if fallback and not stats["fallback_used"] and now < deadline:
+                    stats["fallback_used"] = True
+                    pending[executor.submit(fallback, cancel)] = "fallback"
+                    continue
+                if isinstance(last_error, CallCancelled):
+                    stats["timed_out"] = True
+                    raise TimeoutError(f"LLM call to {model_name} exceeded {self.timeout:.1f}s deadline") from last_error
+                raise last_error
+
+            if now >= deadline:
+                _abandon(pending, on_abandoned)
+                stats["timed_out"] = True
+                raise TimeoutError(f"LLM call to {model_name} exceeded {self.timeout:.1f}s deadline")
+
+            if hedge_at is not None and not stats["hedged"] and now >= hedge_at:
+                stats["hedged"] = True
+                pending[executor.submit(primary, cancel)] = "hedge"
+
+            if fallback_at is not None and not stats["fallback_used"] and now >= fallback_at:
+                stats["fallback_used"] = True
+                pending[executor.submit(fallback, cancel)] = "fallback"
+
+    async def aexecute(
+        self,
+        model_name: str,
+        primary: Callable[[threading.Event], Awaitable[Any]],
+        fallback: Optional[Callable[[threading.Event], Awaitable[Any]]] = None,
+        on_abandoned: Optional[Callable[[Any], None]] = None
+    ) -> tuple:
+        """
+        Async execute: attempts are tasks on the running event loop instead of pool threads
+
+        Args:
+            model_name: Primary model, used for the latency history
+            primary: Callable of the cancel event returning the request to the primary model
+            fallback: Callable of the cancel event returning the request to the fallback model
+            on_abandoned: Called with the result of every other attempt that completed
+                (attempts still running are cancelled)
+
+        Returns:
+            (result, stats) where stats records hedging, fallback and which attempt won
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        hedge_delay = self.get_hedge_delay(model_name)
+        hedge_at = start + hedge_delay if hedge_delay is not None else None
+        fallback_at = start + self.timeout * self.fallback_after if fallback else None
+
+        stats = {"hedged": False, "hedge_won": False, "fallback_used": False, "timed_out": False}
+        cancel = threading.Event()
+        pending = {asyncio.ensure_future(primary(cancel)): "primary"}
+        last_error = None
+
+        try:
+            while True:
+                now = time.monotonic()
+                events = [deadline]
+                if hedge_at is not None and not stats["hedged"]:
+                    events.append(hedge_at)
+                if fallback_at is not None and not stats["fallback_used"]:
+                    events.append(fallback_at)
+
+                done, _ = await asyncio.wait(
+                    list(pending), timeout=max(0.0, min(events) - now), return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    attempt = pending.pop(task)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+
+                    stats["winner"] = attempt
+                    stats["hedge_won"] = attempt == "hedge"
+                    stats["latency"] = time.monotonic() - start
+                    if attempt != "fallback":
+                        self.observe_latency(model_name, stats["latency"])
+                    return task.result(), stats
+
+                now = time.monotonic()
+                if not pending:
+                    if fallback and not stats["fallback_used"] and now < deadline:
+                        stats["fallback_used"] = True
+                        pending[asyncio.ensure_future(fallback(cancel))] = "fallback"
+                        continue
+                    raise last_error
+
+                if now >= deadline:
+                    stats["timed_out"] = True
+                    raise TimeoutError(f"LLM call to {model_name} exceeded {self.timeout:.1f}s deadline")
+
+                if hedge_at is not None and not stats["hedged"] and now >= hedge_at:
+                    stats["hedged"] = True
+                    pending[asyncio.ensure_future(primary(cancel))] = "hedge"
+
+                if fallback_at is not None and not stats["fallback_used"] and now >= fallback_at:
+                    stats["fallback_used"] = True
+                    pending[asyncio.ensure_future(fallback(cancel))] = "fallback"
+        finally:
+            # Losing and timed-out attempts are cancelled, unlike threads they really stop
+            cancel.set()
+            for task in pending:
+                if task.done() and not task.cancelled() and task.exception() is None:
+                    if on_abandoned is not None:
+                        on_abandoned(task.result())
+                else:
+                    task.cancel()
+
+
+def summarize_latency_policy(node_metrics: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Hedge rate, hedge win rate and fallback count across one run's LLM calls
+
+    Args:
+        node_metrics: Per-node metric entries from a run
+
+    Returns:
+        Dict of latency policy counters and rates
+    """
+    calls = [m for m in node_metrics if "hedged" in m]
+    hedged = sum(1 for m in calls if m["hedged"])
+    hedge_wins = sum(1 for m in calls if m["hedge_won"])
+    return {
+        "llm_calls": len(calls),
+        "hedged": hedged,
+        "hedge_wins": hedge_wins,
+        "hedge_rate": hedged / len(calls) if calls else 0.0,
+        "hedge_win_rate": hedge_wins / hedged if hedged else 0.0,
+        "fallbacks": sum(1 for m in calls if m["fallback_used"]),
+        "fallback_wins": sum(1 for m in calls if m.get("winner") == "fallback")
+    }
@@ -0,0 +1,221 @@
+"""
+Record / replay cassettes of LLM traffic
+A recording cassette captures every LLM request and response (usage metadata
+and observed latency included) of real runs; a replaying one serves them back
+by request hash, instantly or at the recorded latency, so sweeps re-run
+offline and reproducibly to measure the agent's own overhead
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional
+
+from langchain_core.messages import AIMessage
+
+from llm_scheduler import LLMScheduler
+
+
+CASSETTE_VERSION = 1
+
+MODES = ("record", "replay")
+
+# Replayed calls use no API quota; the scheduler still runs, so its overhead is measured
+REPLAY_RATE_LIMITS = {"default": {"rpm": 1e9, "tpm": 1e12}}
+
+
+class CassetteMissError(KeyError):
+    """A replayed request that the cassette never recorded"""
+
+
+def request_key(model_name: str, sampling: Dict[str, Any], messages: List) -> str:
+    """Hash of everything that determines a response: model, sampling parameters and prompt"""
+    payload = json.dumps(
+        {
+            "model": model_name,
+            "sampling": sampling,
+            "messages": [[message.type, message.content] for message in messages]
+        },
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class Cassette:
+    """
+    LLM interactions of one or more runs, stored as gzipped JSON
+
+    Interactions are grouped by request key; a request made several times
+    (repetitions at temperature > 0) keeps each response, and replay serves
+    them in recorded order, starting over once they run out.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", replay_latency: bool = False):
+        """
+        Initialize the cassette
+
+        Args:
+            path: Cassette file (e.g. experiment_results/suite.cassette.json.gz)
+            mode: "record" to capture real calls, "replay" to serve them back
+            replay_latency: Sleep for each call's recorded latency when replaying
+                (off, replayed calls return at once)
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode} (expected one of {', '.join(MODES)})")
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self.recorded = 0
+        self.replayed = 0
+        self.repeated = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._interactions: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._scheduler: Optional[LLMScheduler] = None
+        if mode == "replay":
+            self.load()
+
+    def load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version in {self.path}: {data.get('version')}")
+        self._interactions = data["interactions"]
+        self._cursors = {}
+
+    def save(self) -> str:
+        """Write the recorded interactions (atomically) and return the path"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {"version": CASSETTE_VERSION, "interactions": self._interactions}
+            tmp_path = f"{self.path}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"), default=str)
+        os.replace(tmp_path, self.path)
+        return self.path
+
+    def record(self, key: str, response: AIMessage, latency: float):
+        entry = {
+            "content": response.content,
+            "usage_metadata": dict(response.usage_metadata or {}),
+            "response_metadata": dict(response.response_metadata or {}),
+            "latency": round(latency, 4)
+        }
+        with self._lock:
+            self._interactions.setdefault(key, []).append(entry)
+            self.recorded += 1
+
+    def next(self, key: str) -> Dict[str, Any]:
+        """The next recorded response to a request"""
+        with self._lock:
+            entries = self._interactions.get(key)
+            if not entries:
+                self.misses += 1
+                raise CassetteMissError(f"Request {key} is not in cassette {self.path}")
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            self.replayed += 1
+            if cursor >= len(entries):
+                self.repeated += 1
+            return entries[cursor % len(entries)]
+
+    def wrap(self, llm_factory: Callable[[str], Any], sampling: Dict[str, Any]) -> Callable[[str], Any]:
+        """
+        Wrap an agent's LLM factory
+
+        Recording, the factory's models are called and their traffic captured;
+        replaying, the factory is never called (no API key or network needed).
+
+        Args:
+            llm_factory: Builds the chat model for a model name
+            sampling: Sampling parameters of the agent, part of every request key
+        """
+        def factory(model_name: str) -> "CassetteChatModel":
+            llm = llm_factory(model_name) if self.mode == "record" else None
+            return CassetteChatModel(self, model_name, sampling, llm)
+        return factory
+
+    def scheduler(self) -> Optional[LLMScheduler]:
+        """Scheduler without rate limits shared by the agents replaying this cassette (None when recording)"""
+        if self.mode != "replay":
+            return None
+        with self._lock:
+            if self._scheduler is None:
+                self._scheduler = LLMScheduler(REPLAY_RATE_LIMITS)
+            return self._scheduler
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "requests": len(self._interactions),
+                "interactions": sum(len(entries) for entries in self._interactions.values()),
+                "recorded": self.recorded,
+                "replayed": self.replayed,
+                "repeated": self.repeated,
+                "misses": self.misses
+            }
+
+
+class CassetteChatModel:
+    """Chat model that records the traffic of a real one, or replays it from a cassette"""
+
+    def __init__(self, cassette: Cassette, model_name: str, sampling: Dict[str, Any], llm: Optional[Any] = None):
+        self.cassette = cassette
+        self.model_name = model_name
+        self.sampling = sampling
+        self.llm = llm
+
+    def _replayed(self, key: str) -> tuple:
+        """(response, latency to simulate) of a replayed request"""
+        entry = self.cassette.next(key)
+        response = AIMessage(
+            content=entry["content"],
+            usage_metadata=entry["usage_metadata"] or None,
+            response_metadata=entry["response_metadata"]
+        )
+        return response, entry["latency"] if self.cassette.replay_latency else 0.0
+
+    def invoke(self, messages: list, config: Optional[dict] = None, **kwargs) -> AIMessage:
+        key = request_key(self.model_name, self.sampling, messages)
+        if self.llm is None:
+            response, latency = self._replayed(key)
+            if latency:
+                time.sleep(latency)
+            return response
+
+        start = time.perf_counter()
+        response = self.llm.invoke(messages, config, **kwargs)
+        self.cassette.record(key, response, time.perf_counter() - start)
+        return response
+
+    async def ainvoke(self, messages: list, config: Optional[dict] = None, **kwargs) -> AIMessage:
+        key = request_key(self.model_name, self.sampling, messages)
+        if self.llm is None:
+            response, latency = self._replayed(key)
+            if latency:
+                await asyncio.sleep(latency)
+            return response
+
+        start = time.perf_counter()
+        response = await self.llm.ainvoke(messages, config, **kwargs)
+        self.cassette.record(key, response, time.perf_counter() - start)
+        return response
+
+
+def format_stats(stats: Dict[str, Any]) -> str:
+    """One-line report of Cassette.stats()"""
+    if stats["mode"] == "record":
+        return f"Cassette recorded {stats['recorded']} LLM calls ({stats['requests']} distinct requests)"
+    return (
+        f"Cassette replayed {stats['replayed']} LLM calls ({stats['repeated']} beyond the recorded "
+        f"responses, {stats['misses']} not recorded)"
+    )
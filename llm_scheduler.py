@@ -0,0 +1,339 @@
+"""
+Process-wide scheduler for LLM calls
+Per-model request/token rate limiting with jittered exponential backoff on transient errors
+"""
+
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Any, Optional
+
+
+# Default per-model quotas (requests per minute, tokens per minute)
+DEFAULT_RATE_LIMITS = {
+    "gpt-4o-mini": {"rpm": 500, "tpm": 200000},
+    "gpt-4o": {"rpm": 500, "tpm": 30000},
+    "default": {"rpm": 500, "tpm": 30000}
+}
+
+# HTTP status codes worth retrying
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# OpenAI SDK exception classes worth retrying (matched by name to avoid importing the SDK)
+RETRYABLE_ERROR_NAMES = {
+    "RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError"
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate_per_minute`
+
+    Reservations may drive the bucket negative; the caller then waits until
+    the debt is repaid, so the long-run rate never exceeds the quota.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Reserve `amount` tokens
+
+        Returns:
+            Seconds the caller must wait before using the reservation
+        """
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def adjust(self, delta: float):
+        """Return (positive delta) or charge (negative delta) tokens after the fact"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class CallCancelled(Exception):
+    """The caller gave up on a call (deadline passed or another attempt won) before it was sent"""
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Check whether an LLM call error is transient and worth retrying"""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status in RETRYABLE_STATUS_CODES
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    Read the server-requested delay from an error's response headers
+
+    Supports `retry-after-ms`, and `retry-after` as seconds or an HTTP date.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            retry_at = email.utils.parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMScheduler:
+    """
+    Shared gate for every LLM call in the process
+
+    Each model gets a requests-per-minute and a tokens-per-minute bucket.
+    Calls wait for both, retry transient failures with jittered exponential
+    backoff (honoring retry-after headers), and report queue-depth metrics.
+    """
+
+    def __init__(
+        self,
+        rate_limits: Optional[Dict[str, Dict[str, float]]] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0
+    ):
+        """
+        Initialize the scheduler
+
+        Args:
+            rate_limits: Model name -> {"rpm", "tpm"} (a "default" entry covers other models)
+            max_retries: Retries per call for transient errors
+            base_delay: First backoff delay in seconds
+            max_delay: Upper bound for a single backoff delay
+        """
+        self.rate_limits = {model: dict(limits) for model, limits in (rate_limits or DEFAULT_RATE_LIMITS).items()}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._metrics = {}
+
+    def configure_model(self, model_name: str, rpm: float, tpm: float):
+        """Set the quota for a model, replacing its buckets"""
+        with self._lock:
+            self.rate_limits[model_name] = {"rpm": rpm, "tpm": tpm}
+            self._buckets.pop(model_name, None)
+
+    def _get_buckets(self, model_name: str) -> tuple:
+        with self._lock:
+            if model_name not in self._buckets:
+                limits = self.rate_limits.get(model_name, self.rate_limits.get("default", DEFAULT_RATE_LIMITS["default"]))
+                self._buckets[model_name] = (TokenBucket(limits["rpm"]), TokenBucket(limits["tpm"]))
+                self._metrics[model_name] = {
+                    "queue_depth": 0,
+                    "max_queue_depth": 0,
+                    "requests": 0,
+                    "retries": 0,
+                    "rate_limited": 0,
+                    "failures": 0,
+                    "throttle_wait_seconds": 0.0,
+                    "backoff_wait_seconds": 0.0
+                }
+            return self._buckets[model_name]
+
+    def _update_metrics(self, model_name: str, **deltas):
+        with self._lock:
+            metrics = self._metrics[model_name]
+            for key, delta in deltas.items():
+                metrics[key] += delta
+            metrics["max_queue_depth"] = max(metrics["max_queue_depth"], metrics["queue_depth"])
+
+    def _reserve(self, model_name: str, estimated_tokens: int) -> float:
+        """Reserve request and token quota; returns the seconds to wait before calling"""
+        request_bucket, token_bucket = self._get_buckets(model_name)
+        return max(request_bucket.reserve(1), token_bucket.reserve(estimated_tokens))
+
+    def _refund(self, model_name: str, estimated_tokens: int, request: bool = True):
+        """Give back the quota reserved for a request that was never sent (or failed: tokens only)"""
+        request_bucket, token_bucket = self._get_buckets(model_name)
+        if request:
+            request_bucket.adjust(1)
+        token_bucket.adjust(estimated_tokens)
+
+    def _acquire(self, model_name: str, estimated_tokens: int, cancel: Optional[threading.Event] = None) -> float:
+        """Wait for request and token quota; returns the seconds spent waiting"""
+        wait = self._reserve(model_name, estimated_tokens)
+        if wait > 0:
+            self._update_metrics(model_name, queue_depth=1)
+            try:
+                cancelled = cancel.wait(wait) if cancel is not None else time.sleep(wait)
+            finally:
+                self._update_metrics(model_name, queue_depth=-1, throttle_wait_seconds=wait)
+            if cancelled:
+                self._refund(model_name, estimated_tokens)
+                raise CallCancelled(f"{model_name} call cancelled while waiting for quota")
+        return wait
+
+    async def _aacquire(self, model_name: str, estimated_tokens: int) -> float:
+        """Async _acquire: waits without blocking the event loop"""
+        wait = self._reserve(model_name, estimated_tokens)
+        if wait > 0:
+            self._update_metrics(model_name, queue_depth=1)
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._update_metrics(model_name, queue_depth=-1, throttle_wait_seconds=wait)
+        return wait
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's retry-after"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after + random.uniform(0, self.base_delay))
+        return delay
+
+    def call(
+        self,
+        model_name: str,
+        fn: Callable[[], Any],
+        estimated_tokens: int = 0,
+        cancel: Optional[threading.Event] = None
+    ) -> tuple:
+        """
+        Run an LLM call within the model's quota, retrying transient errors
+
+        Args:
+            model_name: Model the call is billed against
+            fn: Zero-argument callable performing the request
+            estimated_tokens: Prompt plus max completion tokens to reserve
+            cancel: Set when the caller no longer needs the result (e.g. the latency
+                policy's deadline passed); no request or retry is started after it is set
+
+        Returns:
+            (result, stats) where stats holds the queue wait and retry count of this call
+
+        Raises:
+            CallCancelled: cancel was set before a request could be sent
+        """
+        stats = {"queue_wait": 0.0, "retries": 0}
+        self._get_buckets(model_name)
+
+        for attempt in range(self.max_retries + 1):
+            self._check_cancelled(model_name, cancel)
+            stats["queue_wait"] += self._acquire(model_name, estimated_tokens, cancel)
+            self._update_metrics(model_name, requests=1)
+            try:
+                return fn(), stats
+            except Exception as e:
+                # A failed request generates no tokens
+                self._refund(model_name, estimated_tokens, request=False)
+                delay = self._handle_failure(model_name, attempt, e, stats)
+                if cancel is None:
+                    time.sleep(delay)
+                elif cancel.wait(delay):
+                    raise CallCancelled(f"{model_name} call cancelled during backoff") from e
+
+    async def acall(
+        self,
+        model_name: str,
+        fn: Callable[[], Awaitable[Any]],
+        estimated_tokens: int = 0,
+        cancel: Optional[threading.Event] = None
+    ) -> tuple:
+        """
+        Async call: same quota and retry policy, awaiting `fn()` and every wait
+
+        Args:
+            model_name: Model the call is billed against
+            fn: Zero-argument callable returning an awaitable request
+            estimated_tokens: Prompt plus max completion tokens to reserve
+            cancel: As for call(); cancelling the awaiting task also stops the call
+
+        Returns:
+            (result, stats) where stats holds the queue wait and retry count of this call
+        """
+        stats = {"queue_wait": 0.0, "retries": 0}
+        self._get_buckets(model_name)
+
+        for attempt in range(self.max_retries + 1):
+            self._check_cancelled(model_name, cancel)
+            stats["queue_wait"] += await self._aacquire(model_name, estimated_tokens)
+            self._update_metrics(model_name, requests=1)
+            try:
+                return await fn(), stats
+            except Exception as e:
+                self._refund(model_name, estimated_tokens, request=False)
+                await asyncio.sleep(self._handle_failure(model_name, attempt, e, stats))
+
+    @staticmethod
+    def _check_cancelled(model_name: str, cancel: Optional[threading.Event]):
+        if cancel is not None and cancel.is_set():
+            raise CallCancelled(f"{model_name} call cancelled before it was sent")
+
+    def _handle_failure(self, model_name: str, attempt: int, error: Exception, stats: Dict[str, Any]) -> float:
+        """Re-raise a final or non-retryable error, otherwise record the retry and return its backoff delay"""
+        if attempt >= self.max_retries or not is_retryable_error(error):
+            self._update_metrics(model_name, failures=1)
+            raise error
+
+        delay = self._backoff_delay(attempt, error)
+        rate_limited = 1 if getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError" else 0
+        print(f"[scheduler] {model_name} call failed ({type(error).__name__}), retrying in {delay:.1f}s")
+        self._update_metrics(model_name, retries=1, rate_limited=rate_limited, backoff_wait_seconds=delay)
+        stats["retries"] += 1
+        return delay
+
+    def record_usage(self, model_name: str, estimated_tokens: int, actual_tokens: int):
+        """Reconcile the token bucket once the real usage of a call is known"""
+        _, token_bucket = self._get_buckets(model_name)
+        token_bucket.adjust(estimated_tokens - actual_tokens)
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Snapshot of per-model scheduler metrics"""
+        with self._lock:
+            return {model: dict(metrics) for model, metrics in self._metrics.items()}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """Return the process-wide scheduler, creating it on first use"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
+
+
+def set_scheduler(scheduler: LLMScheduler):
+    """Replace the process-wide scheduler (e.g. to apply account-specific quotas)"""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
@@ -0,0 +1,311 @@
+"""
+Traffic replay load generator
+Replays a JSONL query corpus against ReActAgent (in process, simulated LLM) or the
+HTTP API, open-loop (Poisson arrivals) or closed-loop (fixed concurrent users),
+and reports throughput, end-to-end / per-node latency percentiles and error rate
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from fake_llm import SimulatedChatModel
+from llm_scheduler import LLMScheduler
+from latency_policy import LatencyPolicy
+from persona_registry import get_registry
+from react_agent import ReActAgent
+
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "load_corpus.jsonl")
+
+REPORTED_PERCENTILES = (50, 95, 99)
+
+# Quotas high enough that the scheduler never throttles (measures the worker, not the account)
+UNLIMITED_RATE_LIMITS = {"default": {"rpm": 1e9, "tpm": 1e12}}
+
+
+def load_corpus(filepath: str) -> List[Dict[str, Any]]:
+    """Read {"query", optional "persona" / "session_id"} records, one per line"""
+    with open(filepath) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class AgentTarget:
+    """Runs requests in process on ReActAgent.astream with a simulated LLM"""
+
+    def __init__(
+        self,
+        latency: float,
+        latency_sigma: float,
+        error_rate: float,
+        max_iterations: int,
+        rate_limits: Optional[Dict[str, Dict[str, float]]],
+        timeout: float,
+        seed: int
+    ):
+        self.registry = get_registry()
+        self.scheduler = LLMScheduler(rate_limits, base_delay=0.1)
+        self.latency_policy = LatencyPolicy(timeout=timeout)
+        self.max_iterations = max_iterations
+        self._seeds = itertools.count(seed)
+        self._llm_settings = {"latency": latency, "latency_sigma": latency_sigma, "error_rate": error_rate}
+        self._agents = {}
+
+    def _agent(self, persona_key: str) -> ReActAgent:
+        if persona_key not in self._agents:
+            persona = self.registry.get(persona_key)
+            self._agents[persona_key] = ReActAgent(
+                persona_name=persona["name"],
+                system_prompt=persona["system_prompt"],
+                max_iterations=self.max_iterations,
+                scheduler=self.scheduler,
+                latency_policy=self.latency_policy,
+                prompt_hash=persona["content_hash"],
+                prompt_tokens=persona["prompt_tokens"],
+                observation_focus=persona["observation_focus"],
+                max_logs=1,
+                llm_factory=lambda name: SimulatedChatModel(name, seed=next(self._seeds), **self._llm_settings)
+            )
+        return self._agents[persona_key]
+
+    async def send(self, record: Dict[str, Any], persona_key: str) -> List[Dict[str, Any]]:
+        """Run one request; returns its progress events"""
+        agent = self._agent(persona_key)
+        return [event async for event in agent.astream(record["query"], session_id=record.get("session_id"))]
+
+    async def close(self):
+        pass
+
+
+class HttpTarget:
+    """Sends requests to the HTTP API's streaming endpoint (see api.py)"""
+
+    def __init__(self, base_url: str, max_iterations: int, timeout: float):
+        import httpx
+
+        self.client = httpx.AsyncClient(base_url=base_url, timeout=timeout)
+        self.max_iterations = max_iterations
+
+    async def send(self, record: Dict[str, Any], persona_key: str) -> List[Dict[str, Any]]:
+        """POST /query/stream and collect its server-sent events"""
+        body = {
+            "message": record["query"],
+            "persona": persona_key,
+            "max_iterations": self.max_iterations,
+            "session_id": record.get("session_id")
+        }
+        events = []
+        async with self.client.stream("POST", "/query/stream", json=body) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.startswith("data: "):
+                    events.append(json.loads(line[len("data: "):]))
+        if events and events[-1]["event"] == "error":
+            raise RuntimeError(events[-1]["error"])
+        return events
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class LoadGenerator:
+    """
+    Issues corpus requests against a target and records one result per request
+
+    Personas are assigned round-robin unless a record names its own.
+    """
+
+    def __init__(self, target, corpus: List[Dict[str, Any]], personas: List[str], seed: int = 0):
+        self.target = target
+        self.corpus = corpus
+        self.personas = personas
+        self.random = random.Random(seed)
+        self.results = []
+        self._requests = itertools.count()
+
+    async def _issue(self, scheduled_at: float):
+        index = next(self._requests)
+        record = self.corpus[index % len(self.corpus)]
+        persona_key = record.get("persona") or self.personas[index % len(self.personas)]
+
+        result = {"persona": persona_key, "scheduled_at": scheduled_at, "error": None, "nodes": []}
+        try:
+            events = await self.target.send(record, persona_key)
+            result["nodes"] = [(e["node"], e["duration"]) for e in events if e["event"] == "node"]
+            final = events[-1]
+            result["tier"] = final.get("tier")
+            result["cache_hit"] = final.get("cache_hit", False)
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        # Measured from the scheduled arrival, so queueing delay counts (no coordinated omission)
+        result["latency"] = time.perf_counter() - scheduled_at
+        self.results.append(result)
+
+    async def open_loop(self, rate: float, duration: float):
+        """Poisson arrivals at `rate` requests/second for `duration` seconds"""
+        start = time.perf_counter()
+        tasks = []
+        next_arrival = start
+        while next_arrival - start < duration:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self._issue(next_arrival)))
+            next_arrival += self.random.expovariate(rate)
+        await asyncio.gather(*tasks)
+
+    async def closed_loop(self, concurrency: int, duration: float, think_time: float = 0.0):
+        """`concurrency` users each sending their next request when the previous one returns"""
+        end = time.perf_counter() + duration
+
+        async def user():
+            while time.perf_counter() < end:
+                await self._issue(time.perf_counter())
+                if think_time:
+                    await asyncio.sleep(self.random.expovariate(1.0 / think_time))
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """p50 / p95 / p99 of a sample (None when empty)"""
+    if not values:
+        return {f"p{p}": None for p in REPORTED_PERCENTILES}
+    return {f"p{p}": float(v) for p, v in zip(REPORTED_PERCENTILES, np.percentile(values, REPORTED_PERCENTILES))}
+
+
+def summarize(results: List[Dict[str, Any]], wall_time: float) -> Dict[str, Any]:
+    """Throughput, latency percentiles and error rate of one load level"""
+    succeeded = [r for r in results if r["error"] is None]
+    node_durations = {}
+    for result in succeeded:
+        for node, duration in result["nodes"]:
+            node_durations.setdefault(node, []).append(duration)
+
+    errors = {}
+    for result in results:
+        if result["error"] is not None:
+            kind = result["error"].split(":", 1)[0]
+            errors[kind] = errors.get(kind, 0) + 1
+
+    return {
+        "requests": len(results),
+        "wall_time": wall_time,
+        "throughput": len(succeeded) / wall_time if wall_time else 0.0,
+        "error_rate": (len(results) - len(succeeded)) / len(results) if results else 0.0,
+        "errors": errors,
+        "latency": percentiles([r["latency"] for r in succeeded]),
+        "node_latency": {node: percentiles(durations) for node, durations in node_durations.items()},
+        "by_persona": {
+            persona: percentiles([r["latency"] for r in succeeded if r["persona"] == persona])
+            for persona in sorted({r["persona"] for r in results})
+        }
+    }
+
+
+def format_level(label: str, summary: Dict[str, Any]) -> str:
+    def ms(value):
+        return f"{value * 1000:8.0f}" if value is not None else "       -"
+
+    latency = summary["latency"]
+    return (
+        f"{label:>14} {summary['requests']:>8} {summary['throughput']:>10.2f} "
+        f"{ms(latency['p50'])} {ms(latency['p95'])} {ms(latency['p99'])} {summary['error_rate']:>8.1%}"
+    )
+
+
+async def run_level(args, target, corpus, mode: str, level: float) -> Dict[str, Any]:
+    generator = LoadGenerator(target, corpus, args.personas, seed=args.seed)
+    start = time.perf_counter()
+    if mode == "open":
+        await generator.open_loop(rate=level, duration=args.duration)
+    else:
+        await generator.closed_loop(concurrency=int(level), duration=args.duration, think_time=args.think_time)
+    summary = summarize(generator.results, time.perf_counter() - start)
+    summary[{"open": "rate", "closed": "concurrency"}[mode]] = level
+    return summary
+
+
+async def main_async(args, out):
+    corpus = load_corpus(args.corpus)
+    if args.target == "agent":
+        target = AgentTarget(
+            latency=args.llm_latency,
+            latency_sigma=args.llm_latency_sigma,
+            error_rate=args.llm_error_rate,
+            max_iterations=args.max_iterations,
+            rate_limits=None if args.rate_limits else UNLIMITED_RATE_LIMITS,
+            timeout=args.timeout,
+            seed=args.seed
+        )
+    else:
+        target = HttpTarget(args.url, args.max_iterations, args.timeout)
+
+    mode = "open" if args.rate else "closed"
+    levels = args.rate or args.concurrency
+    label = "rate (req/s)" if mode == "open" else "concurrency"
+
+    print(f"Target: {args.target} | mode: {mode}-loop | {args.duration:.0f}s per level | personas: {args.personas}", file=out)
+    print(f"{label:>14} {'requests':>8} {'req/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>8}", file=out)
+
+    summaries = []
+    try:
+        for level in levels:
+            summary = await run_level(args, target, corpus, mode, level)
+            summaries.append(summary)
+            print(format_level(f"{level:g}", summary), file=out)
+    finally:
+        await target.close()
+
+    print("\nPer-node latency at the highest level (ms):", file=out)
+    for node, values in summaries[-1]["node_latency"].items():
+        print(f"  {node:<10} " + "  ".join(f"{k}={v * 1000:.0f}" for k, v in values.items()), file=out)
+    if summaries[-1]["errors"]:
+        print(f"\nErrors at the highest level: {summaries[-1]['errors']}", file=out)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "levels": summaries}, f, indent=2)
+        print(f"\nReport saved to {args.output}", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a query corpus and measure latency under load")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL corpus of {\"query\", ...} records")
+    parser.add_argument("--target", choices=["agent", "http"], default="agent")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL (http target)")
+    loop = parser.add_mutually_exclusive_group()
+    loop.add_argument("--rate", type=float, nargs="+", help="Open loop: Poisson arrival rates (req/s) to sweep")
+    loop.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64],
+                      help="Closed loop: concurrent users to sweep (default)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per load level")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Closed loop: mean pause between a user's requests")
+    parser.add_argument("--personas", nargs="+", default=["friendly_few_shot", "expert_zero_shot", "cautious_cot"])
+    parser.add_argument("--max-iterations", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per LLM call (agent) / per request (http) deadline")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Simulated LLM median latency (s)")
+    parser.add_argument("--llm-latency-sigma", type=float, default=0.5, help="Simulated LLM log-normal spread")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Simulated LLM transient failure rate")
+    parser.add_argument("--rate-limits", action="store_true", help="Apply the default per-model quotas")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the full report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show agent output")
+    args = parser.parse_args()
+
+    # The agent prints every step; keep the report readable
+    out = sys.stdout
+    with open(os.devnull, "w") as devnull, redirect_stdout(out if args.verbose else devnull):
+        asyncio.run(main_async(args, out))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Opt-in memory profiling of agent runs
+tracemalloc snapshots around each run: net growth, peak traced memory and the
+allocation sites that grew the most, per run and since profiling started
+"""
+
+import linecache
+import os
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+# Allocations made by the profiler itself or by imports are not the agent's
+IGNORED_FILES = (
+    tracemalloc.__file__, linecache.__file__,
+    "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>"
+)
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes (None where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemoryProfiler:
+    """
+    Measures the memory each agent run leaves behind
+
+    Tracing is process-wide, so runs should not overlap while profiling
+    (the sync run path, one query at a time). Snapshots cost time
+    proportional to the live allocations; top_n=0 skips them and only
+    reports net growth and peak.
+    """
+
+    def __init__(self, top_n: int = 10, frames: int = 1, key_type: str = "lineno", per_run_sites: bool = True):
+        """
+        Initialize the profiler
+
+        Args:
+            top_n: Allocation sites reported per run and in the summary (0 = no snapshots)
+            frames: Stack frames kept per allocation (more frames, more overhead)
+            key_type: Grouping of allocation sites ("lineno", "filename" or "traceback")
+            per_run_sites: Snapshot around every run; off, only the summary reports
+                sites (for soak tests over thousands of runs)
+        """
+        self.top_n = top_n
+        self.per_run_sites = per_run_sites
+        self.frames = frames
+        self.key_type = key_type
+        self.runs = 0
+
+        self._baseline = None
+        self._baseline_traced = None
+        self._baseline_rss = None
+        self._started_tracing = False
+
+    def start(self):
+        """Start tracing (if not already) and record the baseline for summary()"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        if self._baseline_traced is None:
+            self._baseline_traced = tracemalloc.get_traced_memory()[0]
+            self._baseline_rss = current_rss()
+            if self.top_n:
+                self._baseline = self._snapshot()
+
+    def reset_baseline(self):
+        """Measure summary() growth from now on (e.g. after a warmup)"""
+        self.runs = 0
+        self._baseline_traced = None
+        self.start()
+
+    def stop(self):
+        """Stop tracing if this profiler started it"""
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracing = False
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, filename) for filename in IGNORED_FILES]
+        )
+
+    def _top_sites(self, after: tracemalloc.Snapshot, before: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        """Allocation sites with the largest growth between two snapshots"""
+        # compare_to orders by absolute difference; only growth is of interest
+        grown = sorted(
+            (stat for stat in after.compare_to(before, self.key_type) if stat.size_diff > 0),
+            key=lambda stat: stat.size_diff,
+            reverse=True
+        )
+        sites = []
+        for stat in grown[:self.top_n]:
+            frame = stat.traceback[0]
+            sites.append({
+                "site": f"{frame.filename}:{frame.lineno}",
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff,
+                "size": stat.size
+            })
+        return sites
+
+    @contextmanager
+    def profile(self) -> Iterator[Dict[str, Any]]:
+        """
+        Profile the enclosed block
+
+        Yields a dict that is filled in when the block exits with
+        net_growth (bytes still allocated afterwards), peak (highest traced
+        bytes above the starting point), rss and top_sites.
+        """
+        self.start()
+        record = {}
+        snapshots = self.top_n and self.per_run_sites
+        before = self._snapshot() if snapshots else None
+        start_traced = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        try:
+            yield record
+        finally:
+            end_traced, peak = tracemalloc.get_traced_memory()
+            after = self._snapshot() if snapshots else None
+
+            self.runs += 1
+            record.update({
+                "net_growth": end_traced - start_traced,
+                "peak": peak - start_traced,
+                "traced": end_traced,
+                "rss": current_rss(),
+                "top_sites": self._top_sites(after, before) if after is not None else []
+            })
+
+    def summary(self) -> Dict[str, Any]:
+        """Growth since start(), with the allocation sites responsible"""
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        growth = traced - (self._baseline_traced or 0)
+        rss = current_rss()
+        return {
+            "runs": self.runs,
+            "growth": growth,
+            "growth_per_run": growth / self.runs if self.runs else 0.0,
+            "traced": traced,
+            "rss_growth": rss - self._baseline_rss if rss is not None and self._baseline_rss is not None else None,
+            "top_sites": self._top_sites(self._snapshot(), self._baseline) if self._baseline is not None else []
+        }
+
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Readable report of MemoryProfiler.summary()"""
+    lines = [
+        f"Memory after {summary['runs']} run(s): {format_bytes(summary['growth'])} traced growth "
+        f"({format_bytes(summary['growth_per_run'])} per run)"
+    ]
+    if summary["rss_growth"] is not None:
+        lines.append(f"  RSS growth: {format_bytes(summary['rss_growth'])}")
+    if summary["top_sites"]:
+        lines.append("  Top allocation sites by growth:")
+        for site in summary["top_sites"]:
+            lines.append(f"    {format_bytes(site['size_diff']):>10} {site['count_diff']:>+8} blocks  {site['site']}")
+    return "\n".join(lines)
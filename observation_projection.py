@@ -0,0 +1,195 @@
+"""
+Query-aware projection of tool results into observations
+Each structured tool result is reduced to the records and fields the user's
+question (and the persona's focus) is about, in a compact text form within a
+character budget, instead of cutting the raw JSON after a fixed length
+"""
+
+import json
+import re
+from typing import Dict, Any, Callable, FrozenSet, Iterable, List, Optional, Tuple
+
+
+# Longest observation passed on to THINK and RESPOND
+OBSERVATION_CHARS = 400
+
+# Question mentions that ask about a field of the tool results ("$" covers "$200?")
+FIELD_INTENTS: Dict[str, Tuple[str, ...]] = {
+    "pricing": ("price", "pricing", "cost", "how much", "quote", "afford", "cheap", "expensive", "budget", "$"),
+    "duration": ("how long", "duration", "how many hours", "takes", "quick"),
+    "features": ("include", "feature", "involve", "what do you do", "what does", "details", "steps", "process"),
+    "certifications": ("certif", "safer choice", "leaping bunny", "green seal", "ewg", "eco", "green", "approved"),
+    "ingredients": ("ingredient", "chemical", "contain", "made of", "made from", "toxic", "natural", "what's in"),
+    "allergen_free": ("allerg", "asthma", "sensitive", "hypoallergenic", "irritat", "safe for"),
+    "use_cases": ("use on", "used for", "use for", "surface", "which product", "clean my", "floor", "window", "bathroom"),
+    "contact": ("contact", "phone", "call", "email", "reach", "hours", "open", "schedule", "book", "appointment")
+}
+
+FOCUS_FIELDS = frozenset(FIELD_INTENTS)
+
+# Words too common to tell records apart when ranking them against the question
+STOPWORDS = frozenset(
+    "a an and are can do does for from have how i in is it me my of on or our the this to we what which "
+    "with you your any about would like need want".split()
+)
+
+
+def query_intents(text: str, focus: Iterable[str] = ()) -> FrozenSet[str]:
+    """
+    Fields a question asks about, plus the persona's focus fields
+
+    Args:
+        text: The user's question
+        focus: Fields the persona always wants to see (names from FIELD_INTENTS)
+    """
+    lowered = text.lower()
+    intents = {field for field, mentions in FIELD_INTENTS.items() if any(m in lowered for m in mentions)}
+    return frozenset(intents.union(focus))
+
+
+def _words(text: str) -> set:
+    return {word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in STOPWORDS}
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, list):
+        return ", ".join(map(str, value))
+    if isinstance(value, dict):
+        return ", ".join(str(v) for v in value.values())
+    return str(value)
+
+
+def _format_record(title: str, fields: List[Tuple[str, Any]]) -> str:
+    parts = "; ".join(f"{label}: {_format_value(value)}" for label, value in fields if value not in (None, "", []))
+    return f"{title} ({parts})" if parts else title
+
+
+def _join_within(parts: List[str], budget: int) -> str:
+    """Join records with " | " until the budget is used, then say how many were left out"""
+    text = ""
+    for index, part in enumerate(parts):
+        candidate = f"{text} | {part}" if text else part
+        remaining = len(parts) - index - 1
+        suffix = f" | +{remaining} more" if remaining else ""
+        if len(candidate) + len(suffix) > budget and text:
+            return f"{text} | +{len(parts) - index} more"
+        text = candidate
+    return text
+
+
+def _rank(records: List[Dict[str, Any]], query: str, text_of: Callable[[Dict[str, Any]], str]) -> List[Dict[str, Any]]:
+    """Records sharing the most words with the question first, otherwise in their original order"""
+    query_words = _words(query)
+    return sorted(records, key=lambda record: -len(query_words & _words(text_of(record))))
+
+
+def _selected(intents: FrozenSet[str], available: Tuple[str, ...], default: Tuple[str, ...]) -> List[str]:
+    """Requested fields the tool has (in the tool's field order), or its defaults when none is requested"""
+    requested = [field for field in available if field in intents]
+    return requested or list(default)
+
+
+def project_services(result: Any, query: str, intents: FrozenSet[str], budget: int) -> str:
+    services = result if isinstance(result, list) else []
+    fields = _selected(intents, ("description", "features", "duration", "pricing"), ("description", "duration", "pricing"))
+    ranked = _rank(
+        services, query,
+        lambda s: " ".join([s.get("name", ""), s.get("description", "")] + s.get("features", []))
+    )
+    return _join_within(
+        [_format_record(s.get("name", s.get("id", "")), [(f, s.get(f)) for f in fields]) for s in ranked],
+        budget
+    )
+
+
+def project_products(result: Any, query: str, intents: FrozenSet[str], budget: int) -> str:
+    if not isinstance(result, dict):
+        return ""
+    if "available_categories" in result:
+        # No match: the message and what the filters can take
+        return _join_within([result.get("message", "")] + [
+            f"{key.replace('available_', '')}: {_format_value(value)}"
+            for key, value in result.items() if key.startswith("available_")
+        ], budget)
+
+    note = result.get("message")
+    products = result.get("products", result) if note else result
+    fields = _selected(
+        intents, ("certifications", "allergen_free", "ingredients", "use_cases"), ("certifications", "allergen_free")
+    )
+    records = [{"id": product_id, **info} for product_id, info in products.items() if isinstance(info, dict)]
+    ranked = _rank(records, query, lambda p: " ".join([p.get("name", ""), p.get("category", "")] + p.get("use_cases", [])))
+    parts = [_format_record(p.get("name", p["id"]), [(f.replace("_", " "), p.get(f)) for f in fields]) for p in ranked]
+    return _join_within(parts + ([note] if note else []), budget)
+
+
+def project_availability(result: Any, query: str, intents: FrozenSet[str], budget: int) -> str:
+    if not isinstance(result, dict):
+        return ""
+    if result.get("available"):
+        fields = [("area", result.get("area"))]
+        fields.append(("contact", result.get("contact")))
+        return _format_record("Available", fields)[:budget]
+    return _join_within([
+        _format_record("Not available", [("nearby areas", result.get("nearby_areas"))]),
+        result.get("message", "")
+    ], budget)
+
+
+def project_confirmation(result: Any, query: str, intents: FrozenSet[str], budget: int) -> str:
+    if not isinstance(result, dict):
+        return ""
+    return _join_within([
+        str(result[key]) for key in ("status", "message", "next_steps", "contact_for_urgent") if result.get(key)
+    ], budget)
+
+
+# tool name -> projector(parsed result, question, intents, budget) -> text
+PROJECTORS: Dict[str, Callable[[Any, str, FrozenSet[str], int], str]] = {
+    "search_services": project_services,
+    "get_product_info": project_products,
+    "check_availability": project_availability,
+    "record_customer_interest": project_confirmation,
+    "record_feedback": project_confirmation
+}
+
+
+def project_observation(
+    tool_name: str,
+    result: Any,
+    query: str,
+    intents: Optional[FrozenSet[str]] = None,
+    budget: int = OBSERVATION_CHARS
+) -> str:
+    """
+    Observation text of a tool result
+
+    Args:
+        tool_name: Tool that produced the result
+        result: The tool's return value (JSON strings are parsed)
+        query: The user's question
+        intents: Fields to keep (query_intents(query) when omitted)
+        budget: Maximum length of the observation
+
+    Returns:
+        "Tool '<name>' returned: <projection>"; results without a projector
+        (or that do not parse) are compacted and cut at the budget
+    """
+    prefix = f"Tool '{tool_name}' returned: "
+    intents = query_intents(query) if intents is None else intents
+    parsed = result
+    if isinstance(result, str):
+        try:
+            parsed = json.loads(result)
+        except ValueError:
+            parsed = None
+
+    projector = PROJECTORS.get(tool_name)
+    text = projector(parsed, query, intents, budget - len(prefix)) if projector and parsed is not None else ""
+    if not text:
+        text = json.dumps(parsed, separators=(",", ":")) if parsed is not None else str(result)
+    if len(prefix) + len(text) > budget:
+        text = text[:max(0, budget - len(prefix) - 3)] + "..."
+    return prefix + text
@@ -0,0 +1,232 @@
+"""
+File-based persona registry with hot reload
+Personas are read from YAML/TOML files, rendered once at load time and swapped in atomically on change
+"""
+
+import hashlib
+import os
+import threading
+import tomllib
+from string import Template
+from typing import Dict, Any, List
+
+from personas import PERSONAS, BUSINESS_CONTEXT, TOOL_INSTRUCTIONS
+from observation_projection import FOCUS_FIELDS
+from pricing import estimate_tokens
+
+
+DEFAULT_PERSONA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "persona_configs")
+
+PERSONA_FILE_EXTENSIONS = (".yaml", ".yml", ".toml")
+
+# Placeholders available in persona prompts ($business_context, $tool_instructions)
+PROMPT_VARIABLES = {
+    "business_context": BUSINESS_CONTEXT,
+    "tool_instructions": TOOL_INSTRUCTIONS
+}
+
+
+def _load_file(path: str) -> Dict[str, Any]:
+    """Parse one persona file"""
+    if path.endswith(".toml"):
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+
+    import yaml  # only needed when YAML personas are present
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
+
+
+def build_persona(key: str, data: Dict[str, Any], source: str) -> Dict[str, Any]:
+    """
+    Render a persona and precompute its prompt metadata
+
+    Args:
+        key: Persona key
+        data: Persona definition with name, description, system_prompt and
+            optionally observation_focus (tool result fields always kept in observations)
+        source: File the persona came from ("builtin" for personas.py)
+
+    Returns:
+        Persona dict with the rendered system prompt, its token count and content hash
+    """
+    missing = [field for field in ("name", "system_prompt") if not data.get(field)]
+    if missing:
+        raise ValueError(f"Persona '{key}' in {source} is missing {missing}")
+    observation_focus = sorted(data.get("observation_focus") or [])
+    unknown = [field for field in observation_focus if field not in FOCUS_FIELDS]
+    if unknown:
+        raise ValueError(f"Persona '{key}' in {source} has unknown observation_focus {unknown}")
+
+    system_prompt = Template(data["system_prompt"]).safe_substitute(PROMPT_VARIABLES)
+    # The focus changes what the agent sees, so personas differing only in it are distinct
+    hashed = system_prompt + ("\n" + ",".join(observation_focus) if observation_focus else "")
+    return {
+        "key": key,
+        "name": data["name"],
+        "description": data.get("description", ""),
+        "system_prompt": system_prompt,
+        "prompt_tokens": estimate_tokens(system_prompt),
+        "content_hash": hashlib.sha256(hashed.encode()).hexdigest()[:16],
+        "observation_focus": observation_focus,
+        "source": source
+    }
+
+
+class PersonaRegistry:
+    """
+    Personas from personas.py overlaid with those in a directory of YAML/TOML files
+
+    Each file defines one persona (key defaults to the file name); a file
+    with the key of a built-in persona replaces it. The directory is polled
+    for modification times; on change every file is re-read and rendered
+    into a new table, which replaces the old one in a single assignment, so
+    readers never see a half-loaded registry. A file that fails to load
+    keeps its previous version.
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_PERSONA_DIR,
+        poll_interval: float = 2.0,
+        include_builtin: bool = True
+    ):
+        """
+        Initialize the registry and load the directory
+
+        Args:
+            directory: Directory of persona files
+            poll_interval: Seconds between change checks of the watcher thread
+            include_builtin: Start from the personas defined in personas.py
+        """
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.include_builtin = include_builtin
+
+        self.version = 0
+        self.errors = {}  # file -> last load error
+        self._personas = {}
+        self._signature = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+        self._builtin = {}
+        if include_builtin:
+            self._builtin = {
+                key: build_persona(key, config, "builtin") for key, config in PERSONAS.items()
+            }
+        self.refresh(force=True)
+
+    def _scan(self) -> tuple:
+        """(file, mtime, size) of every persona file, the change signature of the directory"""
+        if not os.path.isdir(self.directory):
+            return ()
+        entries = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(PERSONA_FILE_EXTENSIONS):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((name, stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload the directory if any persona file changed
+
+        Args:
+            force: Reload even if nothing changed
+
+        Returns:
+            True if a new version was swapped in
+        """
+        with self._reload_lock:
+            signature = self._scan()
+            if signature == self._signature and not force:
+                return False
+
+            previous = self._personas
+            personas = dict(self._builtin)
+            errors = {}
+            for name, _, _ in signature:
+                path = os.path.join(self.directory, name)
+                try:
+                    data = _load_file(path)
+                    key = data.get("key") or os.path.splitext(name)[0]
+                    personas[key] = build_persona(key, data, path)
+                except Exception as e:
+                    errors[path] = str(e)
+                    print(f"[PersonaRegistry] Could not load {path}: {e}")
+                    # Keep serving the last good version of this file
+                    for key, persona in previous.items():
+                        if persona["source"] == path:
+                            personas[key] = persona
+
+            self._personas = personas
+            self._signature = signature
+            self.errors = errors
+            self.version += 1
+            return True
+
+    def start_watching(self):
+        """Poll the directory for changes in a background thread"""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def watch():
+            while not self._stop.wait(self.poll_interval):
+                try:
+                    if self.refresh():
+                        print(f"[PersonaRegistry] Reloaded personas (version {self.version})")
+                except Exception as e:
+                    print(f"[PersonaRegistry] Reload failed: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="persona-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        """Stop the background watcher"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def get(self, persona_key: str) -> Dict[str, Any]:
+        """
+        Get a persona by key
+
+        Returns:
+            Persona dict (name, description, system_prompt, prompt_tokens, content_hash,
+            observation_focus, source)
+        """
+        personas = self._personas
+        if persona_key not in personas:
+            raise ValueError(f"Unknown persona: {persona_key}. Available: {list(personas.keys())}")
+        return personas[persona_key]
+
+    def list_personas(self) -> List[Dict[str, Any]]:
+        """Key, name, description and prompt metadata of every persona"""
+        return [
+            {
+                "key": key,
+                "name": persona["name"],
+                "description": persona["description"],
+                "prompt_tokens": persona["prompt_tokens"],
+                "content_hash": persona["content_hash"]
+            }
+            for key, persona in self._personas.items()
+        ]
+
+
+# Process-wide registry shared by the app and the experiment runner
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> PersonaRegistry:
+    """Return the process-wide persona registry, creating it on first use"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PersonaRegistry()
+        return _registry
@@ -302,6 +302,8 @@ Always demonstrate your careful thinking process!
 # PERSONA REGISTRY
 # ============================================================================
 
+# observation_focus: tool result fields a persona always keeps in its observations
+# (see observation_projection.FIELD_INTENTS); others depend on the question
 PERSONAS = {
     # Friendly Wellness Advisor variants
     "friendly_zero_shot": {
@@ -324,34 +326,40 @@ PERSONAS = {
     "expert_zero_shot": {
         "name": "Professional Health Expert (Zero-Shot)",
         "system_prompt": HEALTH_EXPERT_ZERO_SHOT,
-        "description": "Technical, scientific expert with zero-shot prompting"
+        "description": "Technical, scientific expert with zero-shot prompting",
+        "observation_focus": ["certifications", "ingredients"]
     },
     "expert_few_shot": {
         "name": "Professional Health Expert (Few-Shot)",
         "system_prompt": HEALTH_EXPERT_FEW_SHOT,
-        "description": "Technical expert with few-shot examples"
+        "description": "Technical expert with few-shot examples",
+        "observation_focus": ["certifications", "ingredients"]
     },
     "expert_cot": {
         "name": "Professional Health Expert (Chain-of-Thought)",
         "system_prompt": HEALTH_EXPERT_COT,
-        "description": "Scientific expert with systematic reasoning"
+        "description": "Scientific expert with systematic reasoning",
+        "observation_focus": ["certifications", "ingredients"]
     },
 
     # Cautious Helper variants
     "cautious_zero_shot": {
         "name": "Cautious Service Guide (Zero-Shot)",
         "system_prompt": CAUTIOUS_HELPER_ZERO_SHOT,
-        "description": "Careful, thorough guide with zero-shot prompting"
+        "description": "Careful, thorough guide with zero-shot prompting",
+        "observation_focus": ["allergen_free", "certifications"]
     },
     "cautious_few_shot": {
         "name": "Cautious Service Guide (Few-Shot)",
         "system_prompt": CAUTIOUS_HELPER_FEW_SHOT,
-        "description": "Careful guide with few-shot examples"
+        "description": "Careful guide with few-shot examples",
+        "observation_focus": ["allergen_free", "certifications"]
     },
     "cautious_cot": {
         "name": "Cautious Service Guide (Chain-of-Thought)",
         "system_prompt": CAUTIOUS_HELPER_COT,
-        "description": "Deliberate guide with careful reasoning"
+        "description": "Deliberate guide with careful reasoning",
+        "observation_focus": ["allergen_free", "certifications"]
     }
 }
 
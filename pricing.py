@@ -0,0 +1,175 @@
+"""
+Token usage extraction and cost accounting for LLM calls
+Prices are configurable per model and expressed in USD per 1M tokens
+"""
+
+import json
+from typing import Dict, Any, Optional
+
+
+# Default price table (USD per 1M tokens)
+MODEL_PRICES = {
+    "gpt-4o-mini": {
+        "input": 0.15,
+        "cached_input": 0.075,
+        "output": 0.60
+    },
+    "gpt-4o": {
+        "input": 2.50,
+        "cached_input": 1.25,
+        "output": 10.00
+    }
+}
+
+USAGE_FIELDS = ["prompt_tokens", "completion_tokens", "cached_tokens", "total_tokens"]
+
+# Rough characters-per-token ratio for English text with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+# Per-message framing overhead in chat completions
+TOKENS_PER_MESSAGE = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for budgeting before a request is sent"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def estimate_message_tokens(messages: list) -> int:
+    """Estimate the prompt tokens of a list of chat messages"""
+    return sum(estimate_tokens(str(m.content)) + TOKENS_PER_MESSAGE for m in messages)
+
+
+def load_price_table(filepath: str, base: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Load a price table from a JSON file, layered over the defaults
+
+    Args:
+        filepath: JSON file mapping model name -> {"input", "cached_input", "output"}
+        base: Table to override (defaults to MODEL_PRICES)
+
+    Returns:
+        Merged price table
+    """
+    with open(filepath) as f:
+        overrides = json.load(f)
+
+    table = {model: dict(prices) for model, prices in (base or MODEL_PRICES).items()}
+    for model, prices in overrides.items():
+        table.setdefault(model, {}).update(prices)
+    return table
+
+
+def extract_usage(response: Any) -> Dict[str, int]:
+    """
+    Extract prompt, completion and cached token counts from an LLM response
+
+    Reads LangChain's `usage_metadata` and falls back to the raw OpenAI
+    `token_usage` block in `response_metadata`.
+
+    Args:
+        response: Message returned by `llm.invoke`
+
+    Returns:
+        Dict with prompt_tokens, completion_tokens, cached_tokens, total_tokens
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        details = usage.get("input_token_details") or {}
+        prompt_tokens = usage.get("input_tokens", 0)
+        completion_tokens = usage.get("output_tokens", 0)
+        cached_tokens = details.get("cache_read", 0) or 0
+    else:
+        token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+        details = token_usage.get("prompt_tokens_details") or {}
+        prompt_tokens = token_usage.get("prompt_tokens", 0)
+        completion_tokens = token_usage.get("completion_tokens", 0)
+        cached_tokens = details.get("cached_tokens", 0) or 0
+
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cached_tokens": cached_tokens,
+        "total_tokens": prompt_tokens + completion_tokens
+    }
+
+
+def get_model_prices(model_name: str, price_table: Optional[Dict[str, Dict[str, float]]] = None) -> Optional[Dict[str, float]]:
+    """
+    Look up prices for a model, matching dated snapshots by longest prefix
+
+    Args:
+        model_name: Model name, e.g. "gpt-4o-mini-2024-07-18"
+        price_table: Price table (defaults to MODEL_PRICES)
+
+    Returns:
+        Price entry or None if the model is not priced
+    """
+    table = price_table or MODEL_PRICES
+    if model_name in table:
+        return table[model_name]
+
+    matches = [name for name in table if model_name.startswith(name)]
+    if not matches:
+        return None
+    return table[max(matches, key=len)]
+
+
+def compute_cost(model_name: str, usage: Dict[str, int], price_table: Optional[Dict[str, Dict[str, float]]] = None) -> Optional[float]:
+    """
+    Compute the USD cost of one or more LLM calls
+
+    Cached tokens are a subset of prompt tokens and are billed at the
+    cached input rate (falling back to the input rate).
+
+    Args:
+        model_name: Model that served the calls
+        usage: Token counts as returned by extract_usage
+        price_table: Price table (defaults to MODEL_PRICES)
+
+    Returns:
+        Cost in USD, or None if the model is not priced
+    """
+    prices = get_model_prices(model_name, price_table)
+    if prices is None:
+        return None
+
+    cached = usage.get("cached_tokens", 0)
+    uncached = usage.get("prompt_tokens", 0) - cached
+    cost = (
+        uncached * prices["input"]
+        + cached * prices.get("cached_input", prices["input"])
+        + usage.get("completion_tokens", 0) * prices["output"]
+    )
+    return cost / 1_000_000
+
+
+def summarize_usage(node_metrics: list) -> Dict[str, Any]:
+    """
+    Total token usage and cost across the node metrics of one run
+
+    Args:
+        node_metrics: Per-node metric entries from a run
+
+    Returns:
+        Dict with run totals plus a per-node breakdown under "by_node"
+    """
+    totals = {field: 0 for field in USAGE_FIELDS}
+    totals["cost"] = 0.0
+    by_node = {}
+
+    for entry in node_metrics:
+        if "prompt_tokens" not in entry:
+            continue
+        node_totals = by_node.setdefault(entry["node"], {field: 0 for field in USAGE_FIELDS + ["calls"]})
+        node_totals["calls"] += 1
+        for field in USAGE_FIELDS:
+            totals[field] += entry[field]
+            node_totals[field] += entry[field]
+        if entry.get("cost") is None:
+            totals["cost"] = None
+        elif totals["cost"] is not None:
+            totals["cost"] += entry["cost"]
+
+    totals["by_node"] = by_node
+    return totals
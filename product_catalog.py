@@ -0,0 +1,203 @@
+"""
+Product catalog behind get_product_info
+Products are loaded from a JSON data file and indexed once by category,
+certification, allergen-free flag, use case and ingredient, so a faceted query
+is a bitwise AND of precomputed position bitmaps instead of a scan of every product
+"""
+
+import json
+import os
+from collections import defaultdict
+from typing import Dict, Any, Iterable, List, Optional, Set
+
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "business_data", "products.json")
+
+# Filter terms whose bitmaps are cached per facet
+MAX_CACHED_TERMS = 1024
+
+# Text facets: filter argument -> fields of a product whose values it matches
+TEXT_FACETS = {
+    "category": ("category", "name"),
+    "certification": ("certifications",),
+    "use_case": ("use_cases",),
+    "ingredient": ("ingredients",)
+}
+
+
+def normalize(value: str) -> str:
+    """Lowercase words separated by single spaces ("All-Purpose" and "all_purpose" -> "all purpose")"""
+    return " ".join(value.lower().replace("_", " ").replace("-", " ").split())
+
+
+def _field_values(product: Dict[str, Any], field: str) -> List[str]:
+    value = product.get(field)
+    if value is None:
+        return []
+    if field == "ingredients" and isinstance(value, str):
+        # "Vinegar, plant-based alcohols, filtered water" -> one value per ingredient
+        return [part for part in value.split(",") if part.strip()]
+    return value if isinstance(value, list) else [value]
+
+
+def to_bitmap(positions: Iterable[int]) -> int:
+    """Integer with bit i set for every position i"""
+    positions = list(positions)
+    if not positions:
+        return 0
+    bits = bytearray(max(positions) // 8 + 1)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, "little")
+
+
+def from_bitmap(bitmap: int, limit: Optional[int] = None) -> List[int]:
+    """Set bit positions in increasing order (the first `limit` of them)"""
+    # Skipping runs of zeros with str.find is much faster than shifting the integer bit by bit
+    bits = bin(bitmap)[:1:-1]
+    positions = []
+    position = bits.find("1")
+    while position != -1 and (limit is None or len(positions) < limit):
+        positions.append(position)
+        position = bits.find("1", position + 1)
+    return positions
+
+
+class FacetIndex:
+    """
+    Index of one text facet: normalized value -> product positions
+
+    A filter term matches a value when its words occur in the value as a
+    contiguous sequence ("leaping bunny" matches "Leaping Bunny Certified",
+    "peroxide" matches "Hydrogen peroxide"). Candidate values are found
+    through a word -> values index. The positions of every value a term
+    matches are merged into one bitmap, cached per term, so combining
+    filters is a bitwise AND.
+    """
+
+    def __init__(self, max_cached_terms: int = MAX_CACHED_TERMS):
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        self.labels: Dict[str, str] = {}
+        self.max_cached_terms = max_cached_terms
+        self._values_by_word: Dict[str, Set[str]] = defaultdict(set)
+        self._bitmaps: Dict[str, int] = {}
+
+    def add(self, value: str, position: int):
+        """Index a value of the product at position"""
+        key = normalize(value)
+        if not key:
+            return
+        self.postings[key].append(position)
+        self.labels.setdefault(key, value.strip())
+        for word in key.split():
+            self._values_by_word[word].add(key)
+        self._bitmaps.clear()
+
+    def lookup(self, term: str) -> int:
+        """Bitmap of the products with a value matching the term"""
+        needle = normalize(term)
+        bitmap = self._bitmaps.get(needle)
+        if bitmap is not None:
+            return bitmap
+
+        words = needle.split()
+        keys = [key for key in self._values_by_word.get(words[0], ()) if f" {needle} " in f" {key} "] if words else []
+        bitmap = to_bitmap(position for key in keys for position in self.postings[key])
+        if len(self._bitmaps) >= self.max_cached_terms:
+            self._bitmaps.clear()
+        self._bitmaps[needle] = bitmap
+        return bitmap
+
+
+class ProductCatalog:
+    """
+    Products with secondary indexes for faceted search
+
+    Products keep their file order; ids must be unique. Returned product
+    dicts are the catalog's own and must not be modified.
+    """
+
+    def __init__(self, products: List[Dict[str, Any]]):
+        self.products = list(products)
+        self._positions = {}
+        self._indexes = {facet: FacetIndex() for facet in TEXT_FACETS}
+        allergen_free = {True: [], False: []}
+
+        for position, product in enumerate(self.products):
+            if product["id"] in self._positions:
+                raise ValueError(f"Duplicate product id '{product['id']}'")
+            self._positions[product["id"]] = position
+            for facet, fields in TEXT_FACETS.items():
+                for field in fields:
+                    for value in _field_values(product, field):
+                        self._indexes[facet].add(value, position)
+            allergen_free[bool(product.get("allergen_free"))].append(position)
+        self._allergen_free = {flag: to_bitmap(positions) for flag, positions in allergen_free.items()}
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_CATALOG_PATH) -> "ProductCatalog":
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["products"] if isinstance(data, dict) else data)
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        position = self._positions.get(product_id)
+        return self.products[position] if position is not None else None
+
+    def search(
+        self,
+        category: Optional[str] = None,
+        certification: Optional[str] = None,
+        allergen_free: Optional[bool] = None,
+        use_case: Optional[str] = None,
+        ingredient: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Products matching every given filter, in catalog order
+
+        Args:
+            category: Category, product id or name term (e.g. "bathroom", "sanitizer")
+            certification: Certification term (e.g. "leaping bunny", "safer choice")
+            allergen_free: Only allergen-free (True) or only other (False) products
+            use_case: Use case term (e.g. "windows", "hardwood")
+            ingredient: Ingredient term (e.g. "citric acid", "vinegar")
+            limit: Maximum number of products returned
+
+        Returns:
+            Matching products (all products when no filter is given)
+        """
+        filters = [
+            self._indexes[facet].lookup(term)
+            for facet, term in (
+                ("category", category), ("certification", certification),
+                ("use_case", use_case), ("ingredient", ingredient)
+            )
+            if term
+        ]
+        if allergen_free is not None:
+            filters.append(self._allergen_free[bool(allergen_free)])
+
+        if not filters:
+            positions = range(len(self.products) if limit is None else min(limit, len(self.products)))
+        else:
+            matched = filters[0]
+            for bitmap in filters[1:]:
+                matched &= bitmap
+            positions = from_bitmap(matched, limit)
+        return [self.products[position] for position in positions]
+
+    def facets(self) -> Dict[str, List[str]]:
+        """Values of each text facet (as spelled in the data), for "no match" hints"""
+        return {
+            facet: sorted(index.labels.values())
+            for facet, index in self._indexes.items()
+            if facet != "category"
+        }
+
+    def categories(self) -> List[str]:
+        return sorted({product["category"] for product in self.products if product.get("category")})
+
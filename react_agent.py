@@ -3,22 +3,68 @@ Custom ReAct Agent Implementation using LangGraph
 Building a state-machine based ReAct loop without using pre-built executors
 """
 
+import asyncio
+import hashlib
 import json
 import os
-from typing import TypedDict, Annotated, List, Dict, Any, Optional
+import time
+import threading
+import uuid
+from collections import OrderedDict, deque
+from contextlib import ExitStack
+from typing import TYPE_CHECKING, TypedDict, Annotated, AsyncIterator, Callable, List, Dict, Any, Optional
 from datetime import datetime
 import operator
 
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
-from langgraph.graph import StateGraph, END
-from dotenv import load_dotenv
 
-from tools import TOOL_FUNCTIONS, TOOL_DEFINITIONS
+from tools import TOOL_FUNCTIONS, TOOL_DEFINITIONS, SIDE_EFFECT_TOOLS
+from pricing import (
+    extract_usage, compute_cost, summarize_usage, estimate_message_tokens, estimate_tokens,
+    TOKENS_PER_MESSAGE
+)
+from llm_scheduler import LLMScheduler, get_scheduler
+from latency_policy import LatencyPolicy, summarize_latency_policy
+from response_cache import SemanticResponseCache
+from session_memory import SessionStore
+from thought_router import route_thought, predict_actions
+from observation_projection import OBSERVATION_CHARS, project_observation, query_intents
+from memory_profiler import MemoryProfiler, format_bytes
+from cpu_profiler import CPUProfiler, format_profile
+from llm_cassette import Cassette
+from tenants import DEFAULT_TENANT
+from shared_tools import get_scope
+from tool_prefetch import EMPTY_SUMMARY, Prefetch, ToolPrefetcher, get_prefetcher
 
+# langchain_openai (with the OpenAI SDK), langgraph and dotenv are imported on
+# first use, so importing this module stays cheap for CLI tools and workers
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+    from langchain_core.runnables import RunnableLambda
+    from langgraph.graph import StateGraph
 
-# Load environment variables
-load_dotenv()
+
+_env_loaded = False
+
+
+def load_environment():
+    """Load environment variables from .env (once, before the first API client is created)"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+# Runs whose prefetched tool calls are kept (older ones, e.g. of runs that raised, are closed)
+MAX_OPEN_PREFETCHES = 1024
+
+# Interaction logs an agent keeps unless told otherwise, so long-lived agents stay bounded
+DEFAULT_MAX_LOGS = 100
+
+# Consecutive steps without new information before the loop responds; a single repeated
+# lookup is common in a run that is still making progress, so one is not enough
+DEFAULT_STALL_THRESHOLD = 2
 
 
 class AgentState(TypedDict):
@@ -34,6 +80,18 @@ class AgentState(TypedDict):
     final_answer: Optional[str]  # Final answer to return
     persona_name: str  # Name of the persona being used
     config: Dict[str, Any]  # LLM configuration
+    models: Dict[str, str]  # Model serving each LLM node ("think", "respond")
+    session_id: Optional[str]  # Conversation this run belongs to
+    tenant_id: str  # Business location whose data the tools use
+    session_context: str  # Rolling summary of earlier turns in the conversation
+    node_metrics: Annotated[List[Dict], operator.add]  # Per-node timings and token usage
+    observation_cache: Dict[str, str]  # Observations of this run keyed by action and projected fields
+    duplicate_actions: int  # Repeated actions answered from the cache
+    stall_count: int  # Consecutive steps without new information
+    iterations_saved: int  # Upper bound on the iterations skipped by stall detection
+    route: Optional[Dict[str, Any]]  # Decision and parsed action of the last thought
+    prefetch_id: Optional[str]  # Speculative tool calls of this run (see tool_prefetch.py)
+    tool_scope: Optional[str]  # Tool results shared with the other runs of a request (see shared_tools.py)
 
 
 class ReActAgent:
@@ -50,7 +108,28 @@ class ReActAgent:
         temperature: float = 0.7,
         max_tokens: int = 1000,
         top_p: float = 1.0,
-        max_iterations: int = 5
+        max_iterations: int = 5,
+        stall_threshold: int = DEFAULT_STALL_THRESHOLD,
+        price_table: Optional[Dict[str, Dict[str, float]]] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        latency_policy: Optional[LatencyPolicy] = None,
+        think_model: Optional[str] = None,
+        respond_model: Optional[str] = None,
+        escalation_model: Optional[str] = None,
+        min_answer_chars: int = 40,
+        response_cache: Optional[SemanticResponseCache] = None,
+        session_store: Optional[SessionStore] = None,
+        checkpointer: Optional[Any] = None,
+        llm_factory: Optional[Callable[[str], Any]] = None,
+        prompt_hash: Optional[str] = None,
+        prompt_tokens: Optional[int] = None,
+        max_logs: Optional[int] = DEFAULT_MAX_LOGS,
+        memory_profiler: Optional[MemoryProfiler] = None,
+        observation_focus: Optional[List[str]] = None,
+        prefetch_tools: int = 2,
+        prefetcher: Optional[ToolPrefetcher] = None,
+        cassette: Optional[Cassette] = None,
+        cpu_profiler: Optional[CPUProfiler] = None
     ):
         """
         Initialize the ReAct agent with a specific persona and configuration
@@ -63,46 +142,136 @@ class ReActAgent:
             max_tokens: Maximum tokens in response
             top_p: Top-p sampling parameter
             max_iterations: Maximum reasoning iterations
+            stall_threshold: Consecutive steps without new information (repeated action
+                or already-seen observation) before skipping straight to RESPOND; the
+                iterations_saved it logs assumes every remaining step would have run,
+                so it is an upper bound
+            price_table: Per-model prices for cost accounting (defaults to pricing.MODEL_PRICES)
+            scheduler: Rate-limit scheduler for LLM calls (defaults to the process-wide one)
+            latency_policy: Deadline, hedging and fallback settings for LLM calls
+            think_model: Model for THINK steps (defaults to model_name)
+            respond_model: Model for the final RESPOND step (defaults to model_name)
+            escalation_model: Stronger model that re-runs the query when the cheap
+                path hits max_iterations or its answer fails the quality check
+            min_answer_chars: Minimum answer length accepted by the quality check
+            response_cache: Semantic cache answering near-duplicate questions without a run
+            session_store: Store of multi-turn session memories (in-process by default;
+                use session_memory.SQLiteSessionStore to share sessions between workers)
+            checkpointer: LangGraph checkpointer making runs durable and resumable by
+                thread id (see checkpointing.create_checkpointer)
+            llm_factory: Builds the chat model for a model name (defaults to ChatOpenAI);
+                benchmarks pass fake_llm.SimulatedChatModel to run without API calls
+            prompt_hash: Precomputed content hash of system_prompt (persona registry)
+            prompt_tokens: Precomputed token count of system_prompt (persona registry)
+            max_logs: Interaction logs kept (oldest dropped first); None keeps all,
+                e.g. to save every run of a script with save_logs()
+            memory_profiler: Profiles each run() (net growth, peak and top allocation
+                sites, logged under "memory"); see memory_profiler.MemoryProfiler
+            observation_focus: Tool result fields always kept in observations, whatever
+                the question asks (persona registry; see observation_projection.FIELD_INTENTS)
+            prefetch_tools: Tool calls predicted from the user message and run during the
+                first THINK call, so OBSERVE finds their results ready; 0 disables speculation
+            prefetcher: Thread pool running prefetched calls (defaults to the process-wide one)
+            cassette: Records every LLM call of this agent, or replays recorded ones
+                instead of calling the model, without rate limits unless a scheduler
+                is given (see llm_cassette.Cassette)
+            cpu_profiler: Samples the stacks of (a fraction of) run() calls; profiled runs
+                log their top functions under "cpu" and can write collapsed stacks for
+                flame graphs (see cpu_profiler.CPUProfiler)
         """
         self.persona_name = persona_name
         self.system_prompt = system_prompt
         self.max_iterations = max_iterations
+        self.stall_threshold = stall_threshold
+        self.system_prompt_tokens = prompt_tokens or estimate_tokens(system_prompt)
+        self.price_table = price_table
+        self.scheduler = scheduler or (cassette and cassette.scheduler()) or get_scheduler()
+        self.latency_policy = latency_policy or LatencyPolicy()
+        self.min_answer_chars = min_answer_chars
+        self.response_cache = response_cache
+        self.session_store = session_store or SessionStore()
+        self.checkpointer = checkpointer
+        self.llm_factory = llm_factory or self._create_llm
+        self.cassette = cassette
+        self.memory_profiler = memory_profiler
+        self.cpu_profiler = cpu_profiler
+        self.observation_focus = sorted(observation_focus or [])
+        self.prefetch_tools = prefetch_tools
+        self.prefetcher = prefetcher or (get_prefetcher() if prefetch_tools else None)
+        self._prefetches: "OrderedDict[str, Prefetch]" = OrderedDict()
+        self._prefetches_lock = threading.Lock()
+        # Usage of losing hedges / fallbacks, billed to the next run that finishes
+        self._abandoned_usage: List[Dict[str, Any]] = []
+        self._abandoned_lock = threading.Lock()
 
         # LLM configuration
         self.config = {
             "model_name": model_name,
             "temperature": temperature,
             "max_tokens": max_tokens,
-            "top_p": top_p
+            "top_p": top_p,
+            "think_model": think_model or model_name,
+            "respond_model": respond_model or model_name,
+            "escalation_model": escalation_model
         }
 
-        # Initialize LLM
-        self.llm = ChatOpenAI(
-            model=model_name,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            model_kwargs={"top_p": top_p}
-        )
+        # Initialize one LLM per model in use (retries are handled by the shared scheduler)
+        model_names = {self.config["think_model"], self.config["respond_model"]}
+        if escalation_model:
+            model_names.add(escalation_model)
+        # Optional fallback model raced in when a call's deadline is at risk
+        if self.latency_policy.fallback_model:
+            model_names.add(self.latency_policy.fallback_model)
+        llm_factory = self.llm_factory
+        if cassette is not None:
+            sampling = {key: self.config[key] for key in ("temperature", "max_tokens", "top_p")}
+            llm_factory = cassette.wrap(llm_factory, sampling)
+        self.llms = {name: llm_factory(name) for name in model_names}
+
+        # Cached answers are only shared between agents with the same persona and config
+        prompt_hash = prompt_hash or hashlib.sha256(system_prompt.encode()).hexdigest()[:16]
+        self.cache_namespace = f"{persona_name}|{prompt_hash}|{json.dumps(self.config, sort_keys=True)}"
+        if self.observation_focus:
+            self.cache_namespace += "|" + ",".join(self.observation_focus)
 
         # Build the graph
         self.graph = self._build_graph()
 
         # Logging
-        self.interaction_logs = []
+        self.interaction_logs = deque(maxlen=max_logs)
+
+    def _create_llm(self, model_name: str) -> "ChatOpenAI":
+        """Create a chat model with this agent's sampling configuration"""
+        from langchain_openai import ChatOpenAI
+
+        load_environment()
+        return ChatOpenAI(
+            model=model_name,
+            temperature=self.config["temperature"],
+            max_tokens=self.config["max_tokens"],
+            model_kwargs={"top_p": self.config["top_p"]},
+            max_retries=0,
+            # Abandoned hedges and timed-out calls must not linger past the deadline
+            timeout=self.latency_policy.timeout
+        )
 
-    def _build_graph(self) -> StateGraph:
+    def _build_graph(self) -> "StateGraph":
         """
         Build the LangGraph state machine for ReAct loop
 
         Flow: START -> think -> decide -> [act -> observe -> think] -> respond -> END
+        A stalled loop (no new information) goes from observe straight to respond.
         """
+        from langgraph.graph import StateGraph, END
+
         workflow = StateGraph(AgentState)
 
-        # Add nodes
-        workflow.add_node("think", self._think_node)
-        workflow.add_node("act", self._act_node)
-        workflow.add_node("observe", self._observe_node)
-        workflow.add_node("respond", self._respond_node)
+        # Add nodes (each one instrumented for latency and token analytics)
+        # (LLM nodes also get a native async variant, used by arun / astream)
+        workflow.add_node("think", self._instrumented_node("think", self._think_node, self._athink_node))
+        workflow.add_node("act", self._instrumented_node("act", self._act_node))
+        workflow.add_node("observe", self._instrumented_node("observe", self._observe_node, self._aobserve_node))
+        workflow.add_node("respond", self._instrumented_node("respond", self._respond_node, self._arespond_node))
 
         # Set entry point
         workflow.set_entry_point("think")
@@ -119,20 +288,178 @@ class ReActAgent:
         )
 
         workflow.add_edge("act", "observe")
-        workflow.add_edge("observe", "think")  # Loop back to think
+        workflow.add_conditional_edges(
+            "observe",
+            self._should_continue_or_respond,
+            {
+                "think": "think",  # Loop back to think
+                "respond": "respond"
+            }
+        )
         workflow.add_edge("respond", END)
 
-        return workflow.compile()
+        return workflow.compile(checkpointer=self.checkpointer)
+
+    def _instrumented_node(self, node_name: str, node_fn, anode_fn=None) -> "RunnableLambda":
+        """
+        Wrap a node so one metrics entry is appended to `node_metrics`
+
+        Nodes return only the channels they change, and list channels only
+        their new entries, since the operator.add reducers append whatever is
+        returned. The metrics entry holds the node's wall-clock duration plus
+        anything the node reported under the transient "metrics" key (e.g.
+        token usage of its LLM call).
+
+        graph.invoke runs `node_fn`; graph.ainvoke runs `anode_fn` (nodes
+        without blocking I/O, such as ACT, run `node_fn` on the event loop).
+        """
+        def record(state: AgentState, start: float, result: Dict[str, Any]) -> Dict[str, Any]:
+            entry = {
+                "node": node_name,
+                "iteration": state["iteration"],
+                "duration": time.perf_counter() - start
+            }
+            entry.update(result.pop("metrics", None) or {})
+            result["node_metrics"] = [entry]
+            return result
+
+        def instrumented(state: AgentState) -> Dict[str, Any]:
+            start = time.perf_counter()
+            return record(state, start, node_fn(state))
+
+        async def ainstrumented(state: AgentState) -> Dict[str, Any]:
+            start = time.perf_counter()
+            result = await anode_fn(state) if anode_fn else node_fn(state)
+            return record(state, start, result)
+
+        from langchain_core.runnables import RunnableLambda
+
+        return RunnableLambda(instrumented, afunc=ainstrumented, name=node_name)
+
+    def _estimate_call_tokens(self, messages: List) -> int:
+        """Prompt plus max completion tokens reserved with the scheduler for one call"""
+        # messages[0] is always the system prompt, whose tokens are counted once per agent
+        return (
+            self.system_prompt_tokens + TOKENS_PER_MESSAGE
+            + estimate_message_tokens(messages[1:]) + self.config["max_tokens"]
+        )
+
+    def _call_metrics(self, model_name: str, response: Any, estimated_tokens: int, stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Reconcile the scheduler's token bucket and build the metrics of a completed call"""
+        usage = extract_usage(response)
+        self.scheduler.record_usage(model_name, estimated_tokens, usage["total_tokens"])
+
+        metrics = {"model": model_name, **usage, **stats}
+        metrics["cost"] = compute_cost(model_name, usage, self.price_table)
+        return metrics
+
+    def _abandoned_call(self, estimated_tokens: int) -> Callable[[tuple], None]:
+        """Latency policy callback billing a completed attempt that lost the race"""
+        def record(result: tuple):
+            response, _, model_name = result
+            metrics = self._call_metrics(model_name, response, estimated_tokens, {})
+            metrics["node"] = "abandoned"
+            with self._abandoned_lock:
+                self._abandoned_usage.append(metrics)
+        return record
+
+    def _take_abandoned_usage(self) -> List[Dict[str, Any]]:
+        with self._abandoned_lock:
+            usage, self._abandoned_usage = self._abandoned_usage, []
+        return usage
+
+    def _invoke_llm(self, messages: List, model_name: str) -> tuple:
+        """
+        Call `model_name` under the latency policy and the shared scheduler
+
+        Returns:
+            (response, metrics) where metrics holds the serving model, token
+            counts, cost, scheduler queue wait / retries and hedge / fallback stats
+        """
+        estimated_tokens = self._estimate_call_tokens(messages)
+
+        def attempt(llm, model_name):
+            def call(cancel):
+                response, call_stats = self.scheduler.call(
+                    model_name,
+                    lambda: llm.invoke(messages),
+                    estimated_tokens,
+                    cancel
+                )
+                return response, call_stats, model_name
+            return call
+
+        fallback = None
+        fallback_model = self.latency_policy.fallback_model
+        if fallback_model and fallback_model != model_name:
+            fallback = attempt(self.llms[fallback_model], fallback_model)
+
+        (response, call_stats, model_name), policy_stats = self.latency_policy.execute(
+            model_name,
+            attempt(self.llms[model_name], model_name),
+            fallback,
+            self._abandoned_call(estimated_tokens)
+        )
+        return response, self._call_metrics(model_name, response, estimated_tokens, {**call_stats, **policy_stats})
 
-    def _think_node(self, state: AgentState) -> AgentState:
+    async def _ainvoke_llm(self, messages: List, model_name: str) -> tuple:
+        """
+        Async _invoke_llm: llm.ainvoke under the async latency policy and scheduler
+
+        Returns:
+            (response, metrics) as for _invoke_llm
+        """
+        estimated_tokens = self._estimate_call_tokens(messages)
+
+        def attempt(llm, model_name):
+            async def call(cancel):
+                response, call_stats = await self.scheduler.acall(
+                    model_name,
+                    lambda: llm.ainvoke(messages),
+                    estimated_tokens,
+                    cancel
+                )
+                return response, call_stats, model_name
+            return call
+
+        fallback = None
+        fallback_model = self.latency_policy.fallback_model
+        if fallback_model and fallback_model != model_name:
+            fallback = attempt(self.llms[fallback_model], fallback_model)
+
+        (response, call_stats, model_name), policy_stats = await self.latency_policy.aexecute(
+            model_name,
+            attempt(self.llms[model_name], model_name),
+            fallback,
+            self._abandoned_call(estimated_tokens)
+        )
+        return response, self._call_metrics(model_name, response, estimated_tokens, {**call_stats, **policy_stats})
+
+    def _think_node(self, state: AgentState) -> Dict[str, Any]:
         """
         THINK: Agent reasons about what to do next
         """
+        messages = self._think_prompt(state)
+        response, metrics = self._invoke_llm(messages, state["models"]["think"])
+        return self._think_result(response, metrics)
+
+    async def _athink_node(self, state: AgentState) -> Dict[str, Any]:
+        """THINK on the async path"""
+        messages = self._think_prompt(state)
+        response, metrics = await self._ainvoke_llm(messages, state["models"]["think"])
+        return self._think_result(response, metrics)
+
+    def _think_prompt(self, state: AgentState) -> List:
+        """Messages for a THINK call"""
         print(f"\n[{self.persona_name}] THINKING (Iteration {state['iteration']})...")
 
         # Build messages for the LLM with limited context to avoid token limits
         messages = [SystemMessage(content=self.system_prompt)]
 
+        # Bounded summary of earlier turns in this conversation
+        if state["session_context"]:
+            messages.append(HumanMessage(content=state["session_context"]))
+
         # Only include the original user message to save tokens
         if state["messages"]:
             messages.append(state["messages"][0])  # Original user query
@@ -144,25 +471,29 @@ class ReActAgent:
             recent_thoughts = state["thoughts"][-2:]
             recent_obs = state["observations"][-2:]
             for i, (thought, obs) in enumerate(zip(recent_thoughts, recent_obs), 1):
-                # Truncate long content
+                # Truncate long content (observations are already projected within budget)
                 thought_short = thought[:150] + "..." if len(thought) > 150 else thought
-                obs_short = obs[:250] + "..." if len(obs) > 250 else obs
+                obs_short = obs[:OBSERVATION_CHARS] + "..." if len(obs) > OBSERVATION_CHARS else obs
                 reasoning_context += f"\nStep {i}: {thought_short}\nData: {obs_short}\n"
             messages.append(HumanMessage(content=reasoning_context))
 
-        # Get the model's response
-        response = self.llm.invoke(messages)
+        return messages
 
+    def _think_result(self, response: Any, metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """State update of a THINK call"""
         # Extract the thought
         thought = response.content
 
-        # Update state
-        state["thoughts"].append(thought)
-        state["messages"].append(AIMessage(content=thought))
-
         print(f"Thought: {thought[:200]}...")
 
-        return state
+        # Return only the new entries; the operator.add reducers append them
+        return {
+            "thoughts": [thought],
+            "messages": [AIMessage(content=thought)],
+            "metrics": metrics,
+            # Routed once here, then read by DECIDE and ACT
+            "route": route_thought(thought)
+        }
 
     def _should_act_or_respond(self, state: AgentState) -> str:
         """
@@ -173,42 +504,14 @@ class ReActAgent:
             print(f"[{self.persona_name}] Max iterations reached. Responding with current knowledge.")
             return "respond"
 
-        # Check if the last thought indicates we need to use a tool
-        last_thought = state["thoughts"][-1] if state["thoughts"] else ""
-
-        # Look for action indicators in the thought
-        # Check if the thought mentions any tool names or action keywords
-        action_keywords = [
-            "search", "check", "get", "record", "look up", "find",
-            "tool", "function", "call", "need to", "should use"
-        ]
-
-        tool_names = [tool["name"] for tool in TOOL_DEFINITIONS]
-
-        last_thought_lower = last_thought.lower()
-
-        # Check for tool mentions
-        for tool_name in tool_names:
-            if tool_name in last_thought_lower:
-                print(f"[{self.persona_name}] Decision: ACT (tool '{tool_name}' mentioned)")
-                return "act"
-
-        # Check for action keywords
-        for keyword in action_keywords:
-            if keyword in last_thought_lower:
-                print(f"[{self.persona_name}] Decision: ACT (keyword '{keyword}' found)")
-                return "act"
-
-        # Check if thought indicates we have enough info to answer
-        answer_keywords = [
-            "answer:", "response:", "i can tell", "i know that",
-            "based on", "the answer is", "i would say"
-        ]
-
-        for keyword in answer_keywords:
-            if keyword in last_thought_lower:
-                print(f"[{self.persona_name}] Decision: RESPOND (answer keyword found)")
-                return "respond"
+        # Check if the last thought indicates we need to use a tool or can answer
+        route = self._route(state)
+        if route["decision"] == "act":
+            print(f"[{self.persona_name}] Decision: ACT ({route['reason']})")
+            return "act"
+        if route["decision"] == "respond":
+            print(f"[{self.persona_name}] Decision: RESPOND ({route['reason']})")
+            return "respond"
 
         # Default: if we have observations, respond; otherwise act
         if state["observations"]:
@@ -218,21 +521,47 @@ class ReActAgent:
             print(f"[{self.persona_name}] Decision: ACT (need more information)")
             return "act"
 
-    def _act_node(self, state: AgentState) -> AgentState:
+    def _route(self, state: AgentState) -> Dict[str, Any]:
+        """Routing of the last thought (computed by THINK; re-derived for checkpoints that predate it)"""
+        if state.get("route") is not None:
+            return state["route"]
+        return route_thought(state["thoughts"][-1] if state["thoughts"] else "")
+
+    def _should_continue_or_respond(self, state: AgentState) -> str:
+        """
+        STALL CHECK: Skip further THINK calls once the loop stops making progress
+        """
+        if state["stall_count"] >= self.stall_threshold and state["iteration"] < state["max_iterations"]:
+            print(f"[{self.persona_name}] Loop stalled ({state['stall_count']} step(s) without new information). Responding.")
+            return "respond"
+        return "think"
+
+    @staticmethod
+    def _action_key(action: Dict[str, Any]) -> str:
+        """Canonical key identifying a tool call and its arguments"""
+        return action["tool"] + ":" + json.dumps(action["parameters"], sort_keys=True)
+
+    @staticmethod
+    def _observation_key(action_key: str, intents: frozenset) -> str:
+        """
+        Observation cache key: the same tool call projected onto the same fields
+
+        A later turn asking about other fields (e.g. pricing after availability)
+        runs the tool again instead of reusing an observation without them.
+        """
+        return action_key + "#" + ",".join(sorted(intents)) if intents else action_key
+
+    def _act_node(self, state: AgentState) -> Dict[str, Any]:
         """
         ACT: Execute a tool based on the thought
         """
         print(f"\n[{self.persona_name}] ACTING...")
 
-        # Parse the last thought to determine which tool to call
-        last_thought = state["thoughts"][-1]
-
-        # Try to extract tool name and parameters from the thought
+        # Tool call parsed from the last thought (see thought_router.py)
         # This is a simple parser - in production you'd want more robust parsing
-        action = self._parse_action_from_thought(last_thought)
+        action = self._route(state)["action"]
 
         if action:
-            state["actions"].append(action)
             print(f"Action: {action['tool']}({action['parameters']})")
         else:
             # If we can't parse an action, use a default
@@ -241,50 +570,148 @@ class ReActAgent:
                 "tool": "search_services",
                 "parameters": {"query": "all services"}
             }
-            state["actions"].append(action)
 
-        return state
+        return {"actions": [action]}
 
-    def _observe_node(self, state: AgentState) -> AgentState:
+    def _observe_node(self, state: AgentState) -> Dict[str, Any]:
         """
         OBSERVE: Get the result from the tool execution
         """
+        last_action, intents, action_key = self._observe_action(state)
+        fetched = None
+        if action_key not in state["observation_cache"]:
+            try:
+                result = self._fetch_tool_result(last_action, state, action_key)
+                fetched = self._observation(last_action, state, intents, result)
+            except Exception as e:
+                fetched = self._tool_error(last_action, e)
+        return self._observe_result(state, action_key, fetched)
+
+    async def _aobserve_node(self, state: AgentState) -> Dict[str, Any]:
+        """OBSERVE on the async path: tools (file loads, record writes) and waits run off the event loop"""
+        last_action, intents, action_key = self._observe_action(state)
+        fetched = None
+        if action_key not in state["observation_cache"]:
+            try:
+                result = await self._afetch_tool_result(last_action, state, action_key)
+                fetched = self._observation(last_action, state, intents, result)
+            except Exception as e:
+                fetched = self._tool_error(last_action, e)
+        return self._observe_result(state, action_key, fetched)
+
+    def _observe_action(self, state: AgentState) -> tuple:
+        """(last action, intents of the question, observation cache key) for OBSERVE"""
         print(f"\n[{self.persona_name}] OBSERVING...")
 
         # Get the last action
         last_action = state["actions"][-1]
+        # Fields of the result the question (and the persona) is about
+        intents = query_intents(state["messages"][0].content, self.observation_focus)
+        return last_action, intents, self._observation_key(self._action_key(last_action), intents)
+
+    def _fetch_tool_result(self, action: Dict[str, Any], state: AgentState, action_key: str) -> Any:
+        """Result of a tool call, prefetched for the run or executed now"""
+        prefetched, result = self._take_prefetched(state.get("prefetch_id"), action_key)
+        if prefetched:
+            print(f"[{self.persona_name}] Using prefetched result")
+            return result
+        return self._call_tool(action, state)
+
+    async def _afetch_tool_result(self, action: Dict[str, Any], state: AgentState, action_key: str) -> Any:
+        """_fetch_tool_result without blocking the event loop: prefetches are awaited, tools run on a worker thread"""
+        prefetched, result = await self._atake_prefetched(state.get("prefetch_id"), action_key)
+        if prefetched:
+            print(f"[{self.persona_name}] Using prefetched result")
+            return result
+        return await self._acall_tool(action, state)
+
+    @staticmethod
+    def _observation(action: Dict[str, Any], state: AgentState, intents: frozenset, result: Any) -> tuple:
+        """(observation, raw result tokens): only the records and fields relevant to the question"""
+        query = state["messages"][0].content
+        return project_observation(action["tool"], result, query, intents), estimate_tokens(str(result))
+
+    @staticmethod
+    def _tool_error(action: Dict[str, Any], error: Exception) -> tuple:
+        observation = f"Error executing tool '{action['tool']}': {str(error)}"
+        return observation, estimate_tokens(observation)
+
+    def _observe_result(self, state: AgentState, action_key: str, fetched: Optional[tuple]) -> Dict[str, Any]:
+        """State update of OBSERVE; `fetched` is (observation, raw tokens), None when the call was made before"""
+        cache = state["observation_cache"]
+        duplicate_actions = state["duplicate_actions"]
+
+        if fetched is None:
+            # Same tool call with the same arguments: reuse the earlier observation
+            observation = cache[action_key]
+            raw_tokens = 0
+            duplicate_actions += 1
+            new_information = False
+            print(f"[{self.persona_name}] Duplicate action, reusing earlier observation")
+        else:
+            observation, raw_tokens = fetched
+            new_information = observation not in cache.values()
+            cache = {**cache, action_key: observation}
 
-        # Execute the tool
-        tool_name = last_action["tool"]
-        parameters = last_action["parameters"]
-
-        try:
-            tool_function = TOOL_FUNCTIONS[tool_name]
-            result = tool_function(**parameters)
-            # Truncate result to avoid token overflow
-            result_str = str(result)
-            if len(result_str) > 500:
-                result_str = result_str[:500] + "... (truncated)"
-            observation = f"Tool '{tool_name}' returned: {result_str}"
-        except Exception as e:
-            observation = f"Error executing tool '{tool_name}': {str(e)}"
-
-        # Update state with truncated observation
-        state["observations"].append(observation)
-        # Don't add to messages at all - we'll use observations directly in think node
-        # state["messages"].append(AIMessage(content=f"Observation: {observation}"))
+        stall_count = 0 if new_information else state["stall_count"] + 1
 
         print(f"Observation: {observation[:200]}...")
 
         # Increment iteration
-        state["iteration"] += 1
-
-        return state
-
-    def _respond_node(self, state: AgentState) -> AgentState:
+        iteration = state["iteration"] + 1
+
+        update = {
+            # Don't add to messages at all - we'll use observations directly in think node
+            "observations": [observation],
+            "iteration": iteration,
+            "observation_cache": cache,
+            "duplicate_actions": duplicate_actions,
+            "stall_count": stall_count,
+            "metrics": {
+                "observation_tokens": estimate_tokens(observation),
+                "raw_observation_tokens": raw_tokens
+            }
+        }
+        if stall_count >= self.stall_threshold:
+            # Upper bound: the loop might have answered before max_iterations anyway
+            update["iterations_saved"] = max(0, state["max_iterations"] - iteration)
+
+        return update
+
+    @staticmethod
+    def _call_tool(action: Dict[str, Any], state: AgentState) -> Any:
+        """Execute a tool call, through the run's shared tool scope when it has one"""
+        tenant_id = state.get("tenant_id") or DEFAULT_TENANT
+        shared = get_scope(state.get("tool_scope"))
+        if shared is not None:
+            return shared.call(action, tenant_id)
+        return TOOL_FUNCTIONS[action["tool"]](**action["parameters"], tenant_id=tenant_id)
+
+    @staticmethod
+    async def _acall_tool(action: Dict[str, Any], state: AgentState) -> Any:
+        """_call_tool off the event loop; a call another run of the scope is making is awaited"""
+        tenant_id = state.get("tenant_id") or DEFAULT_TENANT
+        shared = get_scope(state.get("tool_scope"))
+        if shared is not None:
+            return await shared.acall(action, tenant_id)
+        return await asyncio.to_thread(TOOL_FUNCTIONS[action["tool"]], **action["parameters"], tenant_id=tenant_id)
+
+    def _respond_node(self, state: AgentState) -> Dict[str, Any]:
         """
         RESPOND: Generate final answer based on thoughts and observations
         """
+        messages = self._respond_prompt(state)
+        response, metrics = self._invoke_llm(messages, state["models"]["respond"])
+        return self._respond_result(response, metrics)
+
+    async def _arespond_node(self, state: AgentState) -> Dict[str, Any]:
+        """RESPOND on the async path"""
+        messages = self._respond_prompt(state)
+        response, metrics = await self._ainvoke_llm(messages, state["models"]["respond"])
+        return self._respond_result(response, metrics)
+
+    def _respond_prompt(self, state: AgentState) -> List:
+        """Messages for the RESPOND call"""
         print(f"\n[{self.persona_name}] RESPONDING...")
 
         # Build concise context summary to avoid token limits
@@ -295,160 +722,575 @@ class ReActAgent:
             context += "Key findings:\n"
             # Only last observation or summary
             last_obs = state["observations"][-1]
-            context += last_obs[:400] + "..." if len(last_obs) > 400 else last_obs
+            context += last_obs[:OBSERVATION_CHARS] + "..." if len(last_obs) > OBSERVATION_CHARS else last_obs
 
         context += "\n\nProvide a helpful, friendly answer to the user's question."
 
         # Get final response with minimal context
         messages = [SystemMessage(content=self.system_prompt)]
+        if state["session_context"]:
+            messages.append(HumanMessage(content=state["session_context"]))
         # Only original query
         if state["messages"]:
             messages.append(state["messages"][0])
         messages.append(HumanMessage(content=context))
 
-        response = self.llm.invoke(messages)
-        final_answer = response.content
+        return messages
 
-        state["final_answer"] = final_answer
-        state["messages"].append(AIMessage(content=final_answer))
+    def _respond_result(self, response: Any, metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """State update of the RESPOND call"""
+        final_answer = response.content
 
         print(f"Final Answer: {final_answer[:200]}...")
 
-        return state
+        return {
+            "final_answer": final_answer,
+            "messages": [AIMessage(content=final_answer)],
+            "metrics": metrics
+        }
 
-    def _parse_action_from_thought(self, thought: str) -> Optional[Dict[str, Any]]:
+    def _passes_quality_check(self, answer: Optional[str]) -> bool:
         """
-        Parse action from the agent's thought
-        This is a simple heuristic-based parser
+        Cheap local check that an answer is worth returning without escalation
         """
-        thought_lower = thought.lower()
+        if not answer or len(answer.strip()) < self.min_answer_chars:
+            return False
+
+        answer_lower = answer.lower()
+        failure_phrases = [
+            "i don't know", "i do not know", "i'm not sure", "i am not sure",
+            "i'm unable to", "i am unable to", "i cannot help", "i can't help",
+            "as an ai"
+        ]
+        return not any(phrase in answer_lower for phrase in failure_phrases)
 
-        # Check for search_services
-        if "search" in thought_lower and ("service" in thought_lower or "cleaning" in thought_lower):
-            # Extract query
-            query = "all services"
-            if "allergen" in thought_lower or "allergy" in thought_lower:
-                query = "allergen"
-            elif "move" in thought_lower:
-                query = "move"
-            elif "maintenance" in thought_lower or "regular" in thought_lower:
-                query = "regular maintenance"
-            elif "deep clean" in thought_lower:
-                query = "deep cleaning"
+    def _escalation_reason(self, final_state: AgentState) -> Optional[str]:
+        """
+        Decide whether a cheap-path run should be retried on the escalation model
 
-            return {
-                "tool": "search_services",
-                "parameters": {"query": query}
-            }
+        Returns:
+            Reason string, or None if the answer can be returned as is
+        """
+        if not self.config["escalation_model"]:
+            return None
 
-        # Check for check_availability
-        if "check" in thought_lower and ("availability" in thought_lower or "location" in thought_lower or "area" in thought_lower):
-            # Try to extract location
-            location = "downtown"  # default
-            for area in ["downtown", "northside", "westend", "eastbridge", "southgate", "riverside", "hilltop", "lakeside"]:
-                if area in thought_lower:
-                    location = area
-                    break
-
-            return {
-                "tool": "check_availability",
-                "parameters": {"location": location}
-            }
+        # Never repeat tools that changed state outside the agent
+        if any(action["tool"] in SIDE_EFFECT_TOOLS for action in final_state["actions"]):
+            return None
 
-        # Check for get_product_info
-        if "product" in thought_lower or "ingredient" in thought_lower or "chemical" in thought_lower:
-            category = "all"
-            if "bathroom" in thought_lower:
-                category = "bathroom"
-            elif "floor" in thought_lower:
-                category = "floor"
-            elif "glass" in thought_lower or "window" in thought_lower:
-                category = "glass"
-            elif "all-purpose" in thought_lower or "all purpose" in thought_lower:
-                category = "all_purpose"
-
-            return {
-                "tool": "get_product_info",
-                "parameters": {"product_category": category}
-            }
+        if final_state["iteration"] >= final_state["max_iterations"]:
+            return "max_iterations"
+        if not self._passes_quality_check(final_state["final_answer"]):
+            return "quality_check"
+        return None
 
-        # Check for record_customer_interest
-        if "record" in thought_lower and ("interest" in thought_lower or "lead" in thought_lower or "contact" in thought_lower):
-            # This would need more sophisticated parsing to extract name, email, message
-            # For now, we'll skip auto-parsing this and let manual invocation handle it
-            return None
+    def _initial_state(
+        self,
+        user_message: str,
+        models: Dict[str, str],
+        session_id: Optional[str] = None,
+        session_context: str = "",
+        observation_cache: Optional[Dict[str, str]] = None,
+        tenant_id: str = DEFAULT_TENANT,
+        prefetch_id: Optional[str] = None,
+        tool_scope: Optional[str] = None
+    ) -> AgentState:
+        """Build the graph input for one run"""
+        return AgentState(
+            messages=[HumanMessage(content=user_message)],
+            thoughts=[],
+            actions=[],
+            observations=[],
+            iteration=0,
+            max_iterations=self.max_iterations,
+            final_answer=None,
+            persona_name=self.persona_name,
+            config=self.config,
+            models=models,
+            session_id=session_id,
+            tenant_id=tenant_id,
+            session_context=session_context,
+            node_metrics=[],
+            observation_cache=dict(observation_cache or {}),
+            duplicate_actions=0,
+            stall_count=0,
+            iterations_saved=0,
+            route=None,
+            prefetch_id=prefetch_id,
+            tool_scope=tool_scope
+        )
 
-        # Check for record_feedback
-        if "record" in thought_lower and "feedback" in thought_lower:
-            return None
+    def _thread_config(self, thread_id: str) -> Dict[str, Any]:
+        """LangGraph config addressing one checkpointed run"""
+        return {"configurable": {"thread_id": thread_id}}
 
-        # Default: search for services
+    def _new_log_entry(self, user_message: str, tenant_id: str = DEFAULT_TENANT) -> Dict[str, Any]:
+        """Start the log entry of a run"""
         return {
-            "tool": "search_services",
-            "parameters": {"query": "all services"}
+            "timestamp": datetime.now().isoformat(),
+            "persona": self.persona_name,
+            "tenant_id": tenant_id,
+            "config": self.config,
+            "user_message": user_message,
+            "start_time": datetime.now()
         }
 
-    def run(self, user_message: str) -> str:
+    def run(
+        self,
+        user_message: str,
+        session_id: Optional[str] = None,
+        thread_id: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        tool_scope: Optional[str] = None
+    ) -> str:
         """
         Run the ReAct agent on a user message
 
         Args:
             user_message: The user's input message
+            session_id: Conversation id; turns with the same id share session memory
+            thread_id: Checkpoint thread id of this run (generated if omitted); an
+                interrupted run can be continued with resume(thread_id)
+            tenant_id: Business location whose data the tools use (see tenants.py);
+                the base business when omitted
+            tool_scope: Open shared_tools.tool_scope() id; read-only tool calls are shared
+                with the other runs in it (e.g. the personas of a fan-out)
+
+        Returns:
+            The agent's final response
+        """
+        if self.memory_profiler is None and self.cpu_profiler is None:
+            return self._run(user_message, session_id, thread_id, tenant_id, tool_scope)[0]
+
+        with ExitStack() as profilers:
+            memory = profilers.enter_context(self.memory_profiler.profile()) if self.memory_profiler else None
+            cpu = profilers.enter_context(self.cpu_profiler.profile(self.persona_name)) if self.cpu_profiler else None
+            answer, log_entry = self._run(user_message, session_id, thread_id, tenant_id, tool_scope)
+        # Profiles go on this run's own entry; concurrent runs append theirs in any order
+        if memory is not None:
+            log_entry["memory"] = memory
+            print(f"Memory: {format_bytes(memory['net_growth'])} net growth, {format_bytes(memory['peak'])} peak")
+        if cpu is not None:
+            log_entry["cpu"] = cpu
+            print(format_profile(cpu))
+        return answer
+
+    def _run(
+        self,
+        user_message: str,
+        session_id: Optional[str],
+        thread_id: Optional[str],
+        tenant_id: Optional[str],
+        tool_scope: Optional[str]
+    ) -> tuple:
+        """Body of run(); returns (answer, log entry of the run)"""
+        tenant_id = tenant_id or DEFAULT_TENANT
+        start = self._start_run(user_message, session_id, tenant_id, tool_scope)
+        if start["cached"]:
+            return start["cached"]["answer"], start["log_entry"]
+
+        thread_id = thread_id or uuid.uuid4().hex
+
+        # Run the graph on the primary (cheap) tier
+        models = {"think": self.config["think_model"], "respond": self.config["respond_model"]}
+        final_state = self.graph.invoke(
+            self._initial_state(
+                user_message, models, session_id, start["session_context"], start["session_observations"], tenant_id,
+                start["prefetch_id"], tool_scope
+            ),
+            self._thread_config(thread_id)
+        )
+        node_metrics = final_state["node_metrics"]
+        tier = "primary"
+
+        # Escalate to the stronger model only when the cheap path fell short
+        escalation_reason, models = self._escalation(final_state)
+        if escalation_reason:
+            final_state = self.graph.invoke(
+                self._initial_state(
+                    user_message, models, session_id, start["session_context"], start["session_observations"], tenant_id,
+                    start["prefetch_id"], tool_scope
+                ),
+                self._thread_config(f"{thread_id}:escalated")
+            )
+            # Both attempts are billed, so keep the metrics of both
+            node_metrics = node_metrics + final_state["node_metrics"]
+            tier = "escalated"
+
+        log_entry = self._finish_run(start["log_entry"], final_state, node_metrics, tier, escalation_reason, thread_id)
+
+        return final_state["final_answer"], log_entry
+
+    async def arun(
+        self,
+        user_message: str,
+        session_id: Optional[str] = None,
+        thread_id: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        tool_scope: Optional[str] = None
+    ) -> str:
+        """
+        Async run: LLM calls are awaited, so one event loop serves many concurrent runs
+
+        Args:
+            user_message: The user's input message
+            session_id: Conversation id; turns with the same id share session memory
+            thread_id: Checkpoint thread id of this run (generated if omitted)
+            tenant_id: Business location whose data the tools use
+            tool_scope: Open shared_tools.tool_scope() id shared with other runs
 
         Returns:
             The agent's final response
         """
+        answer = None
+        async for event in self.astream(user_message, session_id, thread_id, tenant_id, tool_scope):
+            if event["event"] == "final":
+                answer = event["answer"]
+        return answer
+
+    async def astream(
+        self,
+        user_message: str,
+        session_id: Optional[str] = None,
+        thread_id: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        tool_scope: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async run yielding a progress event after every graph node
+
+        Yields:
+            {"event": "node", "node", "tier", "iteration", "duration", "model"} per
+            node, then {"event": "final", "answer", "thread_id", "tier", "cache_hit",
+            "duration", "iterations", "tool_calls", "prompt_tokens", "completion_tokens",
+            "total_tokens", "cost"}
+        """
+        tenant_id = tenant_id or DEFAULT_TENANT
+        start = self._start_run(user_message, session_id, tenant_id, tool_scope)
+        if start["cached"]:
+            yield self._final_event(start["log_entry"], start["cached"]["answer"], None)
+            return
+
+        thread_id = thread_id or uuid.uuid4().hex
+
+        # The primary (cheap) tier, plus an escalated attempt appended if it falls short
+        models = {"think": self.config["think_model"], "respond": self.config["respond_model"]}
+        attempts = [(thread_id, "primary", models)]
+        node_metrics = []
+        escalation_reason = None
+
+        for attempt_thread, tier, models in attempts:
+            initial_state = self._initial_state(
+                user_message, models, session_id, start["session_context"], start["session_observations"], tenant_id,
+                start["prefetch_id"], tool_scope
+            )
+            final_state = None
+            async for mode, chunk in self.graph.astream(
+                initial_state, self._thread_config(attempt_thread), stream_mode=["updates", "values"]
+            ):
+                if mode == "values":
+                    final_state = chunk
+                    continue
+                for node, update in chunk.items():
+                    entry = update["node_metrics"][0]
+                    yield {
+                        "event": "node",
+                        "node": node,
+                        "tier": tier,
+                        "iteration": entry["iteration"],
+                        "duration": entry["duration"],
+                        "model": entry.get("model")
+                    }
+            # Both attempts are billed, so keep the metrics of both
+            node_metrics = node_metrics + final_state["node_metrics"]
+
+            if tier == "primary":
+                escalation_reason, escalation_models = self._escalation(final_state)
+                if escalation_reason:
+                    attempts.append((f"{thread_id}:escalated", "escalated", escalation_models))
+
+        self._finish_run(start["log_entry"], final_state, node_metrics, tier, escalation_reason, thread_id)
+        yield self._final_event(start["log_entry"], final_state["final_answer"], thread_id)
+
+    def _start_run(
+        self,
+        user_message: str,
+        session_id: Optional[str],
+        tenant_id: str = DEFAULT_TENANT,
+        tool_scope: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Open the log entry of a run, load its session and check the response cache
+
+        Returns:
+            Dict with log_entry, session_context, session_observations, the
+            cache hit (None when the graph must run) and the prefetch id
+        """
         print(f"\n{'='*80}")
         print(f"RUNNING REACT AGENT: {self.persona_name}")
         print(f"Configuration: {self.config}")
         print(f"{'='*80}")
         print(f"User: {user_message}")
 
-        # Initialize state
-        initial_state = AgentState(
-            messages=[HumanMessage(content=user_message)],
-            thoughts=[],
-            actions=[],
-            observations=[],
-            iteration=0,
-            max_iterations=self.max_iterations,
-            final_answer=None,
-            persona_name=self.persona_name,
-            config=self.config
-        )
-
         # Log the interaction
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "persona": self.persona_name,
-            "config": self.config,
-            "user_message": user_message,
-            "start_time": datetime.now()
+        log_entry = self._new_log_entry(user_message, tenant_id)
+
+        # Earlier turns of this conversation, as a bounded summary plus reusable observations
+        session = self.session_store.get(self._session_key(session_id, tenant_id)) if session_id else None
+        session_context = session.render_context() if session else ""
+        session_observations = session.observations if session else {}
+
+        # Near-duplicate questions are answered from the semantic cache
+        # (follow-ups depend on the conversation, so they always run)
+        cached = None
+        if self.response_cache is not None and not session_context:
+            cached = self.response_cache.lookup(self._cache_namespace(tenant_id), user_message)
+            if cached:
+                print(f"[{self.persona_name}] Cache hit (similarity {cached['similarity']:.2f}): {cached['question']}")
+                self._log_cache_hit(log_entry, cached)
+
+        return {
+            "log_entry": log_entry,
+            "session_context": session_context,
+            "session_observations": session_observations,
+            "cached": cached,
+            "prefetch_id": None if cached else self._start_prefetch(
+                user_message, tenant_id, session_observations, tool_scope
+            )
         }
 
-        # Run the graph
-        final_state = self.graph.invoke(initial_state)
+    def _start_prefetch(
+        self,
+        user_message: str,
+        tenant_id: str,
+        session_observations: Dict[str, str],
+        tool_scope: Optional[str] = None
+    ) -> Optional[str]:
+        """Start the tool calls predicted from the user message; returns the id OBSERVE takes them by"""
+        if not self.prefetch_tools:
+            return None
+        intents = query_intents(user_message, self.observation_focus)
+        calls = {}
+        for action in predict_actions(user_message, self.prefetch_tools):
+            key = self._observation_key(self._action_key(action), intents)
+            # Observations remembered by the session are reused without a call
+            if key not in session_observations:
+                calls[key] = action
+        prefetch = self.prefetcher.start(calls, tenant_id, get_scope(tool_scope))
+        if prefetch is None:
+            return None
+
+        prefetch_id = uuid.uuid4().hex
+        with self._prefetches_lock:
+            self._prefetches[prefetch_id] = prefetch
+            stale = []
+            while len(self._prefetches) > MAX_OPEN_PREFETCHES:
+                stale.append(self._prefetches.popitem(last=False)[1])
+        for prefetch in stale:
+            prefetch.close()
+        return prefetch_id
+
+    def _take_prefetched(self, prefetch_id: Optional[str], key: str) -> tuple:
+        """(True, result) when the run prefetched this call, else (False, None)"""
+        with self._prefetches_lock:
+            prefetch = self._prefetches.get(prefetch_id) if prefetch_id else None
+        return prefetch.take(key) if prefetch is not None else (False, None)
+
+    async def _atake_prefetched(self, prefetch_id: Optional[str], key: str) -> tuple:
+        """_take_prefetched on the event loop"""
+        with self._prefetches_lock:
+            prefetch = self._prefetches.get(prefetch_id) if prefetch_id else None
+        return await prefetch.atake(key) if prefetch is not None else (False, None)
+
+    def _close_prefetch(self, prefetch_id: Optional[str]) -> Dict[str, Any]:
+        """Summary of a run's speculation (hits and wasted calls), releasing its unused calls"""
+        with self._prefetches_lock:
+            prefetch = self._prefetches.pop(prefetch_id, None) if prefetch_id else None
+        return prefetch.close() if prefetch is not None else dict(EMPTY_SUMMARY)
+
+    def _cache_namespace(self, tenant_id: str) -> str:
+        """Response cache namespace of a tenant (answers quote tenant data, so they are never shared)"""
+        return self.cache_namespace if tenant_id == DEFAULT_TENANT else f"{self.cache_namespace}|{tenant_id}"
+
+    @staticmethod
+    def _session_key(session_id: str, tenant_id: str) -> str:
+        """Session store key; session ids are only unique within a tenant"""
+        return session_id if tenant_id == DEFAULT_TENANT else f"{tenant_id}/{session_id}"
+
+    def _escalation(self, final_state: AgentState) -> tuple:
+        """(reason, models) of the escalated re-run, or (None, None) when the answer stands"""
+        escalation_reason = self._escalation_reason(final_state)
+        if not escalation_reason:
+            return None, None
+        escalation_model = self.config["escalation_model"]
+        print(f"[{self.persona_name}] Escalating to {escalation_model} ({escalation_reason})")
+        return escalation_reason, {"think": escalation_model, "respond": escalation_model}
+
+    @staticmethod
+    def _final_event(log_entry: Dict[str, Any], answer: str, thread_id: Optional[str]) -> Dict[str, Any]:
+        """Closing event of astream"""
+        return {
+            "event": "final",
+            "answer": answer,
+            "thread_id": thread_id,
+            "tier": log_entry["tier"],
+            "cache_hit": log_entry["cache_hit"],
+            "duration": log_entry["duration"],
+            "iterations": log_entry["iterations"],
+            "tool_calls": log_entry["tool_calls"],
+            "prompt_tokens": log_entry["token_usage"]["prompt_tokens"],
+            "completion_tokens": log_entry["token_usage"]["completion_tokens"],
+            "total_tokens": log_entry["token_usage"]["total_tokens"],
+            "cost": log_entry["cost"]
+        }
+
+    def resume(self, thread_id: str) -> str:
+        """
+        Continue a checkpointed run from its last completed node
+
+        Works from any worker process sharing the checkpointer (and session
+        store), e.g. after a restart or when a load balancer moves the session.
+
+        Args:
+            thread_id: Thread id the run was started with
 
-        # Complete log entry
+        Returns:
+            The agent's final response
+        """
+        if self.checkpointer is None:
+            raise ValueError("resume() requires an agent created with a checkpointer")
+
+        config = self._thread_config(thread_id)
+        snapshot = self.graph.get_state(config)
+        if not snapshot.values:
+            raise ValueError(f"No checkpoint found for thread: {thread_id}")
+
+        if not snapshot.next:
+            # The run already completed; nothing left to execute
+            return snapshot.values["final_answer"]
+
+        print(f"\n[{self.persona_name}] RESUMING thread {thread_id} at {list(snapshot.next)}")
+        log_entry = self._new_log_entry(
+            snapshot.values["messages"][0].content, snapshot.values.get("tenant_id") or DEFAULT_TENANT
+        )
+        final_state = self.graph.invoke(None, config)
+
+        tier = "escalated" if thread_id.endswith(":escalated") else "primary"
+        self._finish_run(log_entry, final_state, final_state["node_metrics"], tier, None, thread_id)
+        log_entry["resumed"] = True
+
+        return final_state["final_answer"]
+
+    def _finish_run(
+        self,
+        log_entry: Dict[str, Any],
+        final_state: AgentState,
+        node_metrics: List[Dict],
+        tier: str,
+        escalation_reason: Optional[str],
+        thread_id: str
+    ) -> Dict[str, Any]:
+        """Complete the log entry of a finished graph run and update its session; returns the entry"""
         log_entry["end_time"] = datetime.now()
         log_entry["duration"] = (log_entry["end_time"] - log_entry["start_time"]).total_seconds()
+        log_entry["thread_id"] = thread_id
         log_entry["thoughts"] = final_state["thoughts"]
         log_entry["actions"] = final_state["actions"]
         log_entry["observations"] = final_state["observations"]
         log_entry["final_answer"] = final_state["final_answer"]
         log_entry["iterations"] = final_state["iteration"]
+        log_entry["tier"] = tier
+        log_entry["escalation_reason"] = escalation_reason
+        log_entry["models"] = final_state["models"]
+        log_entry["node_metrics"] = node_metrics
+        # Every OBSERVE node executes exactly one tool
+        log_entry["tool_calls"] = sum(1 for m in node_metrics if m["node"] == "observe")
+        # Losing hedges and fallbacks are billed too (by_node "abandoned"); one still running
+        # when its run finishes is billed to this agent's next run
+        abandoned = self._take_abandoned_usage()
+        log_entry["abandoned_calls"] = len(abandoned)
+        log_entry["token_usage"] = summarize_usage(node_metrics + abandoned)
+        log_entry["cost"] = log_entry["token_usage"]["cost"]
+        log_entry["latency_policy"] = summarize_latency_policy(node_metrics)
+        log_entry["observation_tokens"] = sum(m.get("observation_tokens", 0) for m in node_metrics)
+        log_entry["raw_observation_tokens"] = sum(m.get("raw_observation_tokens", 0) for m in node_metrics)
+        log_entry["prefetch"] = self._close_prefetch(final_state.get("prefetch_id"))
+        log_entry["loop_detection"] = {
+            "duplicate_actions": final_state["duplicate_actions"],
+            "stalled": final_state["stall_count"] >= self.stall_threshold,
+            "iterations_saved": final_state["iterations_saved"]
+        }
+
+        log_entry["cache_hit"] = False
+
+        session_id = final_state["session_id"]
+        tenant_id = final_state.get("tenant_id") or DEFAULT_TENANT
+        if session_id:
+            session_context = final_state["session_context"]
+            session = self.session_store.get(self._session_key(session_id, tenant_id))
+            session.add_turn(
+                final_state["messages"][0].content,
+                final_state["final_answer"],
+                final_state["observation_cache"]
+            )
+            self.session_store.save(session)
+            log_entry["session"] = {
+                "session_id": session_id,
+                "turn": session.turns,
+                "context_tokens": estimate_tokens(session_context) if session_context else 0,
+                "prompt_tokens_per_call": (
+                    log_entry["token_usage"]["prompt_tokens"] / log_entry["latency_policy"]["llm_calls"]
+                    if log_entry["latency_policy"]["llm_calls"] else 0
+                )
+            }
 
         self.interaction_logs.append(log_entry)
 
+        # Answers within a conversation may depend on it, so only sessionless runs are shared
+        if self.response_cache is not None and not session_id and not final_state["session_context"]:
+            self.response_cache.store(
+                self._cache_namespace(tenant_id),
+                log_entry["user_message"],
+                final_state["final_answer"],
+                log_entry["duration"],
+                [action["tool"] for action in final_state["actions"]]
+            )
+
         print(f"\n{'='*80}")
         print(f"AGENT RESPONSE COMPLETE")
         print(f"{'='*80}\n")
 
-        return final_state["final_answer"]
+        return log_entry
+
+    def _log_cache_hit(self, log_entry: Dict[str, Any], cached: Dict[str, Any]):
+        """Complete and store the log entry of a run answered from the cache"""
+        log_entry["end_time"] = datetime.now()
+        log_entry["duration"] = (log_entry["end_time"] - log_entry["start_time"]).total_seconds()
+        log_entry["thoughts"] = []
+        log_entry["actions"] = []
+        log_entry["observations"] = []
+        log_entry["final_answer"] = cached["answer"]
+        log_entry["iterations"] = 0
+        log_entry["tier"] = "cache"
+        log_entry["escalation_reason"] = None
+        log_entry["models"] = {}
+        log_entry["node_metrics"] = []
+        log_entry["tool_calls"] = 0
+        log_entry["token_usage"] = summarize_usage([])
+        log_entry["cost"] = 0.0
+        log_entry["latency_policy"] = summarize_latency_policy([])
+        log_entry["observation_tokens"] = 0
+        log_entry["raw_observation_tokens"] = 0
+        log_entry["prefetch"] = dict(EMPTY_SUMMARY)
+        log_entry["loop_detection"] = {"duplicate_actions": 0, "stalled": False, "iterations_saved": 0}
+        log_entry["cache_hit"] = True
+        log_entry["cache_similarity"] = cached["similarity"]
+        log_entry["latency_saved"] = max(0.0, cached["original_duration"] - log_entry["duration"])
+        self.interaction_logs.append(log_entry)
 
     def get_logs(self) -> List[Dict]:
         """Return interaction logs"""
-        return self.interaction_logs
+        return list(self.interaction_logs)
 
     def save_logs(self, filepath: str = "agent_logs.json"):
         """Save logs to file"""
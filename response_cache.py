@@ -0,0 +1,346 @@
+"""
+Semantic response cache for near-duplicate user questions
+Hashed n-gram TF-IDF vectors with cosine similarity, TTL expiry and LRU eviction
+"""
+
+import heapq
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List
+
+import numpy as np
+
+from thought_router import AVAILABILITY_AREAS, SERVICE_QUERIES
+from tools import SIDE_EFFECT_TOOLS
+
+# Messages carrying personal details must be answered individually, never from cache
+PERSONAL_DETAILS_PATTERN = re.compile(
+    r"[\w.+-]+@[\w-]+\.[\w.]+"          # email address
+    r"|\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}"  # phone number
+)
+
+# Terms that change the answer even when the rest of the question is identical
+# ("Do you service Downtown?" vs "Do you service Riverside?", "How much does deep
+# cleaning cost?" vs "How long does it take?"), mapped to the term they stand for
+# so that synonyms ("price" / "cost") still match each other
+DEFAULT_KEY_TERMS: Dict[str, str] = {
+    **{area: area for area in AVAILABILITY_AREAS},
+    # Service types, by the first word of their keywords ("deep clean" -> "deep")
+    **{keyword.split()[0]: service for keywords, service in SERVICE_QUERIES for keyword in keywords},
+    "allergies": "allergen",
+    "allergic": "allergen",
+    "moving": "move",
+    # Product categories
+    "bathroom": "bathroom",
+    "floor": "floor",
+    "floors": "floor",
+    "glass": "glass",
+    "window": "glass",
+    "windows": "glass",
+    # What is asked: cost or duration
+    **dict.fromkeys(["cost", "costs", "price", "prices", "pricing", "charge", "fee", "fees", "rate", "rates"], "cost"),
+    **dict.fromkeys(["long", "take", "takes", "duration", "hours", "minutes"], "duration"),
+    # Who a product must be safe for
+    **dict.fromkeys(["pet", "pets", "dog", "dogs", "cat", "cats", "animal", "animals"], "pet"),
+    **dict.fromkeys(["child", "children", "kid", "kids", "baby", "babies", "toddler", "toddlers"], "child")
+}
+
+
+# Relative change of a namespace's IDF weights (over the terms its questions use) since
+# its matrix was weighted, beyond which the matrix is re-weighted
+IDF_DRIFT_THRESHOLD = 0.05
+
+
+class HashedNgramVectorizer:
+    """
+    Map text to a fixed-size term-frequency vector of hashed n-grams
+
+    Uses word unigrams plus character n-grams taken inside word boundaries,
+    so paraphrases ("offer" / "offering", "allergies" / "allergy") overlap.
+    Hashing uses CRC32, which is stable across processes.
+    """
+
+    def __init__(self, n_features: int = 4096, char_ngram_range: tuple = (3, 5)):
+        """
+        Initialize the vectorizer
+
+        Args:
+            n_features: Vector dimensionality (hash buckets)
+            char_ngram_range: Inclusive (min, max) character n-gram lengths
+        """
+        self.n_features = n_features
+        self.char_ngram_range = char_ngram_range
+
+    @staticmethod
+    def words(text: str) -> List[str]:
+        """Lowercased word tokens of a text"""
+        return re.findall(r"[a-z0-9]+", text.lower())
+
+    def _ngrams(self, text: str) -> List[str]:
+        words = self.words(text)
+        ngrams = list(words)
+        low, high = self.char_ngram_range
+        for word in words:
+            padded = f" {word} "
+            for n in range(low, high + 1):
+                ngrams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return ngrams
+
+    def transform(self, text: str) -> np.ndarray:
+        """Term-frequency vector (float32) of a text"""
+        indices = [zlib.crc32(gram.encode()) % self.n_features for gram in self._ngrams(text)]
+        return np.bincount(indices, minlength=self.n_features).astype(np.float32)
+
+
+class _Namespace:
+    """
+    Term-frequency and weighted matrices of one namespace, one row per entry
+
+    Stores append a row weighted with the current IDF and removals move the
+    last row into the gap, so neither rebuilds the matrix; it is re-weighted
+    only once the document frequencies drift past IDF_DRIFT_THRESHOLD.
+    """
+
+    def __init__(self, n_features: int):
+        self.ids = []  # entry id of each row
+        self.rows = {}  # entry id -> row
+        self.tf = np.zeros((0, n_features), dtype=np.float32)
+        self.weighted = np.zeros((0, n_features), dtype=np.float32)
+        self.key_term_ids = np.zeros(0, dtype=np.int64)
+        self.df = np.zeros(n_features, dtype=np.int64)
+        self.idf = np.ones(n_features, dtype=np.float32)
+
+    def _current_idf(self) -> np.ndarray:
+        return np.log((1 + len(self.ids)) / (1 + self.df)).astype(np.float32) + 1
+
+    def _weigh(self, tf: np.ndarray) -> np.ndarray:
+        weighted = tf * self.idf
+        weighted /= np.linalg.norm(weighted, axis=-1, keepdims=True) + 1e-12
+        return weighted
+
+    def _reweigh_if_drifted(self):
+        used = self.df > 0
+        if not used.any():
+            return
+        current = self._current_idf()
+        drift = np.linalg.norm(current[used] - self.idf[used]) / np.linalg.norm(self.idf[used])
+        if drift > IDF_DRIFT_THRESHOLD:
+            n = len(self.ids)
+            self.idf = current
+            self.weighted[:n] = self._weigh(self.tf[:n])
+
+    def add(self, entry_id: int, vector: np.ndarray, key_term_id: int):
+        n = len(self.ids)
+        if n == len(self.tf):
+            size = max(16, 2 * n)
+            self.tf = np.resize(self.tf, (size, self.tf.shape[1]))
+            self.weighted = np.resize(self.weighted, (size, self.weighted.shape[1]))
+            self.key_term_ids = np.resize(self.key_term_ids, size)
+        self.tf[n] = vector
+        self.weighted[n] = self._weigh(vector)
+        self.key_term_ids[n] = key_term_id
+        self.df += vector > 0
+        self.rows[entry_id] = n
+        self.ids.append(entry_id)
+        self._reweigh_if_drifted()
+
+    def remove(self, entry_id: int):
+        row = self.rows.pop(entry_id)
+        last = len(self.ids) - 1
+        self.df -= self.tf[row] > 0
+        if row != last:
+            moved = self.ids[last]
+            self.tf[row] = self.tf[last]
+            self.weighted[row] = self.weighted[last]
+            self.key_term_ids[row] = self.key_term_ids[last]
+            self.ids[row] = moved
+            self.rows[moved] = row
+        self.ids.pop()
+        self._reweigh_if_drifted()
+
+    def similarities(self, vector: np.ndarray, key_term_id: int) -> np.ndarray:
+        """Cosine similarity of a question to every row; -1 where the key terms differ"""
+        n = len(self.ids)
+        query = self._weigh(vector)
+        similarities = self.weighted[:n] @ query
+        similarities[self.key_term_ids[:n] != key_term_id] = -1.0
+        return similarities
+
+
+class SemanticResponseCache:
+    """
+    Similarity-based answer cache in front of ReActAgent.run
+
+    Entries live in namespaces (one per persona and model configuration).
+    A lookup returns the most similar cached question's answer when its
+    TF-IDF cosine similarity reaches the threshold and both questions
+    mention the same key terms (service areas and types, product categories,
+    cost vs duration, pets vs children). Entries expire after
+    `ttl` seconds and the least recently used ones are evicted beyond
+    `capacity`.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.75,
+        ttl: float = 3600.0,
+        capacity: int = 1000,
+        vectorizer: Optional[HashedNgramVectorizer] = None,
+        key_terms: Dict[str, str] = DEFAULT_KEY_TERMS
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            similarity_threshold: Minimum cosine similarity for a hit
+            ttl: Seconds an answer stays valid
+            capacity: Maximum number of cached answers across all namespaces
+            vectorizer: Text vectorizer (defaults to HashedNgramVectorizer())
+            key_terms: Words that must match between a question and a cached one, mapped
+                to the term they stand for (a set of words matches each word exactly)
+        """
+        self.similarity_threshold = similarity_threshold
+        self.ttl = ttl
+        self.capacity = capacity
+        self.vectorizer = vectorizer or HashedNgramVectorizer()
+        self.key_terms = key_terms if isinstance(key_terms, dict) else {term: term for term in key_terms}
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # entry id -> entry, in LRU order
+        self._namespaces = {}  # namespace -> _Namespace
+        self._expiry = []  # heap of (created_at, entry id); evicted entries are skipped when popped
+        self._key_term_ids = {}  # key term set -> small int compared per row
+        self._next_id = 0
+        self.stats = {
+            "lookups": 0,
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "skipped": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "latency_saved": 0.0
+        }
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        self._namespaces[entry["namespace"]].remove(entry_id)
+
+    def _expire(self, now: float):
+        """Remove entries older than the TTL, oldest first (only the expired ones are visited)"""
+        while self._expiry and now - self._expiry[0][0] > self.ttl:
+            _, entry_id = heapq.heappop(self._expiry)
+            if entry_id in self._entries:
+                self._remove(entry_id)
+                self.stats["expirations"] += 1
+
+    def _key_term_id(self, message: str, add: bool = False) -> int:
+        """Id of the key terms a message mentions (equal ids mean the same terms); -1 if no entry has them"""
+        terms = frozenset(self.key_terms[word] for word in self.vectorizer.words(message) if word in self.key_terms)
+        if add:
+            return self._key_term_ids.setdefault(terms, len(self._key_term_ids))
+        return self._key_term_ids.get(terms, -1)
+
+    @staticmethod
+    def is_cacheable_message(message: str) -> bool:
+        """Messages with personal details (email, phone) are never served from cache"""
+        return PERSONAL_DETAILS_PATTERN.search(message) is None
+
+    def lookup(self, namespace: str, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a message
+
+        Args:
+            namespace: Persona / model configuration key
+            message: User message
+
+        Returns:
+            Dict with answer, matched question, similarity and original duration, or None
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self.stats["lookups"] += 1
+            self._expire(time.time())
+
+            space = self._namespaces.get(namespace)
+            if not space or not space.ids or not self.is_cacheable_message(message):
+                self.stats["misses"] += 1
+                return None
+
+            similarities = space.similarities(self.vectorizer.transform(message), self._key_term_id(message))
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+
+            if similarity < self.similarity_threshold:
+                self.stats["misses"] += 1
+                return None
+
+            entry_id = space.ids[best]
+            entry = self._entries[entry_id]
+            self._entries.move_to_end(entry_id)
+            self.stats["hits"] += 1
+            self.stats["latency_saved"] += max(0.0, entry["duration"] - (time.perf_counter() - start))
+
+            return {
+                "answer": entry["answer"],
+                "question": entry["question"],
+                "similarity": similarity,
+                "original_duration": entry["duration"]
+            }
+
+    def store(self, namespace: str, message: str, answer: str, duration: float, tools_used: List[str] = ()):
+        """
+        Cache the answer of a completed run
+
+        Args:
+            namespace: Persona / model configuration key
+            message: User message
+            answer: Final answer of the run
+            duration: Seconds the run took (counted as saved on each hit)
+            tools_used: Tools the run invoked; runs with side effects are not cached
+        """
+        with self._lock:
+            if (not answer
+                    or any(tool in SIDE_EFFECT_TOOLS for tool in tools_used)
+                    or not self.is_cacheable_message(message)):
+                self.stats["skipped"] += 1
+                return
+
+            entry_id = self._next_id
+            self._next_id += 1
+            created_at = time.time()
+            self._entries[entry_id] = {
+                "namespace": namespace,
+                "question": message,
+                "answer": answer,
+                "duration": duration,
+                "created_at": created_at
+            }
+            heapq.heappush(self._expiry, (created_at, entry_id))
+            space = self._namespaces.get(namespace)
+            if space is None:
+                space = self._namespaces[namespace] = _Namespace(self.vectorizer.n_features)
+            space.add(entry_id, self.vectorizer.transform(message), self._key_term_id(message, add=True))
+            self.stats["stores"] += 1
+
+            while len(self._entries) > self.capacity:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        """Drop every cached answer"""
+        with self._lock:
+            self._entries.clear()
+            self._namespaces.clear()
+            self._expiry.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate, latency saved and bookkeeping counters"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+        stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+        return stats
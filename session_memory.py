@@ -0,0 +1,243 @@
+"""
+Multi-turn session memory for the ReAct agent
+Keeps a bounded rolling summary plus recent tool observations per conversation
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List
+
+from pricing import estimate_tokens
+from tools import SIDE_EFFECT_TOOLS
+
+
+def _first_sentence(text: str, max_chars: int) -> str:
+    """First sentence of a text, clipped to max_chars"""
+    sentence = re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+    return sentence[:max_chars] + "..." if len(sentence) > max_chars else sentence
+
+
+class SessionMemory:
+    """
+    Memory of one conversation
+
+    The last `recent_turns` exchanges are kept verbatim (clipped); older
+    ones are folded into one-line summaries, and the oldest summary lines
+    are dropped once the summary exceeds `max_summary_tokens`. Observations
+    of pure tools are kept in a bounded LRU so follow-up questions reuse them
+    instead of calling the tools again. The rendered context therefore stays
+    the same size no matter how long the conversation runs.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        max_summary_tokens: int = 200,
+        recent_turns: int = 2,
+        max_turn_chars: int = 300,
+        max_observations: int = 6
+    ):
+        """
+        Initialize an empty session
+
+        Args:
+            session_id: Conversation identifier
+            max_summary_tokens: Token budget of the rolling summary
+            recent_turns: Exchanges kept verbatim
+            max_turn_chars: Characters kept per verbatim message
+            max_observations: Tool observations remembered for reuse
+        """
+        self.session_id = session_id
+        self.max_summary_tokens = max_summary_tokens
+        self.recent_turns = recent_turns
+        self.max_turn_chars = max_turn_chars
+        self.max_observations = max_observations
+
+        self.turns = 0
+        self.summary = []  # one line per compressed exchange, oldest first
+        self.recent = []  # [{"user": ..., "assistant": ...}]
+        self.observations = OrderedDict()  # action key -> observation, LRU order
+
+    def _clip(self, text: str) -> str:
+        return text[:self.max_turn_chars] + "..." if len(text) > self.max_turn_chars else text
+
+    def add_turn(self, user_message: str, answer: str, observation_cache: Dict[str, str]):
+        """
+        Record a completed exchange and the observations it produced
+
+        Args:
+            user_message: The user's message
+            answer: The agent's final answer
+            observation_cache: The run's observations keyed by action key
+        """
+        self.turns += 1
+        self.recent.append({"user": self._clip(user_message), "assistant": self._clip(answer or "")})
+
+        # Fold exchanges that fall out of the verbatim window into the summary
+        while len(self.recent) > self.recent_turns:
+            turn = self.recent.pop(0)
+            self.summary.append(
+                f"User asked: {_first_sentence(turn['user'], 100)} "
+                f"-> Answered: {_first_sentence(turn['assistant'], 120)}"
+            )
+        while self.summary and estimate_tokens("\n".join(self.summary)) > self.max_summary_tokens:
+            self.summary.pop(0)
+
+        for action_key, observation in observation_cache.items():
+            if action_key.split(":", 1)[0] in SIDE_EFFECT_TOOLS:
+                continue
+            self.observations[action_key] = observation
+            self.observations.move_to_end(action_key)
+        while len(self.observations) > self.max_observations:
+            self.observations.popitem(last=False)
+
+    def render_context(self) -> str:
+        """Conversation context to prepend to the prompts of the next turn"""
+        if not self.summary and not self.recent:
+            return ""
+
+        context = "CONVERSATION SO FAR:\n"
+        if self.summary:
+            context += "Earlier: " + "\n".join(self.summary) + "\n"
+        for turn in self.recent:
+            context += f"User: {turn['user']}\nYou: {turn['assistant']}\n"
+        return context
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable snapshot of the session"""
+        return {
+            "session_id": self.session_id,
+            "turns": self.turns,
+            "summary": list(self.summary),
+            "recent": list(self.recent),
+            "observations": list(self.observations.items())
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], **kwargs) -> "SessionMemory":
+        """Restore a session from to_dict output"""
+        memory = cls(data["session_id"], **kwargs)
+        memory.turns = data["turns"]
+        memory.summary = list(data["summary"])
+        memory.recent = list(data["recent"])
+        memory.observations = OrderedDict(data["observations"])
+        return memory
+
+
+class SessionStore:
+    """
+    In-process store of session memories, bounded by LRU eviction
+    """
+
+    def __init__(self, max_sessions: int = 10000, **memory_kwargs):
+        """
+        Initialize the store
+
+        Args:
+            max_sessions: Sessions kept before the least recently used is evicted
+            **memory_kwargs: Settings forwarded to every SessionMemory
+        """
+        self.max_sessions = max_sessions
+        self.memory_kwargs = memory_kwargs
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> SessionMemory:
+        """Return the memory of a session, creating it if needed"""
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is None:
+                memory = SessionMemory(session_id, **self.memory_kwargs)
+                self._sessions[session_id] = memory
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return memory
+
+    def save(self, memory: SessionMemory):
+        """Persist a session after a turn (memories are live objects in this store)"""
+        with self._lock:
+            self._sessions[memory.session_id] = memory
+
+    def reset(self, session_id: str):
+        """Forget a session"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def list_sessions(self) -> List[str]:
+        """Ids of the sessions currently held"""
+        with self._lock:
+            return list(self._sessions)
+
+
+class SQLiteSessionStore:
+    """
+    Session store backed by a SQLite file in WAL mode
+
+    Any worker process with access to the file can pick up a session, so
+    conversations survive restarts and can move between workers.
+    """
+
+    def __init__(self, path: str = "agent_sessions.db", **memory_kwargs):
+        """
+        Open (or create) the session database
+
+        Args:
+            path: SQLite database file (may be shared with the checkpointer)
+            **memory_kwargs: Settings forwarded to every SessionMemory
+        """
+        self.path = path
+        self.memory_kwargs = memory_kwargs
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+
+    def get(self, session_id: str) -> SessionMemory:
+        """Load the memory of a session, creating an empty one if needed"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return SessionMemory(session_id, **self.memory_kwargs)
+        return SessionMemory.from_dict(json.loads(row[0]), **self.memory_kwargs)
+
+    def save(self, memory: SessionMemory):
+        """Write a session after a turn"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?)",
+                (memory.session_id, json.dumps(memory.to_dict()), time.time())
+            )
+
+    def reset(self, session_id: str):
+        """Forget a session"""
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def list_sessions(self) -> List[str]:
+        """Ids of all stored sessions"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT session_id FROM sessions")]
+
+    def prune(self, max_age: float) -> int:
+        """Delete sessions idle for longer than max_age seconds"""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM sessions WHERE updated_at < ?", (time.time() - max_age,)
+            )
+            return cur.rowcount
@@ -0,0 +1,120 @@
+"""
+Request-scoped sharing of tool results
+Runs answering one request together (e.g. the personas of a fan-out) open a
+tool scope; identical read-only tool calls made in it run once, and concurrent
+callers wait for that one execution instead of repeating it
+"""
+
+import asyncio
+import json
+import threading
+import uuid
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+from tools import TOOL_FUNCTIONS, SIDE_EFFECT_TOOLS
+
+
+class SharedToolCalls:
+    """
+    Single-flight results of read-only tool calls
+
+    Tools with side effects (SIDE_EFFECT_TOOLS) always run. A failed call is
+    not kept, so the next caller tries again.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._results: Dict[str, Future] = {}
+
+    @staticmethod
+    def _key(action: Dict[str, Any], tenant_id: str) -> str:
+        return f"{tenant_id}|{action['tool']}:{json.dumps(action['parameters'], sort_keys=True)}"
+
+    def call(self, action: Dict[str, Any], tenant_id: str) -> Any:
+        """
+        Result of a tool call, executed only by the first caller in the scope
+
+        Args:
+            action: {"tool", "parameters"}
+            tenant_id: Tenant whose data the tool uses
+        """
+        if action["tool"] in SIDE_EFFECT_TOOLS:
+            return TOOL_FUNCTIONS[action["tool"]](**action["parameters"], tenant_id=tenant_id)
+
+        key, future, owner = self._claim(action, tenant_id)
+        if owner:
+            self._execute(key, future, action, tenant_id)
+        return future.result()
+
+    async def acall(self, action: Dict[str, Any], tenant_id: str) -> Any:
+        """call() on the event loop: the tool runs on a worker thread, other callers await its result"""
+        if action["tool"] in SIDE_EFFECT_TOOLS:
+            return await asyncio.to_thread(TOOL_FUNCTIONS[action["tool"]], **action["parameters"], tenant_id=tenant_id)
+
+        key, future, owner = self._claim(action, tenant_id)
+        if owner:
+            await asyncio.to_thread(self._execute, key, future, action, tenant_id)
+            return future.result()
+        # Shielded: a cancelled caller must not cancel the result the others wait for
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _claim(self, action: Dict[str, Any], tenant_id: str) -> Tuple[str, Future, bool]:
+        """(key, future of the result, whether this caller executes the call)"""
+        key = self._key(action, tenant_id)
+        with self._lock:
+            future = self._results.get(key)
+            owner = future is None
+            if owner:
+                future = self._results[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+        return key, future, owner
+
+    def _execute(self, key: str, future: Future, action: Dict[str, Any], tenant_id: str):
+        try:
+            future.set_result(TOOL_FUNCTIONS[action["tool"]](**action["parameters"], tenant_id=tenant_id))
+        except Exception as e:
+            with self._lock:
+                del self._results[key]
+            future.set_exception(e)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requested = self.calls + self.shared
+            return {
+                "executed": self.calls,
+                "shared": self.shared,
+                "share_rate": self.shared / requested if requested else 0.0
+            }
+
+
+# Open scopes by id (runs reference their scope by id, so graph state stays serializable)
+_scopes: Dict[str, SharedToolCalls] = {}
+_scopes_lock = threading.Lock()
+
+
+@contextmanager
+def tool_scope() -> Iterator[Tuple[str, SharedToolCalls]]:
+    """Open a scope for the duration of a block; yields (scope id, its shared calls)"""
+    scope_id = uuid.uuid4().hex
+    shared = SharedToolCalls()
+    with _scopes_lock:
+        _scopes[scope_id] = shared
+    try:
+        yield scope_id, shared
+    finally:
+        with _scopes_lock:
+            _scopes.pop(scope_id, None)
+
+
+def get_scope(scope_id: Optional[str]) -> Optional[SharedToolCalls]:
+    """Shared calls of an open scope (None when the scope is closed or unknown)"""
+    if not scope_id:
+        return None
+    with _scopes_lock:
+        return _scopes.get(scope_id)
@@ -0,0 +1,108 @@
+"""
+Memory soak test
+Runs thousands of queries through one ReActAgent with a simulated LLM (no API
+calls), as a long-running worker would, and fails if traced memory keeps growing
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+from checkpointing import create_checkpointer
+from fake_llm import SimulatedChatModel
+from llm_scheduler import LLMScheduler
+from load_generator import DEFAULT_CORPUS, UNLIMITED_RATE_LIMITS, load_corpus
+from memory_profiler import MemoryProfiler, current_rss, format_bytes, format_summary
+from persona_registry import get_registry
+from react_agent import ReActAgent
+from response_cache import SemanticResponseCache
+
+
+def build_agent(args, memory_profiler: MemoryProfiler) -> ReActAgent:
+    persona = get_registry().get(args.persona)
+    # The agent's own log bound unless overridden, so the default configuration is what is soaked
+    logs = {} if args.max_logs is None else {"max_logs": args.max_logs if args.max_logs >= 0 else None}
+    return ReActAgent(
+        persona_name=persona["name"],
+        system_prompt=persona["system_prompt"],
+        prompt_hash=persona["content_hash"],
+        prompt_tokens=persona["prompt_tokens"],
+        observation_focus=persona["observation_focus"],
+        scheduler=LLMScheduler(UNLIMITED_RATE_LIMITS),
+        llm_factory=lambda name: SimulatedChatModel(name),
+        **logs,
+        response_cache=SemanticResponseCache() if args.response_cache else None,
+        checkpointer=create_checkpointer("memory") if args.checkpointer else None,
+        memory_profiler=memory_profiler
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many stubbed-LLM queries and fail on memory growth")
+    parser.add_argument("--runs", type=int, default=2000, help="Measured runs")
+    parser.add_argument("--warmup", type=int, default=200, help="Runs before the baseline (caches, lazy imports)")
+    parser.add_argument("--max-growth-mb", type=float, default=2.0, help="Allowed traced growth over the measured runs")
+    parser.add_argument("--max-logs", type=int, default=None,
+                        help="Interaction logs kept by the agent (default: the agent's default; -1 = unbounded)")
+    parser.add_argument("--sessions", type=int, default=20, help="Session ids cycled through (0 = no sessions)")
+    parser.add_argument("--response-cache", action="store_true", help="Enable the semantic response cache")
+    parser.add_argument("--checkpointer", action="store_true", help="Use an in-memory checkpointer")
+    parser.add_argument("--persona", default="friendly_few_shot")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--top", type=int, default=10, help="Allocation sites reported")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    queries = [record["query"] for record in load_corpus(args.corpus)]
+    profiler = MemoryProfiler(top_n=args.top, per_run_sites=False)
+    agent = build_agent(args, profiler)
+    sessions = itertools.cycle([f"soak-{i}" for i in range(args.sessions)] or [None])
+
+    def run_batch(count: int):
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            for i in range(count):
+                agent.run(queries[i % len(queries)], session_id=next(sessions))
+
+    print(f"Warming up ({args.warmup} runs)...")
+    run_batch(args.warmup)
+
+    # Baseline after warmup: one-time allocations are not growth
+    profiler.reset_baseline()
+
+    checkpoints = 10
+    per_checkpoint = max(1, args.runs // checkpoints)
+    trend = []
+    start = time.perf_counter()
+    print(f"{'runs':>8} {'traced growth':>14} {'rss':>12} {'runs/s':>8}")
+    for done in range(per_checkpoint, args.runs + 1, per_checkpoint):
+        run_batch(per_checkpoint)
+        summary = profiler.summary()
+        trend.append({"runs": done, "growth": summary["growth"], "rss": current_rss()})
+        print(f"{done:>8} {format_bytes(summary['growth']):>14} {format_bytes(trend[-1]['rss'] or 0):>12} "
+              f"{done / (time.perf_counter() - start):>8.1f}")
+
+    summary = profiler.summary()
+    peaks = [log["memory"]["peak"] for log in agent.get_logs() if "memory" in log]
+    print(f"\n{format_summary(summary)}")
+    if peaks:
+        print(f"  Peak per run (last {len(peaks)} runs): max {format_bytes(max(peaks))}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "trend": trend, "summary": summary}, f, indent=2)
+        print(f"\nReport saved to {args.output}")
+
+    limit = args.max_growth_mb * 1024 * 1024
+    if summary["growth"] > limit:
+        print(f"\nMEMORY GROWTH: {format_bytes(summary['growth'])} over {summary['runs']} runs "
+              f"exceeds {args.max_growth_mb} MB")
+        sys.exit(1)
+    print(f"\nMemory growth within {args.max_growth_mb} MB.")
+
+
+if __name__ == "__main__":
+    main()
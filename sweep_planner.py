@@ -0,0 +1,187 @@
+"""
+Sweep planner for experiment suites
+Expands declarative parameter grids into experiments and collapses the runs they
+share: every unique (configuration, query, repetition) unit runs once and its
+result is fanned out to each experiment that references it
+"""
+
+import hashlib
+import itertools
+import json
+from collections import OrderedDict
+from typing import Dict, Any, List
+
+from persona_registry import get_registry
+
+
+# Experiment fields that change what an agent run does
+CONFIG_FIELDS = [
+    "persona_key", "model_name", "temperature", "max_tokens", "top_p",
+    "max_iterations", "think_model", "respond_model", "escalation_model"
+]
+
+# Fields of a grid that describe it rather than vary the runs
+GRID_METADATA_FIELDS = ("name", "test_queries", "repetitions")
+
+
+def expand_grid(grid: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Expand a grid into experiment parameter sets
+
+    List values are axes (their cartesian product is taken, in key order);
+    scalars are shared by every combination. "name", "test_queries" and
+    "repetitions" are passed through unexpanded.
+
+    Example:
+        {"persona_key": "friendly_zero_shot", "temperature": [0.3, 0.7, 1.0]}
+        -> three parameter sets, one per temperature
+    """
+    fixed = {k: v for k, v in grid.items() if k in GRID_METADATA_FIELDS or not isinstance(v, list)}
+    axes = {k: v for k, v in grid.items() if k not in fixed}
+    return [
+        {**fixed, **dict(zip(axes, values))}
+        for values in itertools.product(*axes.values())
+    ]
+
+
+def canonical_config(exp: Dict[str, Any], registry=None) -> Dict[str, Any]:
+    """
+    Configuration an experiment actually runs with
+
+    Per-node models default to model_name (as in ReActAgent), floats are
+    normalized, and the persona is pinned to its prompt's content hash, so two
+    experiments that differ only in spelling map to the same configuration.
+    """
+    registry = registry or get_registry()
+    config = {field: exp.get(field) for field in CONFIG_FIELDS}
+    config["think_model"] = config["think_model"] or config["model_name"]
+    config["respond_model"] = config["respond_model"] or config["model_name"]
+    config["temperature"] = round(float(config["temperature"]), 6)
+    config["top_p"] = round(float(config["top_p"]), 6)
+    config["prompt_hash"] = registry.get(exp["persona_key"])["content_hash"]
+    return config
+
+
+def config_key(config: Dict[str, Any]) -> str:
+    """Stable short id of a canonical configuration"""
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def llm_calls_per_run(config: Dict[str, Any]) -> tuple:
+    """
+    (fewest, most) LLM calls one run makes
+
+    At least one THINK and one RESPOND; at most a THINK per iteration plus
+    the last one, and RESPOND; an escalation can repeat the whole run.
+    """
+    most = config["max_iterations"] + 2
+    if config["escalation_model"]:
+        most *= 2
+    return 2, most
+
+
+class SweepPlan:
+    """
+    Unique work units of a set of experiments and where their results go
+
+    Attributes:
+        units: unit key -> {"key", "config_key", "config", "query", "repetition"}
+        assignments: experiment id -> [(query_number, repetition, unit key)] in run order
+        configs: config key -> canonical configuration
+    """
+
+    def __init__(self):
+        self.units = OrderedDict()
+        self.assignments = OrderedDict()
+        self.configs = {}
+
+    @property
+    def total_runs(self) -> int:
+        return sum(len(refs) for refs in self.assignments.values())
+
+    @property
+    def unique_runs(self) -> int:
+        return len(self.units)
+
+    @property
+    def saved_runs(self) -> int:
+        return self.total_runs - self.unique_runs
+
+    def saved_llm_calls(self) -> tuple:
+        """(fewest, most) LLM calls the deduplication saves"""
+        fewest = most = 0
+        for refs in self.assignments.values():
+            for _, _, key in refs:
+                low, high = llm_calls_per_run(self.units[key]["config"])
+                fewest += low
+                most += high
+        for unit in self.units.values():
+            low, high = llm_calls_per_run(unit["config"])
+            fewest -= low
+            most -= high
+        return fewest, most
+
+    def report(self) -> str:
+        fewest, most = self.saved_llm_calls()
+        saved_share = self.saved_runs / self.total_runs if self.total_runs else 0.0
+        lines = [
+            f"Sweep plan: {len(self.assignments)} experiments, {len(self.configs)} unique configurations",
+            f"  Runs referenced:   {self.total_runs}",
+            f"  Unique runs:       {self.unique_runs}",
+            f"  Runs saved:        {self.saved_runs} ({saved_share:.0%})",
+            f"  LLM calls saved:   {fewest} to {most}"
+        ]
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form (JSON object keys are strings, so experiment ids become strings)"""
+        return {
+            "units": list(self.units.values()),
+            "assignments": {str(exp_id): refs for exp_id, refs in self.assignments.items()},
+            "configs": self.configs
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SweepPlan":
+        plan = cls()
+        plan.units = OrderedDict((unit["key"], unit) for unit in data["units"])
+        plan.assignments = OrderedDict(
+            (int(exp_id), [tuple(ref) for ref in refs]) for exp_id, refs in data["assignments"].items()
+        )
+        plan.configs = data["configs"]
+        return plan
+
+
+def plan_sweep(experiments: List[Dict[str, Any]], registry=None) -> SweepPlan:
+    """
+    Plan the runs of a list of experiments (as built by ExperimentRunner.add_experiment)
+
+    Args:
+        experiments: Experiment dicts with test_queries and optional repetitions
+        registry: Persona registry used to pin personas to their prompt hash
+
+    Returns:
+        SweepPlan in which each (configuration, query, repetition) appears once
+    """
+    registry = registry or get_registry()
+    plan = SweepPlan()
+    for exp in experiments:
+        config = canonical_config(exp, registry)
+        key_of_config = config_key(config)
+        plan.configs[key_of_config] = config
+        refs = []
+        for query_number, query in enumerate(exp["test_queries"], 1):
+            for repetition in range(1, exp.get("repetitions", 1) + 1):
+                normalized_query = " ".join(query.split())
+                unit_key = config_key({"config": key_of_config, "query": normalized_query, "repetition": repetition})
+                if unit_key not in plan.units:
+                    plan.units[unit_key] = {
+                        "key": unit_key,
+                        "config_key": key_of_config,
+                        "config": config,
+                        "query": query,
+                        "repetition": repetition
+                    }
+                refs.append((query_number, repetition, unit_key))
+        plan.assignments[exp["id"]] = refs
+    return plan
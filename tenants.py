@@ -0,0 +1,289 @@
+"""
+Per-tenant business data for the tools
+Each tenant (franchise location) has its own contact details, service areas,
+services and product catalog, loaded lazily from data files and kept in a
+bounded LRU with memory accounting, so one worker can serve thousands of
+tenants without holding them all
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from product_catalog import ProductCatalog
+
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "business_data")
+
+# Tenant whose data is the base of every other tenant (business_data/ itself)
+DEFAULT_TENANT = "default"
+
+# Residency limits of the process-wide store
+DEFAULT_MAX_TENANTS = 256
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Data files of a tenant; tenant.json is merged over the base, the others replace it
+TENANT_FILE = "tenant.json"
+SERVICES_FILE = "services.json"
+PRODUCTS_FILE = "products.json"
+
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$")
+
+
+class UnknownTenantError(KeyError):
+    """No data directory exists for the tenant id"""
+
+
+def approximate_size(obj: Any) -> int:
+    """Bytes held by an object graph (containers, strings, numbers and object attributes), counted once each"""
+    seen = set()
+    stack = [obj]
+    size = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__"):
+            stack.append(item.__dict__)
+    return size
+
+
+def _read_json(path: str) -> Any:
+    with open(path) as f:
+        return json.load(f)
+
+
+class TenantData:
+    """
+    Business data of one tenant
+
+    Attributes:
+        tenant_id: Tenant id
+        name: Business name
+        contact: {"email", "phone", "hours"}
+        service_areas: Areas the tenant serves
+        services: Service id -> service details
+        catalog: Product catalog with facet indexes
+        size: Approximate bytes owned by this tenant (data shared with the base is not counted)
+    """
+
+    def __init__(self, tenant_id: str, profile: Dict[str, Any], services: Dict[str, Any], catalog: ProductCatalog):
+        self.tenant_id = tenant_id
+        self.name = profile["name"]
+        self.contact = profile["contact"]
+        self.service_areas = profile["service_areas"]
+        self.services = services
+        self.catalog = catalog
+        self.size = 0
+
+
+class TenantStore:
+    """
+    Loads tenants on first use and keeps the most recently used ones
+
+    The base tenant (the data directory itself) is loaded once and pinned; a
+    tenant directory (tenants/<tenant_id>/) only holds the files in which it
+    differs, and the others are shared with the base instead of being
+    copied. Tenants are evicted least recently used first once more than
+    max_tenants are resident or their data exceeds max_bytes. Concurrent
+    requests for a tenant that is loading wait for that load.
+    """
+
+    def __init__(
+        self,
+        data_dir: str = DEFAULT_DATA_DIR,
+        max_tenants: int = DEFAULT_MAX_TENANTS,
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        """
+        Initialize the store
+
+        Args:
+            data_dir: Directory with the base data files and a tenants/ directory
+            max_tenants: Tenants kept resident (besides the base)
+            max_bytes: Memory the resident tenants may hold (besides the base)
+        """
+        self.data_dir = data_dir
+        self.tenants_dir = os.path.join(data_dir, "tenants")
+        self.max_tenants = max_tenants
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._tenants: "OrderedDict[str, TenantData]" = OrderedDict()
+        self._loading: Dict[str, threading.Event] = {}
+        self._resident_bytes = 0
+        self._base: Optional[TenantData] = None
+        self._base_lock = threading.Lock()
+
+    @property
+    def base(self) -> TenantData:
+        """The base tenant, loaded on first use"""
+        with self._base_lock:
+            if self._base is None:
+                self._base = TenantData(
+                    DEFAULT_TENANT,
+                    _read_json(os.path.join(self.data_dir, TENANT_FILE)),
+                    _read_json(os.path.join(self.data_dir, SERVICES_FILE))["services"],
+                    ProductCatalog.from_file(os.path.join(self.data_dir, PRODUCTS_FILE))
+                )
+                self._base.size = approximate_size(self._base)
+            return self._base
+
+    def tenant_dir(self, tenant_id: str) -> str:
+        if not TENANT_ID_PATTERN.match(tenant_id) or tenant_id in (".", ".."):
+            raise UnknownTenantError(f"Invalid tenant id: {tenant_id!r}")
+        return os.path.join(self.tenants_dir, tenant_id)
+
+    def exists(self, tenant_id: str) -> bool:
+        if tenant_id == DEFAULT_TENANT:
+            return True
+        try:
+            return os.path.isdir(self.tenant_dir(tenant_id))
+        except UnknownTenantError:
+            return False
+
+    def list_tenants(self) -> List[str]:
+        """Ids of every tenant with a data directory (plus the base)"""
+        if not os.path.isdir(self.tenants_dir):
+            return [DEFAULT_TENANT]
+        return [DEFAULT_TENANT] + sorted(
+            name for name in os.listdir(self.tenants_dir)
+            if os.path.isdir(os.path.join(self.tenants_dir, name))
+        )
+
+    def _load(self, tenant_id: str) -> TenantData:
+        directory = self.tenant_dir(tenant_id)
+        if not os.path.isdir(directory):
+            raise UnknownTenantError(f"Unknown tenant: {tenant_id}")
+        base = self.base
+
+        def own_file(name: str) -> Optional[str]:
+            path = os.path.join(directory, name)
+            return path if os.path.exists(path) else None
+
+        profile = {"name": base.name, "contact": base.contact, "service_areas": base.service_areas}
+        if own_file(TENANT_FILE):
+            profile.update(_read_json(own_file(TENANT_FILE)))
+        services = _read_json(own_file(SERVICES_FILE))["services"] if own_file(SERVICES_FILE) else base.services
+        catalog = ProductCatalog.from_file(own_file(PRODUCTS_FILE)) if own_file(PRODUCTS_FILE) else base.catalog
+
+        # Data shared with the base is charged to the base, not to every tenant using it
+        owned = [profile[field] for field in ("name", "contact", "service_areas") if profile[field] is not getattr(base, field)]
+        owned += [data for data, shared in ((services, base.services), (catalog, base.catalog)) if data is not shared]
+        tenant = TenantData(tenant_id, profile, services, catalog)
+        tenant.size = approximate_size(owned)
+        return tenant
+
+    def get(self, tenant_id: str = DEFAULT_TENANT) -> TenantData:
+        """
+        Data of a tenant, loading it (and evicting others) if it is not resident
+
+        Raises:
+            UnknownTenantError: No data directory exists for the tenant
+        """
+        if tenant_id == DEFAULT_TENANT:
+            return self.base
+        self.tenant_dir(tenant_id)  # rejects malformed ids before they count as misses
+
+        while True:
+            with self._lock:
+                tenant = self._tenants.get(tenant_id)
+                if tenant is not None:
+                    self._tenants.move_to_end(tenant_id)
+                    self.hits += 1
+                    return tenant
+                loading = self._loading.get(tenant_id)
+                if loading is None:
+                    loading = self._loading[tenant_id] = threading.Event()
+                    self.misses += 1
+                    break
+            # Another thread is loading this tenant; use its result (or load again if it failed)
+            loading.wait()
+
+        try:
+            tenant = self._load(tenant_id)
+            with self._lock:
+                self._tenants[tenant_id] = tenant
+                self._resident_bytes += tenant.size
+                self._evict()
+            return tenant
+        finally:
+            with self._lock:
+                del self._loading[tenant_id]
+            loading.set()
+
+    def _evict(self):
+        """Drop least recently used tenants until within limits (the newest one always stays)"""
+        while len(self._tenants) > 1 and (
+            len(self._tenants) > self.max_tenants or self._resident_bytes > self.max_bytes
+        ):
+            _, evicted = self._tenants.popitem(last=False)
+            self._resident_bytes -= evicted.size
+            self.evictions += 1
+
+    def invalidate(self, tenant_id: Optional[str] = None):
+        """Drop a tenant (or every tenant, including the base) so its files are read again"""
+        with self._lock:
+            if tenant_id is None:
+                self._tenants.clear()
+                self._resident_bytes = 0
+            elif tenant_id in self._tenants:
+                self._resident_bytes -= self._tenants.pop(tenant_id).size
+        if tenant_id in (None, DEFAULT_TENANT):
+            with self._base_lock:
+                self._base = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "resident_tenants": len(self._tenants),
+                "resident_bytes": self._resident_bytes,
+                "base_bytes": self._base.size if self._base is not None else 0,
+                "max_tenants": self.max_tenants,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_tenant_store() -> TenantStore:
+    """Return the process-wide tenant store, creating it on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TenantStore()
+        return _store
+
+
+def set_tenant_store(store: TenantStore):
+    """Replace the process-wide tenant store (e.g. with another data directory or limits)"""
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def get_tenant(tenant_id: Optional[str] = None) -> TenantData:
+    """Data of a tenant from the process-wide store (the base tenant when None)"""
+    return get_tenant_store().get(tenant_id or DEFAULT_TENANT)
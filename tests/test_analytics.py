@@ -0,0 +1,56 @@
+import pandas as pd
+
+from analytics import runs_to_dataframe, summarize_runs
+
+
+def experiment(experiment_id, durations, **config):
+    return {
+        "experiment_id": experiment_id,
+        "persona_key": "friendly_zero_shot",
+        "model_name": "gpt-4o-mini",
+        "temperature": 0.7,
+        "top_p": 1.0,
+        "max_tokens": 1000,
+        "max_iterations": 5,
+        "think_model": None,
+        "respond_model": None,
+        "escalation_model": None,
+        **config,
+        "query_results": [
+            {"query_number": n, "success": duration is not None, "duration": duration or 30.0}
+            for n, duration in enumerate(durations, 1)
+        ],
+    }
+
+
+def test_configs_differing_beyond_sampling_get_their_own_rows():
+    results = [
+        experiment(1, [1.0]),
+        experiment(2, [2.0], think_model="gpt-4o-mini"),
+        experiment(3, [3.0], respond_model="gpt-4o"),
+        experiment(4, [4.0], escalation_model="gpt-4o"),
+        experiment(5, [5.0], max_iterations=3),
+        experiment(6, [6.0], max_tokens=500),
+    ]
+    summary = summarize_runs(runs_to_dataframe(results), n_resamples=10)
+
+    # Experiment 2 only spells out the default think model
+    assert len(summary) == 5
+    assert summary["total_runs"].sum() == 6
+    assert summary["experiments"].sum() == 6
+
+
+def test_latency_percentiles_cover_successful_runs_only():
+    summary = summarize_runs(runs_to_dataframe([experiment(1, [1.0, 2.0, None, None])]), n_resamples=10)
+    row = summary.iloc[0]
+
+    assert row["success_rate"] == 0.5
+    assert row["p50_latency"] == 1.5
+    assert row["p90_latency"] <= 2.0
+    assert row["mean_latency"] == 1.5
+    assert row["p90_ci_high"] <= 2.0
+
+
+def test_failed_configs_have_no_latency():
+    summary = summarize_runs(runs_to_dataframe([experiment(1, [None])]), n_resamples=10)
+    assert pd.isna(summary.iloc[0]["p50_latency"])
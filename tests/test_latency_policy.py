@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from latency_policy import LatencyPolicy
+from llm_scheduler import LLMScheduler
+
+
+class ServiceUnavailable(Exception):
+    status_code = 503
+
+
+def test_default_config_returns_result_within_deadline():
+    result, stats = LatencyPolicy(timeout=1.0).execute("m", lambda cancel: "ok")
+    assert result == "ok"
+    assert stats["winner"] == "primary"
+    assert not stats["timed_out"]
+
+
+def test_default_config_raises_when_the_request_overruns_the_deadline():
+    def slow(cancel):
+        time.sleep(0.3)
+        return "late"
+
+    abandoned = []
+    with pytest.raises(TimeoutError):
+        LatencyPolicy(timeout=0.1).execute("m", slow, on_abandoned=abandoned.append)
+    assert abandoned == ["late"]
+
+
+def test_default_config_stops_retrying_at_the_deadline():
+    scheduler = LLMScheduler({"default": {"rpm": 1e6, "tpm": 1e9}}, max_retries=5, base_delay=0.2, max_delay=60)
+    calls = []
+
+    def failing():
+        calls.append(time.monotonic())
+        raise ServiceUnavailable("overloaded")
+
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        LatencyPolicy(timeout=0.5).execute("m", lambda cancel: scheduler.call("m", failing, 10, cancel))
+    elapsed = time.monotonic() - start
+    sent = len(calls)
+
+    assert elapsed < 0.7
+    time.sleep(0.5)
+    assert len(calls) == sent
+
+
+def test_async_and_sync_paths_agree_on_the_deadline():
+    import asyncio
+
+    async def slow(cancel):
+        await asyncio.sleep(0.3)
+        return "late"
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(LatencyPolicy(timeout=0.1).aexecute("m", slow))
@@ -0,0 +1,83 @@
+import contextlib
+import io
+
+from fake_llm import SimulatedChatModel
+from llm_scheduler import LLMScheduler
+from load_generator import UNLIMITED_RATE_LIMITS
+from react_agent import ReActAgent
+
+
+def build_agent(**kwargs) -> ReActAgent:
+    return ReActAgent(
+        persona_name="test",
+        system_prompt="You are a helpful assistant for a cleaning company.",
+        scheduler=LLMScheduler(UNLIMITED_RATE_LIMITS),
+        llm_factory=lambda name: SimulatedChatModel(name),
+        prefetch_tools=0,
+        **kwargs
+    )
+
+
+class InterleavingProfiler:
+    """Memory profiler stand-in that starts another run on the agent as the first profiled run ends"""
+
+    def __init__(self, message: str):
+        self.message = message
+        self.agent = None
+        self.profiles = 0
+
+    @contextlib.contextmanager
+    def profile(self):
+        self.profiles += 1
+        memory = {"net_growth": 0, "peak": 0, "profile": self.profiles}
+        yield memory
+        if memory["profile"] == 1:
+            # Finishes (and logs) between the first run's log entry and its profile
+            self.agent.run(self.message)
+
+
+def test_profiles_go_on_the_runs_own_log_entry():
+    profiler = InterleavingProfiler("Are your products pet safe?")
+    agent = build_agent(memory_profiler=profiler)
+    profiler.agent = agent
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent.run("What services do you offer?")
+
+    first, second = agent.get_logs()
+    assert first["user_message"] == "What services do you offer?"
+    assert first["memory"]["profile"] == 1
+    assert second["memory"]["profile"] == 2
+
+
+SEARCH = "I should search services for deep clean options."
+AVAILABILITY = "I need to check availability in the riverside area."
+ANSWER = "Based on what I found, the answer is that we offer deep cleaning in Riverside."
+
+
+def run_with_thoughts(thoughts):
+    agent = ReActAgent(
+        persona_name="test",
+        system_prompt="You are a helpful assistant for a cleaning company.",
+        scheduler=LLMScheduler(UNLIMITED_RATE_LIMITS),
+        llm_factory=lambda name: SimulatedChatModel(name, responses=thoughts),
+        prefetch_tools=0,
+        max_iterations=5
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent.run("Can you deep clean my home in Riverside?")
+    return agent.get_logs()[-1]
+
+
+def test_one_repeated_lookup_does_not_end_the_loop():
+    log = run_with_thoughts([SEARCH, SEARCH, AVAILABILITY, ANSWER, ANSWER])
+
+    assert [action["tool"] for action in log["actions"]] == ["search_services", "search_services", "check_availability"]
+    assert log["loop_detection"] == {"duplicate_actions": 1, "stalled": False, "iterations_saved": 0}
+
+
+def test_repeated_lookups_end_the_loop():
+    log = run_with_thoughts([SEARCH, SEARCH, SEARCH, AVAILABILITY, ANSWER])
+
+    assert log["iterations"] == 3
+    assert log["loop_detection"] == {"duplicate_actions": 2, "stalled": True, "iterations_saved": 2}
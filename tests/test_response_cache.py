@@ -0,0 +1,95 @@
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from fake_llm import SimulatedChatModel
+from llm_scheduler import LLMScheduler
+from load_generator import UNLIMITED_RATE_LIMITS
+from react_agent import ReActAgent
+from response_cache import SemanticResponseCache
+
+
+def build_agent(cache: SemanticResponseCache) -> ReActAgent:
+    return ReActAgent(
+        persona_name="test",
+        system_prompt="You are a helpful assistant for a cleaning company.",
+        scheduler=LLMScheduler(UNLIMITED_RATE_LIMITS),
+        llm_factory=lambda name: SimulatedChatModel(name),
+        response_cache=cache,
+        prefetch_tools=0
+    )
+
+
+def run(agent: ReActAgent, message: str, session_id=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent.run(message, session_id=session_id)
+    return agent.get_logs()[-1]
+
+
+def test_session_answers_are_not_served_to_other_callers():
+    agent = build_agent(SemanticResponseCache())
+    follow_up = "And is it cheaper for a second visit there?"
+
+    run(agent, "Do you service the Riverside area?", session_id="alice")
+    run(agent, follow_up, session_id="alice")
+    other = run(agent, follow_up)
+
+    assert [log["cache_hit"] for log in agent.get_logs()] == [False, False, False]
+    assert other["cache_hit"] is False
+
+
+def test_sessionless_answers_are_shared():
+    agent = build_agent(SemanticResponseCache())
+    run(agent, "What services do you offer?")
+    assert run(agent, "What services do you offer?")["cache_hit"] is True
+
+
+def test_key_terms_separate_paraphrases_with_another_meaning():
+    cache = SemanticResponseCache()
+    for question in ("How long does deep cleaning take?", "How much does regular maintenance cost?",
+                     "Are your products pet safe?"):
+        cache.store("ns", question, f"answer to {question}", 1.0)
+
+    assert cache.lookup("ns", "How long does move-out cleaning take?") is None
+    assert cache.lookup("ns", "How long does regular maintenance take?") is None
+    assert cache.lookup("ns", "Are your products child safe?") is None
+    assert cache.lookup("ns", "How much does regular maintenance cost?")["answer"].endswith("cost?")
+
+
+def test_incremental_index_matches_a_full_rebuild():
+    cache = SemanticResponseCache(capacity=150)
+    questions = [f"Do you offer {kind} cleaning for a {size} bedroom home number {n}?"
+                 for n in range(40) for kind, size in (("deep", "two"), ("regular", "three"), ("eco", "four"), ("move-out", "one"))]
+    for question in questions:
+        cache.store("ns", question, f"answer to {question}", 1.0)
+
+    space = cache._namespaces["ns"]
+    assert len(space.ids) == 150
+    n = len(space.ids)
+    tf = np.stack([cache.vectorizer.transform(cache._entries[eid]["question"]) for eid in space.ids])
+    idf = np.log((1 + n) / (1 + np.count_nonzero(tf, axis=0))).astype(np.float32) + 1
+    exact = tf * idf
+    exact /= np.linalg.norm(exact, axis=1, keepdims=True)
+
+    query = cache.vectorizer.transform("Do you offer deep cleaning for a two bedroom home?")
+    exact_query = query * idf / np.linalg.norm(query * idf)
+    approximate = space.weighted[:n] @ (query * space.idf / np.linalg.norm(query * space.idf))
+    assert np.abs(approximate - exact @ exact_query).max() < 0.02
+    assert cache.lookup("ns", questions[-1])["answer"] == f"answer to {questions[-1]}"
+
+
+def test_expired_entries_leave_the_index(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = SemanticResponseCache(ttl=10)
+    cache.store("ns", "What services do you offer?", "old", 1.0)
+    now[0] += 5
+    cache.store("ns", "Are your products pet safe?", "pets", 1.0)
+    now[0] += 6
+
+    assert cache.lookup("ns", "What services do you offer?") is None
+    assert cache.lookup("ns", "Are your products pet safe?")["answer"] == "pets"
+    assert cache.get_stats()["expirations"] == 1
+    assert cache._namespaces["ns"].ids == [1]
@@ -0,0 +1,50 @@
+import contextlib
+import io
+import itertools
+
+from experiment_runner import ExperimentRunner
+from fake_llm import DEFAULT_RESPONSES, SimulatedChatModel
+from sweep_planner import plan_sweep
+
+QUERY = "What services do you offer?"
+
+
+def failing_once_factory():
+    """Models whose very first call (across all of them) fails with a non-retryable error"""
+    calls = itertools.count()
+    responses = itertools.cycle(DEFAULT_RESPONSES)
+
+    def respond(messages):
+        if next(calls) == 0:
+            raise ValueError("transient failure")
+        return next(responses)
+
+    return lambda name: SimulatedChatModel(name, responses=respond)
+
+
+def test_plan_shares_units_between_identical_configs(tmp_path):
+    runner = ExperimentRunner(output_dir=str(tmp_path))
+    with contextlib.redirect_stdout(io.StringIO()):
+        runner.add_experiment("friendly_zero_shot", test_queries=[QUERY])
+        runner.add_experiment("friendly_zero_shot", test_queries=[f"  {QUERY} ", "Are your products pet safe?"])
+        runner.add_experiment("friendly_zero_shot", test_queries=[QUERY], max_iterations=3)
+    plan = plan_sweep(runner.experiments)
+
+    assert plan.assignments[1][0][2] == plan.assignments[2][0][2]
+    assert plan.assignments[3][0][2] != plan.assignments[1][0][2]
+    assert plan.total_runs == 4 and plan.unique_runs == 3 and plan.saved_runs == 1
+
+
+def test_failed_unit_is_rerun_not_shared(tmp_path):
+    runner = ExperimentRunner(output_dir=str(tmp_path), llm_factory=failing_once_factory())
+    with contextlib.redirect_stdout(io.StringIO()):
+        runner.add_experiment("friendly_zero_shot", test_queries=[QUERY])
+        runner.add_experiment("friendly_zero_shot", test_queries=[QUERY])
+        runner.add_experiment("friendly_zero_shot", test_queries=[QUERY])
+        runner.run_experiments(verbose=False)
+
+    first, second, third = (result["query_results"][0] for result in runner.results)
+    assert first["success"] is False
+    assert second["success"] is True and "shared_from" not in second
+    assert third["success"] is True
+    assert third["shared_from"] == {"experiment_id": 2, "query_number": 1}
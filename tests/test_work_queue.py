@@ -0,0 +1,94 @@
+import contextlib
+import io
+import time
+
+import pytest
+
+from distributed_experiments import ExperimentWorker
+from work_queue import create_work_queue
+
+
+@pytest.fixture(params=["sqlite", "directory"])
+def open_queue(request, tmp_path):
+    path = str(tmp_path / ("queue.db" if request.param == "sqlite" else "queue"))
+    queues = []
+
+    def open_queue(**kwargs):
+        queue = create_work_queue(path, request.param, **kwargs)
+        queues.append(queue)
+        return queue
+
+    yield open_queue
+    for queue in queues:
+        queue.close()
+
+
+def test_expired_lease_is_reclaimed_then_failed(open_queue):
+    queue = open_queue(lease_seconds=0.2, max_attempts=2)
+    queue.enqueue([{"id": "u1"}])
+
+    assert queue.claim("w1")["id"] == "u1"
+    assert queue.claim("w2") is None
+    time.sleep(0.3)
+    assert queue.claim("w2")["id"] == "u1"
+    assert not queue.heartbeat("u1", "w1")
+    time.sleep(0.3)
+
+    assert queue.claim("w3") is None
+    assert queue.counts()["failed"] == 1
+    assert queue.results()[0]["error"] == "lease expired"
+
+
+def test_failed_unit_is_retried_until_max_attempts(open_queue):
+    queue = open_queue(max_attempts=2)
+    queue.enqueue([{"id": "u1"}])
+
+    queue.claim("w1")
+    queue.fail("u1", "w1", "first")
+    assert queue.counts()["pending"] == 1
+    queue.claim("w2")
+    queue.fail("u1", "w2", "second")
+
+    assert queue.claim("w3") is None
+    assert queue.counts() == {"pending": 0, "leased": 0, "done": 0, "failed": 1}
+    assert queue.results()[0]["error"] == "second"
+
+
+def test_only_the_first_result_is_stored(open_queue):
+    queue = open_queue()
+    queue.enqueue([{"id": "u1"}])
+    queue.claim("w1")
+
+    assert queue.complete("u1", "w1", {"value": 1})
+    assert not queue.complete("u1", "w2", {"value": 2})
+    assert queue.results()[0]["result"] == {"value": 1}
+
+
+class FlakyWorker(ExperimentWorker):
+    """Runs units without an agent; the first run's query fails"""
+
+    def __init__(self, queue):
+        super().__init__(queue, runner=object(), worker_id="w1", poll_interval=0.01)
+        self.runs = 0
+
+    def run_unit(self, unit):
+        self.runs += 1
+        success = self.runs > 1
+        return {
+            "persona_name": "test",
+            "query_result": {"success": success, "error": None if success else "transient failure"},
+            "run_log": None,
+            "worker": self.worker_id
+        }
+
+
+def test_worker_retries_unsuccessful_units(open_queue):
+    queue = open_queue(max_attempts=3)
+    queue.enqueue([{"id": "u1"}])
+    worker = FlakyWorker(queue)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        worker.run()
+
+    assert (worker.completed, worker.failed) == (1, 1)
+    assert queue.results()[0]["status"] == "done"
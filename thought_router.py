@@ -0,0 +1,194 @@
+"""
+Keyword router for THINK output
+Decides between acting and responding and parses the tool call from one thought,
+lowercasing it once and never scanning again for a keyword DECIDE ruled out
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+
+from tools import TOOL_DEFINITIONS
+
+
+TOOL_NAMES = [tool["name"] for tool in TOOL_DEFINITIONS]
+
+# Every tool name contains an underscore, so one scan for "_" rules them all out
+TOOL_NAME_MARKER = "_" if all("_" in name for name in TOOL_NAMES) else ""
+
+# Thought mentions that mean the agent wants to use a tool
+ACTION_KEYWORDS = [
+    "search", "check", "get", "record", "look up", "find",
+    "tool", "function", "call", "need to", "should use"
+]
+
+# Thought mentions that mean the agent has enough information to answer
+ANSWER_KEYWORDS = [
+    "answer:", "response:", "i can tell", "i know that",
+    "based on", "the answer is", "i would say"
+]
+
+# (mentions, argument) pairs, first match wins
+SERVICE_QUERIES: List[Tuple[Tuple[str, ...], str]] = [
+    (("allergen", "allergy"), "allergen"),
+    (("move",), "move"),
+    (("maintenance", "regular"), "regular maintenance"),
+    (("deep clean",), "deep cleaning")
+]
+
+PRODUCT_CATEGORIES: List[Tuple[Tuple[str, ...], str]] = [
+    (("bathroom",), "bathroom"),
+    (("floor",), "floor"),
+    (("glass", "window"), "glass"),
+    (("all-purpose", "all purpose"), "all_purpose")
+]
+
+PRODUCT_CERTIFICATIONS: List[Tuple[Tuple[str, ...], str]] = [
+    (("leaping bunny",), "leaping bunny"),
+    (("safer choice",), "safer choice"),
+    (("green seal",), "green seal"),
+    (("ewg",), "ewg")
+]
+
+ALLERGEN_FREE_MENTIONS = ["allergen-free", "allergen free", "hypoallergenic"]
+
+AVAILABILITY_AREAS = ["downtown", "northside", "westend", "eastbridge", "southgate", "riverside", "hilltop", "lakeside"]
+
+# User message mentions that predict the first tool call (see predict_actions)
+PRODUCT_MENTIONS = ["product", "ingredient", "chemical", "toxic", "certified", "certification", "cleaner"]
+SERVICE_MENTIONS = [
+    "service", "offer", "cost", "price", "how much", "how long", "deep clean", "move", "maintenance", "allerg"
+]
+
+
+# Action keywords known to be absent once DECIDE has stopped at index i (all before it missed)
+_ABSENT_BEFORE = [frozenset(ACTION_KEYWORDS[:i]) for i in range(len(ACTION_KEYWORDS) + 1)]
+
+
+def _first(text: str, terms: List[str]) -> Optional[str]:
+    """First of the terms (in the given order) that occurs in the text"""
+    for term in terms:
+        if term in text:
+            return term
+    return None
+
+
+def _first_argument(text: str, table: List[Tuple[Tuple[str, ...], str]], default: str) -> str:
+    for mentions, argument in table:
+        for mention in mentions:
+            if mention in text:
+                return argument
+    return default
+
+
+def decide(text: str) -> Tuple[Optional[str], str, frozenset]:
+    """
+    Keyword decision of a lowercased thought
+
+    Returns:
+        ("act" | "respond" | None, reason, action keywords found absent);
+        None when no routing keyword occurs and the caller falls back on the run's state
+    """
+    if TOOL_NAME_MARKER in text:
+        tool_name = _first(text, TOOL_NAMES)
+        if tool_name:
+            return "act", f"tool '{tool_name}' mentioned", _ABSENT_BEFORE[0]
+
+    for index, keyword in enumerate(ACTION_KEYWORDS):
+        if keyword in text:
+            return "act", f"keyword '{keyword}' found", _ABSENT_BEFORE[index]
+    absent = _ABSENT_BEFORE[-1]
+
+    if _first(text, ANSWER_KEYWORDS):
+        return "respond", "answer keyword found", absent
+
+    return None, "", absent
+
+
+def _product_parameters(text: str) -> Dict[str, Any]:
+    parameters = {"product_category": _first_argument(text, PRODUCT_CATEGORIES, "all")}
+    # Facet filters are only added when mentioned, so plain product calls keep their cache key
+    certification = _first_argument(text, PRODUCT_CERTIFICATIONS, "")
+    if certification:
+        parameters["certification"] = certification
+    if _first(text, ALLERGEN_FREE_MENTIONS):
+        parameters["allergen_free"] = True
+    return parameters
+
+
+def parse_action(text: str, absent: frozenset = frozenset()) -> Optional[Dict[str, Any]]:
+    """
+    Tool call a lowercased thought asks for
+
+    Keywords in `absent` (already ruled out by DECIDE) are not scanned for again.
+    Returns None for tools that need arguments the heuristics cannot extract
+    (record_customer_interest, record_feedback).
+    """
+    if "search" not in absent and "search" in text and ("service" in text or "cleaning" in text):
+        return {
+            "tool": "search_services",
+            "parameters": {"query": _first_argument(text, SERVICE_QUERIES, "all services")}
+        }
+
+    if "check" not in absent and "check" in text and (
+        "availability" in text or "location" in text or "area" in text
+    ):
+        return {
+            "tool": "check_availability",
+            "parameters": {"location": _first(text, AVAILABILITY_AREAS) or "downtown"}
+        }
+
+    if "product" in text or "ingredient" in text or "chemical" in text:
+        return {"tool": "get_product_info", "parameters": _product_parameters(text)}
+
+    if "record" not in absent and "record" in text and (
+        "interest" in text or "lead" in text or "contact" in text or "feedback" in text
+    ):
+        return None
+
+    return {
+        "tool": "search_services",
+        "parameters": {"query": "all services"}
+    }
+
+
+def route_thought(thought: str) -> Dict[str, Any]:
+    """
+    Route one thought for DECIDE and ACT
+
+    Returns:
+        {"decision": "act" | "respond" | None, "reason": str, "action": dict | None};
+        the action is only parsed when the thought may lead to ACT
+    """
+    text = thought.lower()
+    decision, reason, absent = decide(text)
+    return {
+        "decision": decision,
+        "reason": reason,
+        "action": parse_action(text, absent) if decision != "respond" else None
+    }
+
+
+def predict_actions(message: str, limit: int = 2) -> List[Dict[str, Any]]:
+    """
+    Tool calls the first thought about a user message is likely to ask for
+
+    Arguments are extracted as parse_action would from a thought mentioning
+    the same terms, so a correct prediction has the same action key. Only
+    read-only tools are predicted.
+
+    Args:
+        message: The user's message
+        limit: Maximum number of predictions, most likely first
+    """
+    text = message.lower()
+    actions = []
+    area = _first(text, AVAILABILITY_AREAS)
+    if area:
+        actions.append({"tool": "check_availability", "parameters": {"location": area}})
+    if _first(text, PRODUCT_MENTIONS):
+        actions.append({"tool": "get_product_info", "parameters": _product_parameters(text)})
+    if _first(text, SERVICE_MENTIONS):
+        actions.append({
+            "tool": "search_services",
+            "parameters": {"query": _first_argument(text, SERVICE_QUERIES, "all services")}
+        })
+    return actions[:limit]
@@ -0,0 +1,220 @@
+"""
+Speculative tool prefetch
+Tool calls predicted from the user message (thought_router.predict_actions) start
+on a thread pool when a run starts, overlapping the first THINK call; OBSERVE
+takes a prefetched result when the model asks for the same call, and the
+predictions it never asks for are counted as wasted work
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+
+from cpu_profiler import follow
+from shared_tools import SharedToolCalls
+from tools import TOOL_FUNCTIONS, SIDE_EFFECT_TOOLS
+
+
+DEFAULT_MAX_WORKERS = 4
+
+# Summary of a run that prefetched nothing
+EMPTY_SUMMARY = {"predicted": 0, "hits": 0, "wasted": 0, "saved_seconds": 0.0, "wasted_seconds": 0.0}
+
+
+def _call_tool(action: Dict[str, Any], tenant_id: str, shared: Optional[SharedToolCalls]) -> Tuple[Any, float]:
+    """(result, seconds) of one tool call"""
+    start = time.perf_counter()
+    if shared is not None:
+        result = shared.call(action, tenant_id)
+    else:
+        result = TOOL_FUNCTIONS[action["tool"]](**action["parameters"], tenant_id=tenant_id)
+    return result, time.perf_counter() - start
+
+
+class Prefetch:
+    """
+    The prefetched tool calls of one run, keyed by observation key
+
+    A run's OBSERVE steps run one after another, so take() / atake() are not locked.
+    """
+
+    def __init__(self, prefetcher: "ToolPrefetcher", futures: Dict[str, Future]):
+        self.prefetcher = prefetcher
+        self.predicted = len(futures)
+        self.hits = 0
+        self.saved_seconds = 0.0
+        self._futures = futures
+
+    def take(self, key: str) -> Tuple[bool, Any]:
+        """
+        (True, result) when the call was prefetched, waiting for it if still running;
+        (False, None) otherwise, including when the prefetched call failed
+        """
+        future = self._futures.pop(key, None)
+        if future is None:
+            return False, None
+        return self._taken(key, future, time.perf_counter())
+
+    async def atake(self, key: str) -> Tuple[bool, Any]:
+        """take() on the event loop: a call still running is awaited without blocking the loop"""
+        future = self._futures.pop(key, None)
+        if future is None:
+            return False, None
+        wait_start = time.perf_counter()
+        try:
+            # Shielded: a cancelled run must not cancel the call it was waiting for
+            await asyncio.shield(asyncio.wrap_future(future))
+        except Exception:
+            pass  # reported by _taken
+        return self._taken(key, future, wait_start)
+
+    def _taken(self, key: str, future: Future, wait_start: float) -> Tuple[bool, Any]:
+        """Outcome of take() once the call is waited for"""
+        try:
+            result, duration = future.result()
+        except Exception:
+            # Executed again by OBSERVE, which reports the error as usual
+            self._futures[key] = future
+            return False, None
+        self.hits += 1
+        # Tool time hidden behind the THINK call
+        self.saved_seconds += max(0.0, duration - (time.perf_counter() - wait_start))
+        return True, result
+
+    def close(self) -> Dict[str, Any]:
+        """Cancel the unused calls that have not started and summarize the run's speculation"""
+        wasted_seconds = 0.0
+        for future in self._futures.values():
+            if future.cancel():
+                continue
+            if future.done():
+                wasted_seconds += self._duration(future)
+            else:
+                # Still running: charged to the prefetcher once it finishes
+                future.add_done_callback(lambda f: self.prefetcher.record_wasted_seconds(self._duration(f)))
+        summary = {
+            "predicted": self.predicted,
+            "hits": self.hits,
+            "wasted": len(self._futures),
+            "saved_seconds": self.saved_seconds,
+            "wasted_seconds": wasted_seconds
+        }
+        self._futures = {}
+        self.prefetcher.record(summary)
+        return summary
+
+    @staticmethod
+    def _duration(future: Future) -> float:
+        try:
+            return future.result()[1]
+        except Exception:
+            return 0.0
+
+
+class ToolPrefetcher:
+    """
+    Runs predicted read-only tool calls on a shared thread pool
+
+    Tools with side effects (SIDE_EFFECT_TOOLS) are never run speculatively.
+    Keeps process-wide totals of predictions, hits and wasted work.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS):
+        """
+        Initialize the prefetcher
+
+        Args:
+            max_workers: Threads running prefetched tool calls
+        """
+        self.max_workers = max_workers
+        self.runs = 0
+        self.predicted = 0
+        self.hits = 0
+        self.wasted = 0
+        self.saved_seconds = 0.0
+        self.wasted_seconds = 0.0
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(
+        self,
+        calls: Dict[str, Dict[str, Any]],
+        tenant_id: str,
+        shared: Optional[SharedToolCalls] = None
+    ) -> Optional[Prefetch]:
+        """
+        Start prefetching tool calls
+
+        Args:
+            calls: Observation key -> {"tool", "parameters"}
+            tenant_id: Tenant whose data the tools use
+            shared: Tool scope of the run (see shared_tools.py); runs sharing it prefetch each call once
+
+        Returns:
+            The run's Prefetch, or None when no call may be prefetched
+        """
+        calls = {key: action for key, action in calls.items() if action["tool"] not in SIDE_EFFECT_TOOLS}
+        if not calls:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="tool-prefetch")
+            executor = self._executor
+        call = follow(_call_tool)  # sampled as part of the run's CPU profile
+        futures = {key: executor.submit(call, action, tenant_id, shared) for key, action in calls.items()}
+        return Prefetch(self, futures)
+
+    def record(self, summary: Dict[str, Any]):
+        """Add a closed run's speculation to the totals"""
+        with self._lock:
+            self.runs += 1
+            self.predicted += summary["predicted"]
+            self.hits += summary["hits"]
+            self.wasted += summary["wasted"]
+            self.saved_seconds += summary["saved_seconds"]
+            self.wasted_seconds += summary["wasted_seconds"]
+
+    def record_wasted_seconds(self, seconds: float):
+        with self._lock:
+            self.wasted_seconds += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "predicted": self.predicted,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.predicted if self.predicted else 0.0,
+                "wasted": self.wasted,
+                "saved_seconds": self.saved_seconds,
+                "wasted_seconds": self.wasted_seconds
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> ToolPrefetcher:
+    """Return the process-wide prefetcher, creating it on first use"""
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = ToolPrefetcher()
+        return _prefetcher
+
+
+def set_prefetcher(prefetcher: ToolPrefetcher):
+    """Replace the process-wide prefetcher (e.g. with more worker threads)"""
+    global _prefetcher
+    with _prefetcher_lock:
+        _prefetcher = prefetcher
@@ -5,119 +5,38 @@ These tools provide the agent with capabilities to interact with business data
 
 import json
 from datetime import datetime
-from typing import Dict, List, Any
-
-
-# Business data - services information
-SERVICES_DATA = {
-    "deep_cleaning": {
-        "name": "Deep Cleaning Services",
-        "description": "Comprehensive top-to-bottom cleaning of your entire home",
-        "features": [
-            "Focus on high-traffic areas and overlooked spaces",
-            "Allergen elimination from carpets, upholstery, and air vents",
-            "Perfect for seasonal refreshes or post-renovation cleanup"
-        ],
-        "duration": "4-8 hours",
-        "pricing": "$200-$400 depending on home size"
-    },
-    "move_cleaning": {
-        "name": "Move-In/Move-Out Cleaning",
-        "description": "Thorough cleaning to prepare homes for new occupants",
-        "features": [
-            "Special attention to sanitizing kitchens and bathrooms",
-            "Guarantee of allergen-free spaces for fresh starts",
-            "Flexible scheduling to match your moving timeline"
-        ],
-        "duration": "3-6 hours",
-        "pricing": "$180-$350 depending on home size"
-    },
-    "allergen_treatment": {
-        "name": "Allergen Treatment Services",
-        "description": "Specialized protocols for homes with allergy sufferers",
-        "features": [
-            "HEPA filtration vacuuming and air purification",
-            "Dust mite elimination and prevention strategies",
-            "Mold inspection and remediation",
-            "Pet dander removal treatments"
-        ],
-        "duration": "2-4 hours",
-        "pricing": "$150-$300 depending on treatment scope"
-    },
-    "regular_maintenance": {
-        "name": "Regular Maintenance Cleaning",
-        "description": "Weekly, bi-weekly, or monthly cleaning schedules",
-        "features": [
-            "Customized cleaning plans based on household needs",
-            "Consistent team members who know your home",
-            "Eco-friendly products tailored to your preferences"
-        ],
-        "duration": "2-3 hours per visit",
-        "pricing": "$100-$200 per visit, discounts for recurring service"
-    }
-}
+from typing import Dict, List, Any, Optional, Union
 
-PRODUCTS_DATA = {
-    "all_purpose_cleaner": {
-        "name": "EcoClean All-Purpose Cleaner",
-        "ingredients": "Plant-based surfactants, citric acid, essential oils",
-        "certifications": ["EPA Safer Choice", "EWG Verified"],
-        "allergen_free": True,
-        "use_cases": ["Countertops", "Appliances", "General surfaces"]
-    },
-    "bathroom_cleaner": {
-        "name": "GreenShine Bathroom Sanitizer",
-        "ingredients": "Hydrogen peroxide, plant-based acids, natural enzymes",
-        "certifications": ["EPA Safer Choice", "Leaping Bunny Certified"],
-        "allergen_free": True,
-        "use_cases": ["Toilets", "Showers", "Sinks"]
-    },
-    "floor_cleaner": {
-        "name": "PureFloor Wood & Tile Cleaner",
-        "ingredients": "Plant-derived cleaning agents, water",
-        "certifications": ["Green Seal Certified", "EWG A-rated"],
-        "allergen_free": True,
-        "use_cases": ["Hardwood", "Tile", "Laminate"]
-    },
-    "glass_cleaner": {
-        "name": "CrystalClear Glass Cleaner",
-        "ingredients": "Vinegar, plant-based alcohols, filtered water",
-        "certifications": ["EPA Safer Choice"],
-        "allergen_free": True,
-        "use_cases": ["Windows", "Mirrors", "Glass surfaces"]
-    }
-}
+from tenants import DEFAULT_TENANT, get_tenant
 
-SERVICE_AREAS = [
-    "Downtown Metropolitan Area",
-    "Northside District",
-    "Westend Village",
-    "Eastbridge",
-    "Southgate",
-    "Riverside Community",
-    "Hilltop Estates",
-    "Lakeside"
-]
+
+# Business data (services, service areas, contact details and products) is
+# per tenant and loaded from business_data/ on first use (see tenants.py)
+
+# Products returned by one get_product_info call (the catalog itself is in business_data/products.json)
+MAX_PRODUCT_RESULTS = 20
 
 # Storage for leads and feedback
 customer_leads = []
 customer_feedback = []
 
 
-def search_services(query: str) -> str:
+def search_services(query: str, tenant_id: str = DEFAULT_TENANT) -> str:
     """
     Search for cleaning services based on customer query.
 
     Args:
         query: Search query (e.g., "allergen", "move out", "regular")
+        tenant_id: Business location whose services are searched
 
     Returns:
         JSON string with matching services
     """
+    services = get_tenant(tenant_id).services
     query_lower = query.lower()
     matching_services = []
 
-    for service_id, service_info in SERVICES_DATA.items():
+    for service_id, service_info in services.items():
         # Search in name, description, and features
         search_text = (
             service_info["name"] + " " +
@@ -133,71 +52,103 @@ def search_services(query: str) -> str:
 
     if not matching_services:
         # Return all services if no match
-        matching_services = [{"id": k, **v} for k, v in SERVICES_DATA.items()]
+        matching_services = [{"id": k, **v} for k, v in services.items()]
 
     return json.dumps(matching_services, indent=2)
 
 
-def check_availability(location: str) -> str:
+def check_availability(location: str, tenant_id: str = DEFAULT_TENANT) -> str:
     """
     Check if BreatheEasy services are available in a specific location.
 
     Args:
         location: The location to check
+        tenant_id: Business location whose service areas are checked
 
     Returns:
         Availability status message
     """
+    tenant = get_tenant(tenant_id)
     location_lower = location.lower()
 
     # Check if location matches any service area
-    for area in SERVICE_AREAS:
+    for area in tenant.service_areas:
         if location_lower in area.lower() or area.lower() in location_lower:
             return json.dumps({
                 "available": True,
                 "area": area,
                 "message": f"Yes! We provide services in {area}. Contact us to schedule.",
-                "contact": {
-                    "email": "hello@breatheeasy.com",
-                    "phone": "(555) 123-EASY",
-                    "hours": "Monday-Saturday, 8am-6pm"
-                }
+                "contact": tenant.contact
             }, indent=2)
 
     return json.dumps({
         "available": False,
         "message": f"We don't currently service {location}, but we're expanding! Please leave your contact info and we'll notify you when we reach your area.",
-        "nearby_areas": SERVICE_AREAS[:3]
+        "nearby_areas": tenant.service_areas[:3]
     }, indent=2)
 
 
-def get_product_info(product_category: str = "all") -> str:
+def get_product_info(
+    product_category: str = "all",
+    certification: Optional[str] = None,
+    allergen_free: Optional[Union[bool, str]] = None,
+    use_case: Optional[str] = None,
+    ingredient: Optional[str] = None,
+    tenant_id: str = DEFAULT_TENANT
+) -> str:
     """
     Get information about cleaning products used by BreatheEasy.
 
+    Filters combine (a product must match all of them) and are answered from
+    the catalog's indexes (see product_catalog.py).
+
     Args:
-        product_category: Category of products (all, all_purpose, bathroom, floor, glass)
+        product_category: Category of products (all, all_purpose, bathroom, floor, glass) or a product name
+        certification: Certification the products must have (e.g. "Leaping Bunny", "EPA Safer Choice")
+        allergen_free: Only allergen-free products
+        use_case: What the products are used on (e.g. "showers", "hardwood")
+        ingredient: Ingredient the products contain (e.g. "vinegar")
+        tenant_id: Business location whose catalog is searched
 
     Returns:
         JSON string with product information
     """
-    category_lower = product_category.lower().replace(" ", "_")
-
-    if category_lower == "all":
-        return json.dumps(PRODUCTS_DATA, indent=2)
-
-    # Search for matching product
-    for product_id, product_info in PRODUCTS_DATA.items():
-        if category_lower in product_id or category_lower in product_info["name"].lower():
-            return json.dumps({product_id: product_info}, indent=2)
+    catalog = get_tenant(tenant_id).catalog
+    if isinstance(allergen_free, str):
+        allergen_free = allergen_free.strip().lower() in ("true", "yes", "1")
+    category = None if product_category.strip().lower() in ("", "all") else product_category
+    filters = {
+        "category": category,
+        "certification": certification,
+        "allergen_free": allergen_free,
+        "use_case": use_case,
+        "ingredient": ingredient
+    }
 
-    return json.dumps({
-        "message": "Product category not found",
-        "available_categories": list(PRODUCTS_DATA.keys())
-    }, indent=2)
+    products = catalog.search(**filters, limit=MAX_PRODUCT_RESULTS + 1)
+    if not products:
+        facets = catalog.facets()
+        return json.dumps({
+            "message": "No products match the requested filters",
+            "filters": {k: v for k, v in filters.items() if v is not None},
+            "available_categories": catalog.categories(),
+            "available_certifications": facets["certification"],
+            "available_use_cases": facets["use_case"]
+        }, indent=2)
+
+    matches = {
+        product["id"]: {k: v for k, v in product.items() if k != "id"}
+        for product in products[:MAX_PRODUCT_RESULTS]
+    }
+    if len(products) > MAX_PRODUCT_RESULTS:
+        return json.dumps({
+            "products": matches,
+            "message": f"Showing the first {MAX_PRODUCT_RESULTS} matches; narrow down with certification, allergen_free, use_case or ingredient"
+        }, indent=2)
+    return json.dumps(matches, indent=2)
 
 
-def record_customer_interest(name: str, email: str, message: str) -> str:
+def record_customer_interest(name: str, email: str, message: str, tenant_id: str = DEFAULT_TENANT) -> str:
     """
     Record customer interest/lead information.
 
@@ -205,6 +156,7 @@ def record_customer_interest(name: str, email: str, message: str) -> str:
         name: Customer's name
         email: Customer's email address
         message: Customer's message or interest details
+        tenant_id: Business location the lead is for
 
     Returns:
         Confirmation message
@@ -215,7 +167,8 @@ def record_customer_interest(name: str, email: str, message: str) -> str:
         'timestamp': timestamp,
         'name': name,
         'email': email,
-        'message': message
+        'message': message,
+        'tenant_id': tenant_id
     }
 
     customer_leads.append(lead_data)
@@ -244,12 +197,13 @@ def record_customer_interest(name: str, email: str, message: str) -> str:
     }, indent=2)
 
 
-def record_feedback(question: str) -> str:
+def record_feedback(question: str, tenant_id: str = DEFAULT_TENANT) -> str:
     """
     Record customer feedback or unanswered questions.
 
     Args:
         question: The question or feedback that couldn't be answered
+        tenant_id: Business location the question was asked at
 
     Returns:
         Confirmation message
@@ -258,7 +212,8 @@ def record_feedback(question: str) -> str:
 
     feedback_data = {
         'timestamp': timestamp,
-        'question': question
+        'question': question,
+        'tenant_id': tenant_id
     }
 
     customer_feedback.append(feedback_data)
@@ -281,7 +236,7 @@ def record_feedback(question: str) -> str:
     return json.dumps({
         "status": "recorded",
         "message": "Your question has been recorded and will be reviewed by our team. We'll get back to you with an answer soon!",
-        "contact_for_urgent": "For urgent matters, please call (555) 123-EASY"
+        "contact_for_urgent": f"For urgent matters, please call {get_tenant(tenant_id).contact['phone']}"
     }, indent=2)
 
 
@@ -317,7 +272,7 @@ TOOL_DEFINITIONS = [
     },
     {
         "name": "get_product_info",
-        "description": "Get detailed information about the eco-friendly cleaning products used by BreatheEasy. Use this when customers ask about product ingredients, certifications, allergen-safety, or what products are used for specific cleaning tasks.",
+        "description": "Get detailed information about the eco-friendly cleaning products used by BreatheEasy. Use this when customers ask about product ingredients, certifications, allergen-safety, or what products are used for specific cleaning tasks. Filters (certification, allergen_free, use_case, ingredient) return only the matching products.",
         "parameters": {
             "type": "object",
             "properties": {
@@ -325,6 +280,22 @@ TOOL_DEFINITIONS = [
                     "type": "string",
                     "description": "Category of products to retrieve: 'all' for all products, 'all_purpose', 'bathroom', 'floor', or 'glass' for specific categories",
                     "default": "all"
+                },
+                "certification": {
+                    "type": "string",
+                    "description": "Only products with this certification (e.g. 'Leaping Bunny', 'EPA Safer Choice', 'Green Seal', 'EWG')"
+                },
+                "allergen_free": {
+                    "type": "boolean",
+                    "description": "Only allergen-free products"
+                },
+                "use_case": {
+                    "type": "string",
+                    "description": "Only products for this use (e.g. 'showers', 'hardwood', 'windows')"
+                },
+                "ingredient": {
+                    "type": "string",
+                    "description": "Only products containing this ingredient (e.g. 'vinegar', 'citric acid')"
                 }
             },
             "required": []
@@ -369,6 +340,12 @@ TOOL_DEFINITIONS = [
 ]
 
 
+# Tools that change state outside the agent (results must never be reused or replayed)
+SIDE_EFFECT_TOOLS = {"record_customer_interest", "record_feedback"}
+
+
+# Every tool also takes tenant_id, which the agent passes from the run (never chosen by the LLM)
+
 # Map function names to actual functions
 TOOL_FUNCTIONS = {
     "search_services": search_services,
@@ -0,0 +1,410 @@
+"""
+Shared work queues for distributed experiment runs
+Work units are claimed under a lease that the worker renews with heartbeats;
+units whose lease runs out (crashed or stalled worker) are handed out again
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+
+DEFAULT_LEASE_SECONDS = 120.0
+
+# Claims of a unit before it is marked failed
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def default_worker_id() -> str:
+    """Worker id unique across hosts: hostname, pid and a random suffix"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class SQLiteWorkQueue:
+    """
+    Work queue in a SQLite file (WAL)
+
+    For workers on one host, or on several hosts sharing a filesystem with
+    reliable POSIX locking. Claims run in an IMMEDIATE transaction, so each
+    unit goes to exactly one live lease at a time. Like any SQLite
+    connection, an instance is used by one thread; open one per thread.
+    """
+
+    backend = "sqlite"
+
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ):
+        """
+        Open (or create) the queue
+
+        Args:
+            path: SQLite database file
+            lease_seconds: Time a claim stays valid without a heartbeat
+            max_attempts: Claims of a unit before it is marked failed
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA busy_timeout=30000")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS units (
+                id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS units_status ON units (status, lease_expires)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def put_meta(self, key: str, value: Any):
+        """Store a JSON value shared with workers and the merge step"""
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def enqueue(self, units: List[Dict[str, Any]]) -> int:
+        """
+        Add units (dicts with a unique "id"); units already queued are left as they are
+
+        Returns:
+            Number of units added
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO units (id, payload) VALUES (?, ?)",
+                [(unit["id"], json.dumps(unit)) for unit in units]
+            )
+            added = self.conn.total_changes - before
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Lease the next pending (or expired) unit, or None when there is none"""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Units whose last lease ran out on the final attempt have failed
+            self.conn.execute(
+                "UPDATE units SET status = 'failed', error = 'lease expired' "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            )
+            row = self.conn.execute(
+                "SELECT id, payload FROM units "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY rowid LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE units SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (worker_id, now + self.lease_seconds, row[0])
+                )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return json.loads(row[1]) if row else None
+
+    def heartbeat(self, unit_id: str, worker_id: str) -> bool:
+        """Extend a lease; False if the worker no longer holds it"""
+        cursor = self.conn.execute(
+            "UPDATE units SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+            (time.time() + self.lease_seconds, unit_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, unit_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Store a unit's result; the first result wins if the unit ran twice
+
+        Returns:
+            Whether this result was stored
+        """
+        cursor = self.conn.execute(
+            "UPDATE units SET status = 'done', worker = ?, result = ?, lease_expires = NULL "
+            "WHERE id = ? AND status != 'done'",
+            (worker_id, json.dumps(result), unit_id)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, unit_id: str, worker_id: str, error: str):
+        """Give a unit back after an error; it is retried until max_attempts"""
+        self.conn.execute(
+            "UPDATE units SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = ?, lease_expires = NULL "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (self.max_attempts, error, unit_id, worker_id)
+        )
+
+    def counts(self) -> Dict[str, int]:
+        """Units per status (pending / leased / done / failed)"""
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        counts.update(dict(self.conn.execute("SELECT status, COUNT(*) FROM units GROUP BY status")))
+        return counts
+
+    def results(self) -> List[Dict[str, Any]]:
+        """{"unit", "status", "result", "error", "worker"} of every finished unit"""
+        rows = self.conn.execute(
+            "SELECT payload, status, result, error, worker FROM units "
+            "WHERE status IN ('done', 'failed') ORDER BY rowid"
+        )
+        return [
+            {
+                "unit": json.loads(payload),
+                "status": status,
+                "result": json.loads(result) if result else None,
+                "error": error,
+                "worker": worker
+            }
+            for payload, status, result, error, worker in rows
+        ]
+
+    def close(self):
+        self.conn.close()
+
+
+class DirectoryWorkQueue:
+    """
+    Work queue in a directory on shared storage (NFS, SMB, ...)
+
+    For workers on several hosts where SQLite locking cannot be trusted.
+    Each unit is a file that moves pending/ -> leased/ -> done/ (or failed/);
+    claims and lease recovery are atomic renames, so of several workers
+    racing for a file exactly one succeeds. Heartbeats touch the leased file,
+    and a lease expires when that file's change time is older than
+    lease_seconds (hosts need roughly synchronized clocks).
+    """
+
+    backend = "directory"
+
+    STATES = ("pending", "leased", "done", "failed")
+
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ):
+        """
+        Open (or create) the queue
+
+        Args:
+            path: Queue directory
+            lease_seconds: Time a claim stays valid without a heartbeat
+            max_attempts: Claims of a unit before it is marked failed
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        for state in self.STATES + ("meta",):
+            os.makedirs(os.path.join(path, state), exist_ok=True)
+
+    def _file(self, state: str, unit_id: str) -> str:
+        return os.path.join(self.path, state, f"{unit_id}.json")
+
+    def _write(self, filepath: str, data: Any):
+        """Write a file atomically (readers never see it half-written)"""
+        tmp = f"{filepath}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, filepath)
+
+    @staticmethod
+    def _read(filepath: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(filepath) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _ids(self, state: str) -> List[str]:
+        return sorted(name[:-len(".json")] for name in os.listdir(os.path.join(self.path, state)) if name.endswith(".json"))
+
+    def put_meta(self, key: str, value: Any):
+        """Store a JSON value shared with workers and the merge step"""
+        self._write(os.path.join(self.path, "meta", f"{key}.json"), value)
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        value = self._read(os.path.join(self.path, "meta", f"{key}.json"))
+        return default if value is None else value
+
+    def enqueue(self, units: List[Dict[str, Any]]) -> int:
+        """
+        Add units (dicts with a unique "id"); units already queued are left as they are
+
+        Returns:
+            Number of units added
+        """
+        existing = {unit_id for state in self.STATES for unit_id in self._ids(state)}
+        added = 0
+        for unit in units:
+            if unit["id"] not in existing:
+                self._write(self._file("pending", unit["id"]), {"unit": unit, "attempts": 0})
+                existing.add(unit["id"])
+                added += 1
+        return added
+
+    def _recover_expired(self):
+        """Move leased units whose lease ran out back to pending (or to failed on the last attempt)"""
+        now = time.time()
+        for unit_id in self._ids("leased"):
+            leased = self._file("leased", unit_id)
+            try:
+                expired = now - os.stat(leased).st_ctime > self.lease_seconds
+            except FileNotFoundError:
+                continue
+            if not expired:
+                continue
+            entry = self._read(leased)
+            target = "failed" if entry is not None and entry["attempts"] >= self.max_attempts else "pending"
+            try:
+                os.rename(leased, self._file(target, unit_id))
+            except FileNotFoundError:
+                continue  # Another worker recovered (or the owner completed) it first
+            if target == "failed":
+                self._write(self._file("failed", unit_id), {**entry, "error": "lease expired"})
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Lease the next pending (or expired) unit, or None when there is none"""
+        self._recover_expired()
+        for unit_id in self._ids("pending"):
+            leased = self._file("leased", unit_id)
+            try:
+                os.rename(self._file("pending", unit_id), leased)
+            except FileNotFoundError:
+                continue  # Claimed by another worker
+            entry = self._read(leased)
+            if entry is None or os.path.exists(self._file("done", unit_id)):
+                # Finished by a worker whose lease had expired
+                os.remove(leased)
+                continue
+            entry["attempts"] += 1
+            entry["worker"] = worker_id
+            self._write(leased, entry)
+            return entry["unit"]
+        return None
+
+    def heartbeat(self, unit_id: str, worker_id: str) -> bool:
+        """Extend a lease; False if the worker no longer holds it"""
+        leased = self._file("leased", unit_id)
+        entry = self._read(leased)
+        if entry is None or entry.get("worker") != worker_id:
+            return False
+        try:
+            os.utime(leased)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def complete(self, unit_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Store a unit's result; the first result wins if the unit ran twice
+
+        Returns:
+            Whether this result was stored
+        """
+        # The unit is normally still leased, but may have been recovered to pending meanwhile
+        sources = [self._file("leased", unit_id), self._file("pending", unit_id)]
+        entry = next((e for e in map(self._read, sources) if e is not None), None)
+        if entry is None:
+            return False
+        done = self._file("done", unit_id)
+        tmp = f"{done}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({**entry, "worker": worker_id, "result": result}, f)
+        try:
+            # link() fails if the file exists, so a second result never replaces the first
+            os.link(tmp, done)
+            stored = True
+        except FileExistsError:
+            stored = False
+        finally:
+            os.remove(tmp)
+        if stored:
+            for source in sources:
+                try:
+                    os.remove(source)
+                except FileNotFoundError:
+                    pass
+        return stored
+
+    def fail(self, unit_id: str, worker_id: str, error: str):
+        """Give a unit back after an error; it is retried until max_attempts"""
+        leased = self._file("leased", unit_id)
+        entry = self._read(leased)
+        if entry is None or entry.get("worker") != worker_id:
+            return
+        target = "failed" if entry["attempts"] >= self.max_attempts else "pending"
+        self._write(leased, {**entry, "error": error})
+        try:
+            os.rename(leased, self._file(target, unit_id))
+        except FileNotFoundError:
+            pass
+
+    def counts(self) -> Dict[str, int]:
+        """Units per status (pending / leased / done / failed)"""
+        return {state: len(self._ids(state)) for state in self.STATES}
+
+    def results(self) -> List[Dict[str, Any]]:
+        """{"unit", "status", "result", "error", "worker"} of every finished unit"""
+        finished = []
+        for state in ("done", "failed"):
+            for unit_id in self._ids(state):
+                entry = self._read(self._file(state, unit_id))
+                if entry is not None:
+                    finished.append({
+                        "unit": entry["unit"],
+                        "status": state,
+                        "result": entry.get("result"),
+                        "error": entry.get("error"),
+                        "worker": entry.get("worker")
+                    })
+        return finished
+
+    def close(self):
+        pass
+
+
+def create_work_queue(path: str, backend: Optional[str] = None, **kwargs):
+    """
+    Open a work queue
+
+    Args:
+        path: SQLite file or queue directory
+        backend: "sqlite" or "directory" (default: sqlite for *.db paths, otherwise directory)
+        **kwargs: lease_seconds, max_attempts
+    """
+    if backend is None:
+        backend = "sqlite" if path.endswith(".db") else "directory"
+    if backend == "sqlite":
+        return SQLiteWorkQueue(path, **kwargs)
+    if backend == "directory":
+        return DirectoryWorkQueue(path, **kwargs)
+    raise ValueError(f"Unknown work queue backend '{backend}' (expected 'sqlite' or 'directory')")